@@ -0,0 +1,68 @@
+import os
+import random
+
+from langchain_core.documents import Document
+
+SAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "doc_folder")
+
+# A fixed vocabulary, so the corpora are the same on every run and machine
+VOCABULARY = ("vector database index embedding query document chunk loader source pipeline latency batch "
+              "throughput memory search recall metadata cluster namespace collection upsert insert delete "
+              "model token request response network storage partition shard replica cache result").split()
+
+
+def make_corpus(num_documents, words_per_document=800, seed=42):
+    """
+    Creates a synthetic corpus of documents made of random sentences and paragraphs.
+
+    :param num_documents: The number of documents.
+    :param words_per_document: The number of words per document.
+    :param seed: The random seed, the same seed always gives the same corpus.
+    :return: A list of documents.
+    """
+    rng = random.Random(seed)
+    documents = []
+    for doc_num in range(num_documents):
+        words = [rng.choice(VOCABULARY) for _ in range(words_per_document)]
+        sentences = [" ".join(words[start:start + 12]).capitalize() + "." for start in range(0, len(words), 12)]
+        paragraphs = ["  ".join(sentences[start:start + 6]) for start in range(0, len(sentences), 6)]
+        documents.append(Document(page_content="\n\n".join(paragraphs),
+                                  metadata={"source": f"synthetic/doc-{doc_num}.txt", "title": f"Document {doc_num}"}))
+    return documents
+
+
+def make_queries(num_queries, words_per_query=8, seed=7):
+    """
+    Creates synthetic search queries from the corpus vocabulary.
+
+    :param num_queries: The number of queries.
+    :param words_per_query: The number of words per query.
+    :param seed: The random seed.
+    :return: A list of query strings.
+    """
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(VOCABULARY) for _ in range(words_per_query)) for _ in range(num_queries)]
+
+
+def make_large_pdf(file_path, num_pages, sample_folder=SAMPLE_FOLDER):
+    """
+    Creates a large PDF by repeating the pages of the sample PDFs in tests/doc_folder.
+
+    :param file_path: The path of the PDF to write.
+    :param num_pages: The number of pages.
+    :param sample_folder: The folder with the sample PDFs.
+    :return: The path of the PDF.
+    """
+    import pypdf
+
+    sample_pages = []
+    for file_name in sorted(os.listdir(sample_folder)):
+        if file_name.endswith(".pdf"):
+            sample_pages.extend(pypdf.PdfReader(os.path.join(sample_folder, file_name)).pages)
+
+    writer = pypdf.PdfWriter()
+    for page_num in range(num_pages):
+        writer.add_page(sample_pages[page_num % len(sample_pages)])
+    with open(file_path, "wb") as f:
+        writer.write(f)
+    return file_path
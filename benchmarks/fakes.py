@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from pydantic import PrivateAttr
+
+from vector_database_loader.milvus_vector_db import MilvusVectorLoader
+from vector_database_loader.pinecone_vector_db import PineconeVectorLoader
+
+
+class LatencyFakeEmbeddings(DeterministicFakeEmbedding):
+    """
+    A deterministic fake embedding client that sleeps like a remote embedding provider and counts its calls.
+    Each call takes latency seconds plus per_text_latency seconds per text.
+    """
+    latency: float = 0.0
+    per_text_latency: float = 0.0
+    embed_calls: int = 0
+    embedded_texts: int = 0
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.embed_calls += 1
+            self.embedded_texts += len(texts)
+        time.sleep(self.latency + self.per_text_latency * len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        with self._lock:
+            self.embed_calls += 1
+            self.embedded_texts += 1
+        time.sleep(self.latency + self.per_text_latency)
+        return super().embed_query(text)
+
+
+class FakePineconeIndex:
+    """
+    Stands in for a Pinecone Index handle. Upserts sleep for request_latency seconds on a thread pool, like the
+    client's async requests, and only count the vectors.
+    """
+
+    def __init__(self, request_latency=0.0, pool_threads=8):
+        self.request_latency = request_latency
+        self.executor = ThreadPoolExecutor(max_workers=pool_threads)
+        self.lock = threading.Lock()
+        self.upsert_requests = 0
+        self.vector_count = 0
+
+    def upsert(self, vectors, namespace=None, async_req=False):
+        def send():
+            time.sleep(self.request_latency)
+            with self.lock:
+                self.upsert_requests += 1
+                self.vector_count += len(vectors)
+            return {"upserted_count": len(vectors)}
+
+        future = self.executor.submit(send)
+        future.get = future.result
+        return future if async_req else future.result()
+
+
+class FakeMilvusClient:
+    """
+    Stands in for a MilvusClient. Inserts sleep for request_latency seconds and only count the rows.
+    """
+
+    def __init__(self, request_latency=0.0):
+        self.request_latency = request_latency
+        self.lock = threading.Lock()
+        self.insert_requests = 0
+        self.row_count = 0
+
+    def insert(self, collection_name, data):
+        time.sleep(self.request_latency)
+        with self.lock:
+            self.insert_requests += 1
+            self.row_count += len(data)
+        return {"insert_count": len(data)}
+
+
+def get_offline_pinecone_loader(embedding_client, request_latency=0.0, **kwargs):
+    """
+    Creates a PineconeVectorLoader writing to a FakePineconeIndex, so the Pinecone write path runs offline.
+
+    :param embedding_client: The embedding client.
+    :param request_latency: The simulated latency of each upsert request in seconds.
+    :param kwargs: Other PineconeVectorLoader options.
+    :return: The loader.
+    """
+    loader = PineconeVectorLoader("benchmark-index", embedding_client, **kwargs)
+    loader.index_handle = FakePineconeIndex(request_latency, pool_threads=loader.max_workers * loader.upsert_parallelism)
+    loader.index_ready = True
+    return loader
+
+
+def get_offline_milvus_loader(embedding_client, request_latency=0.0, **kwargs):
+    """
+    Creates a MilvusVectorLoader writing to a FakeMilvusClient, so the Milvus write path runs offline.
+
+    :param embedding_client: The embedding client.
+    :param request_latency: The simulated latency of each insert request in seconds.
+    :param kwargs: Other MilvusVectorLoader options.
+    :return: The loader.
+    """
+    loader = MilvusVectorLoader("benchmark_collection", embedding_client, **kwargs)
+    loader.milvus_client = FakeMilvusClient(request_latency)
+    loader.index_ready = True
+    return loader
@@ -0,0 +1,272 @@
+"""
+Offline benchmarks of the load and query pipeline. Embeddings come from a deterministic fake client with configurable
+latency, and the Pinecone and Milvus write paths go to in-memory stand-ins, so the suite needs no API keys or network.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scenarios pinecone_write --documents 1000 --embed-latency 0.1
+    python -m benchmarks.run_benchmarks --update-baselines
+
+Each scenario runs in its own process, so its peak RSS is measured on its own. Results are compared with
+benchmarks/baselines.json, and the exit status is 1 if any scenario regressed.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.corpus import make_corpus, make_queries, make_large_pdf
+from benchmarks.fakes import LatencyFakeEmbeddings, get_offline_pinecone_loader, get_offline_milvus_loader
+from vector_database_loader.document_processing_utils import document_chunker, iter_folder_documents
+from vector_database_loader.local_vector_db import LocalVectorLoader, LocalVectorQuery
+from vector_database_loader.tracing import Tracer, set_tracer
+
+DEFAULT_BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_CONFIG = {
+    "documents": 200,
+    "words_per_document": 800,
+    "chunk_size": 512,
+    "dimension": 384,
+    "embed_latency": 0.02,
+    "request_latency": 0.005,
+    "batch_size": 100,
+    "max_workers": 4,
+    "queries": 200,
+    "pdf_pages": 200,
+    "pdf_shard_pages": 25,
+}
+
+
+def get_chunks(config):
+    return document_chunker(make_corpus(config["documents"], config["words_per_document"]), config["chunk_size"])
+
+
+def setup_chunk(config, embedding_client, work_dir):
+    documents = make_corpus(config["documents"], config["words_per_document"])
+    return lambda: len(document_chunker(documents, config["chunk_size"]))
+
+
+def setup_pinecone_write(config, embedding_client, work_dir):
+    chunks = get_chunks(config)
+    loader = get_offline_pinecone_loader(embedding_client, config["request_latency"], batch_size=config["batch_size"],
+                                         max_workers=config["max_workers"])
+    return lambda: loader.load_documents(chunks)
+
+
+def setup_milvus_write(config, embedding_client, work_dir):
+    chunks = get_chunks(config)
+    loader = get_offline_milvus_loader(embedding_client, config["request_latency"], batch_size=config["batch_size"],
+                                       max_workers=config["max_workers"])
+    return lambda: loader.load_documents(chunks)
+
+
+def setup_local_write(config, embedding_client, work_dir):
+    chunks = get_chunks(config)
+    loader = LocalVectorLoader("benchmark-index", embedding_client, path=work_dir, batch_size=config["batch_size"],
+                               max_workers=config["max_workers"])
+    return lambda: loader.load_documents(chunks)
+
+
+def setup_local_query(config, embedding_client, work_dir):
+    loader = LocalVectorLoader("benchmark-index", embedding_client, path=work_dir, batch_size=config["batch_size"],
+                               max_workers=config["max_workers"])
+    loader.load_documents(get_chunks(config))
+    vdb_query = LocalVectorQuery("benchmark-index", embedding_client, path=work_dir)
+    queries = make_queries(config["queries"])
+
+    def run():
+        for query in queries:
+            vdb_query.query(query)
+        return len(queries)
+
+    return run
+
+
+def setup_pdf_parse(config, work_dir, **pdf_options):
+    make_large_pdf(os.path.join(work_dir, "large.pdf"), config["pdf_pages"])
+    content_source = {"name": "Benchmark PDFs", "type": "PDF", "location": work_dir, "chunk_size": 0, **pdf_options}
+    return lambda: sum(1 for _ in iter_folder_documents(content_source))
+
+
+def setup_pdf_parse_pypdf(config, embedding_client, work_dir):
+    # The current parser, PyPDFLoader
+    return setup_pdf_parse(config, work_dir)
+
+
+def setup_pdf_parse_pypdfium2(config, embedding_client, work_dir):
+    return setup_pdf_parse(config, work_dir, pdf_backend="pypdfium2")
+
+
+def setup_pdf_parse_sharded(config, embedding_client, work_dir):
+    return setup_pdf_parse(config, work_dir, parse_workers=config["max_workers"],
+                           pdf_shard_pages=config["pdf_shard_pages"])
+
+
+# Scenario name to setup function. A setup function prepares the scenario outside of the measured time and returns
+# the function to measure, which returns the number of items (chunks, queries or PDF pages) it processed.
+SCENARIOS = {
+    "chunk": setup_chunk,
+    "pinecone_write": setup_pinecone_write,
+    "milvus_write": setup_milvus_write,
+    "local_write": setup_local_write,
+    "local_query": setup_local_query,
+    "pdf_parse_pypdf": setup_pdf_parse_pypdf,
+    "pdf_parse_pypdfium2": setup_pdf_parse_pypdfium2,
+    "pdf_parse_sharded": setup_pdf_parse_sharded,
+}
+
+
+def get_peak_rss_mb():
+    """
+    :return: The peak resident set size of this process in MB, or None where the resource module is unavailable.
+    """
+    try:
+        import resource  # Not available on Windows
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024, 1)
+
+
+def run_scenario(name, config):
+    """
+    Runs one benchmark scenario in the current process.
+
+    :param name: The scenario name, one of SCENARIOS.
+    :param config: The benchmark configuration, see DEFAULT_CONFIG.
+    :return: A dictionary with the scenario's items, seconds, items_per_sec, embed_calls, peak_rss_mb and the
+      duration of each pipeline stage.
+    """
+    tracer = Tracer(quiet=True)
+    previous_tracer = set_tracer(tracer)
+    embedding_client = LatencyFakeEmbeddings(size=config["dimension"], latency=config["embed_latency"])
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            run = SCENARIOS[name](config, embedding_client, work_dir)
+            embedding_client.embed_calls = 0
+            tracer.reset()
+
+            start_time = time.perf_counter()
+            items = run()
+            seconds = time.perf_counter() - start_time
+    finally:
+        set_tracer(previous_tracer)
+
+    return {
+        "config": config,
+        "items": items,
+        "seconds": round(seconds, 4),
+        "items_per_sec": round(items / seconds, 1),
+        "embed_calls": embedding_client.embed_calls,
+        "peak_rss_mb": get_peak_rss_mb(),
+        "stages": {stage: round(totals["duration_s"], 4) for stage, totals in tracer.get_stage_totals().items()},
+    }
+
+
+def run_benchmarks(scenario_names, config):
+    """
+    Runs benchmark scenarios, each in a fresh process.
+
+    :param scenario_names: The names of the scenarios to run.
+    :param config: The benchmark configuration.
+    :return: A dictionary of scenario name to result, see run_scenario.
+    """
+    results = {}
+    for name in scenario_names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results[name] = executor.submit(run_scenario, name, config).result()
+    return results
+
+
+def find_regressions(results, baselines, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares benchmark results with baselines. Throughput more than tolerance below the baseline, peak RSS more than
+    tolerance above it, or a different number of embedding calls are regressions. Scenarios whose baseline was
+    recorded with a different configuration are not compared.
+
+    :param results: A dictionary of scenario name to result.
+    :param baselines: A dictionary of scenario name to baseline result.
+    :param tolerance: The allowed relative difference.
+    :return: A list of regression messages.
+    """
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None or baseline["config"] != result["config"]:
+            continue
+
+        if result["items_per_sec"] < baseline["items_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['items_per_sec']} items/sec, baseline {baseline['items_per_sec']}")
+        if (result["peak_rss_mb"] is not None and baseline["peak_rss_mb"] is not None
+                and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance)):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']:.1f} MB, "
+                               f"baseline {baseline['peak_rss_mb']:.1f} MB")
+        if result["embed_calls"] != baseline["embed_calls"]:
+            regressions.append(f"{name}: {result['embed_calls']} embed calls, baseline {baseline['embed_calls']}")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'Scenario':<20} {'Items':>8} {'Seconds':>9} {'Items/sec':>11} {'Embed calls':>12} {'Peak RSS MB':>12}  Stages")
+    for name, result in results.items():
+        peak_rss = "n/a" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f}"
+        stages = ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in result["stages"].items())
+        print(f"{name:<20} {result['items']:>8} {result['seconds']:>9.3f} {result['items_per_sec']:>11.1f} "
+              f"{result['embed_calls']:>12} {peak_rss:>12}  {stages}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the offline load and query benchmarks.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--documents", type=int, default=DEFAULT_CONFIG["documents"],
+                        help="The number of synthetic documents.")
+    parser.add_argument("--embed-latency", type=float, default=DEFAULT_CONFIG["embed_latency"],
+                        help="The simulated latency of each embedding call in seconds.")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_CONFIG["max_workers"],
+                        help="The number of batches loaded concurrently.")
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES_PATH, help="The baselines JSON file.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="The allowed relative difference from the baselines.")
+    parser.add_argument("--update-baselines", action="store_true",
+                        help="Store the results as the new baselines instead of comparing with them.")
+    parser.add_argument("--output", help="Optional JSON file to write the results to.")
+    args = parser.parse_args(argv)
+
+    config = dict(DEFAULT_CONFIG, documents=args.documents, embed_latency=args.embed_latency,
+                  max_workers=args.max_workers)
+    results = run_benchmarks(args.scenarios, config)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        baselines.update(results)
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Updated baselines in {args.baselines}")
+        return 0
+
+    regressions = find_regressions(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    if not regressions:
+        print("No regressions against the baselines")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
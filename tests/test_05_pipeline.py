@@ -0,0 +1,705 @@
+import asyncio
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from vector_database_loader.base_vector_db import BaseVectorLoader, BaseVectorQuery
+from vector_database_loader.multi_target_vector_db import MultiTargetVectorLoader
+from vector_database_loader.embedding_cache import QueryEmbeddingCache
+from vector_database_loader.query_stats import QueryStats, PrometheusQueryMetrics
+from vector_database_loader.result_cache import SearchResultCache
+from vector_database_loader.pinecone_vector_db import PineconeVectorLoader
+from vector_database_loader.document_processing_utils import (
+    iter_folder_documents,
+    get_folder_documents
+)
+from vector_database_loader.pdf_loaders import PyPdfPageRangeLoader, get_page_ranges
+from vector_database_loader.pipeline_utils import (
+    batched,
+    prefetch,
+    run_concurrently,
+    AdaptiveBatcher
+)
+from vector_database_loader.sync_manifest import SyncManifest, FileManifest, LoadCheckpoint, assign_chunk_ids
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+class InMemoryVectorLoader(BaseVectorLoader):
+    """
+    A loader that keeps its batches in memory, so the load pipeline can be tested without a vector database.
+    """
+
+    def __init__(self, index_name, embedding_client, fail_on_batch=None, max_accepted_batch=None, **kwargs):
+        super().__init__(index_name, embedding_client, **kwargs)
+        self.fail_on_batch = fail_on_batch
+        self.max_accepted_batch = max_accepted_batch
+        self.batches = []
+        self.vectors = {}
+        self.lock = threading.Lock()
+
+    def load_document_batch(self, document_set):
+        if self.fail_on_batch is not None and len(self.batches) + 1 == self.fail_on_batch:
+            raise RuntimeError("Simulated failure loading batch")
+        if self.max_accepted_batch is not None and len(document_set) > self.max_accepted_batch:
+            raise PayloadTooLargeError("Request payload too large")
+        vectors = self.embedding_client.embed_documents([doc.page_content for doc in document_set])
+        with self.lock:
+            self.batches.append(list(zip(document_set, vectors)))
+            for doc, vector in zip(document_set, vectors):
+                self.vectors[doc.id or f"auto-{len(self.vectors)}"] = (doc, vector)
+
+    def load_record_batch(self, records):
+        with self.lock:
+            self.batches.append(records)
+            for record in records:
+                self.vectors[record["id"]] = (record["text"], record["values"])
+        return len(records)
+
+    def delete_documents(self, ids):
+        for chunk_id in ids:
+            self.vectors.pop(chunk_id, None)
+        return len(ids)
+
+    def index_exists(self, index_name=None):
+        return len(self.batches) > 0
+
+    def delete_index(self, index_name=None):
+        self.batches = []
+        self.vectors = {}
+        return True
+
+
+class ControlPlaneCountingLoader(InMemoryVectorLoader):
+    """
+    An in-memory loader that checks its index on every write and counts the control plane calls it makes.
+    """
+
+    def __init__(self, index_name, embedding_client, index_dimension=None, **kwargs):
+        super().__init__(index_name, embedding_client, **kwargs)
+        self.index_dimension = index_dimension
+        self.created = False
+        self.control_plane_calls = 0
+
+    def load_document_batch(self, document_set):
+        return self.load_record_batch(self.embed_documents(document_set))
+
+    def load_record_batch(self, records):
+        self.ensure_index()
+        return super().load_record_batch(records)
+
+    def index_exists(self, index_name=None):
+        self.control_plane_calls += 1
+        return self.created or self.index_dimension is not None
+
+    def create_index(self, index_name=None, embedding_client=None):
+        self.control_plane_calls += 1
+        self.created = True
+        return True
+
+    def get_index_dimension(self):
+        self.control_plane_calls += 1
+        return self.index_dimension
+
+
+class FakePineconeIndex:
+    """
+    Stands in for a Pinecone Index handle, recording upsert requests, how many were in flight at once, and deletes.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.deletes = []
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def upsert(self, vectors, namespace=None, async_req=False):
+        def send():
+            with self.lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(0.02)
+            with self.lock:
+                self.in_flight -= 1
+                self.requests.append((namespace, len(vectors)))
+
+        future = self.executor.submit(send)
+        future.get = future.result
+        return future
+
+    def delete(self, ids=None, delete_all=False, namespace=None):
+        self.deletes.append((namespace, "all" if delete_all else len(ids)))
+
+
+class PayloadTooLargeError(Exception):
+    status_code = 413
+
+
+class SlowQueryEmbeddings(DeterministicFakeEmbedding):
+    """
+    A deterministic fake embedding client that takes 10 ms per query, like a remote embedding provider.
+    """
+
+    def embed_query(self, text):
+        time.sleep(0.01)
+        return super().embed_query(text)
+
+
+class InMemoryVectorQuery(BaseVectorQuery):
+    """
+    A query class over a LangChain InMemoryVectorStore, so the query path can be tested without a vector database.
+    """
+
+    def get_client(self):
+        vdb = InMemoryVectorStore(self.embedding_client)
+        vdb.add_documents(make_documents(20))
+        return vdb
+
+
+def make_documents(count, source="test"):
+    return [Document(page_content=f"Document number {i}", metadata={"source": source}) for i in range(count)]
+
+
+class PipelineTestCases(unittest.TestCase):
+    def test_batched(self):
+        batches = list(batched(range(7), 3))
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_prefetch_bounds_producer(self):
+        produced = []
+
+        def producer():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        stream = prefetch(producer(), max_queued=2)
+        self.assertEqual(next(stream), 0)
+        # The producer can only run a few items ahead of the consumer
+        self.assertLess(len(produced), 10)
+        self.assertEqual(list(stream), list(range(1, 100)))
+
+    def test_prefetch_propagates_errors(self):
+        def producer():
+            yield 1
+            raise RuntimeError("crawl failed")
+
+        with self.assertRaises(RuntimeError):
+            list(prefetch(producer()))
+
+    def test_run_concurrently_reports_in_order(self):
+        reported = []
+
+        def worker(item):
+            time.sleep(0.05 if item % 2 == 0 else 0.0)
+            return item * 10
+
+        run_concurrently(range(10), worker, max_workers=4,
+                         on_result=lambda index, item, result: reported.append((index, result)))
+        self.assertEqual(reported, [(i, i * 10) for i in range(10)])
+
+    def test_run_concurrently_stops_on_error(self):
+        started = []
+
+        def worker(item):
+            started.append(item)
+            if item == 2:
+                raise ValueError("batch failed")
+            time.sleep(0.01)
+
+        with self.assertRaises(ValueError):
+            run_concurrently(range(1000), worker, max_workers=3)
+        self.assertLess(len(started), 20)
+
+    def test_load_documents_concurrently(self):
+        loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=10, max_workers=4)
+        loaded = loader.load_documents(make_documents(95))
+        self.assertEqual(loaded, 95)
+        self.assertEqual(len(loader.batches), 10)
+        self.assertEqual(sum(len(batch) for batch in loader.batches), 95)
+
+    def test_aload_documents(self):
+        loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=10, max_workers=3)
+        loaded = asyncio.run(loader.aload_documents(make_documents(42)))
+        self.assertEqual(loaded, 42)
+        self.assertEqual(sum(len(batch) for batch in loader.batches), 42)
+
+    def test_aload_sources_streaming(self):
+        loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5, max_workers=2)
+        content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": "doc_folder"}]
+        doc_count = asyncio.run(loader.aload_sources(content_sources, streaming=True))
+        self.assertTrue(doc_count > 0)
+        self.assertEqual(sum(len(batch) for batch in loader.batches), doc_count)
+
+    def test_aquery(self):
+        vector_db = InMemoryVectorQuery("test-index", DeterministicFakeEmbedding(size=8))
+        documents = asyncio.run(vector_db.aquery("Document number 3", num_results=2))
+        self.assertEqual(len(documents), 2)
+        self.assertEqual(documents[0].page_content, "Document number 3")
+
+    def test_query_many(self):
+        embedding_client = DeterministicFakeEmbedding(size=8)
+        vector_db = InMemoryVectorQuery("test-index", embedding_client)
+        queries = [f"Document number {i % 20}" for i in range(45)]
+
+        results = vector_db.query_many(queries, num_results=2, batch_size=10, max_workers=4)
+        self.assertEqual(len(results), 45)
+        self.assertEqual([query_results[0].page_content for query_results in results], queries)
+
+        vector_results = vector_db.query_many(query_vectors=embedding_client.embed_documents(queries[:5]))
+        self.assertEqual([query_results[0].page_content for query_results in vector_results], queries[:5])
+
+        async_results = asyncio.run(vector_db.aquery_many(queries, batch_size=10, max_workers=4))
+        self.assertEqual([query_results[0].page_content for query_results in async_results], queries)
+
+        with self.assertRaises(ValueError):
+            vector_db.query_many()
+
+        query_cache = QueryEmbeddingCache()
+        cached_db = InMemoryVectorQuery("test-index", embedding_client, query_cache=query_cache)
+        cached_db.query_many(queries)
+        query_cache.clear()
+        cached_results = cached_db.query_many(queries)
+        self.assertEqual([query_results[0].page_content for query_results in cached_results], queries)
+        self.assertEqual(query_cache.misses, 45)
+        cached_db.query_many(queries)
+        self.assertEqual(query_cache.hits, 45)
+
+    def test_query_many_filter_and_result_cache(self):
+        result_cache = SearchResultCache()
+        vector_db = InMemoryVectorQuery("test-index", DeterministicFakeEmbedding(size=8), result_cache=result_cache)
+        queries = [f"Document number {i}" for i in range(10)]
+
+        def skip_odd(doc):
+            return int(doc.page_content.split()[-1]) % 2 == 0
+
+        results = vector_db.query_many(queries, num_results=1, filter=skip_odd, max_workers=4)
+        self.assertTrue(all(skip_odd(query_results[0]) for query_results in results))
+        async_results = asyncio.run(vector_db.aquery_many(queries, num_results=1, filter=skip_odd))
+        self.assertEqual(async_results, results)
+        # Callable filters can't be keyed, so those searches are not cached
+        self.assertEqual((result_cache.hits, result_cache.misses), (0, 0))
+
+        vector_db.query_many(queries[:6], num_results=1)
+        results = vector_db.query_many(queries, num_results=1, batch_size=3)
+        self.assertEqual([query_results[0].page_content for query_results in results], queries)
+        self.assertEqual((result_cache.hits, result_cache.misses), (6, 10))
+        results = asyncio.run(vector_db.aquery_many(queries, num_results=1))
+        self.assertEqual([query_results[0].page_content for query_results in results], queries)
+        self.assertEqual((result_cache.hits, result_cache.misses), (16, 10))
+
+        # query() embeds differently to query_many, so it does not share their cached results
+        vector_db.query(queries[0], num_results=1)
+        self.assertEqual((result_cache.hits, result_cache.misses), (16, 11))
+        self.assertEqual(vector_db.get_query_stats()["count"], 10 + 10 + 6 + 10 + 10 + 1)
+
+    def test_query_latency_stats(self):
+        recorded = []
+        vector_db = InMemoryVectorQuery("test-index", SlowQueryEmbeddings(size=8),
+                                        metrics_hook=lambda index_name, timings: recorded.append(index_name))
+        for i in range(5):
+            vector_db.query(f"Document number {i}", num_results=2)
+
+        stats = vector_db.get_query_stats()
+        self.assertEqual(stats["count"], 5)
+        self.assertEqual(recorded, ["test-index"] * 5)
+        self.assertGreaterEqual(stats["embed"]["p50_ms"], 10)
+        self.assertLess(stats["search"]["p99_ms"], stats["embed"]["p50_ms"])
+        self.assertGreaterEqual(stats["total"]["p99_ms"], stats["total"]["p50_ms"])
+
+        # Only the most recent window of queries counts towards the percentiles
+        query_stats = QueryStats(window=2)
+        for total_ms in [100.0, 1.0, 1.0]:
+            query_stats.record("index", {"embed_ms": 0.0, "search_ms": total_ms, "post_ms": 0.0, "total_ms": total_ms})
+        self.assertEqual(query_stats.get_stats("index")["total"]["p99_ms"], 1.0)
+        self.assertIsNone(query_stats.get_stats("other-index")["total"]["p50_ms"])
+
+    @unittest.skipUnless(importlib.util.find_spec("prometheus_client"), "prometheus_client is not installed")
+    def test_prometheus_query_metrics(self):
+        from prometheus_client import CollectorRegistry
+
+        registry = CollectorRegistry()
+        vector_db = InMemoryVectorQuery("test-index", DeterministicFakeEmbedding(size=8),
+                                        metrics_hook=PrometheusQueryMetrics(registry=registry))
+        vector_db.query("Document number 1")
+        vector_db.query("Document number 2")
+        self.assertEqual(registry.get_sample_value("vector_query_latency_seconds_count",
+                                                   {"index": "test-index", "phase": "search"}), 2)
+
+    def test_stream_documents(self):
+        loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=10)
+        loaded = loader.stream_documents(iter(make_documents(25)))
+        self.assertEqual(loaded, 25)
+        self.assertEqual([len(batch) for batch in loader.batches], [10, 10, 5])
+
+    def test_iter_folder_documents_matches_list(self):
+        content_source = {"name": "Test Folder", "type": "PDF", "location": "doc_folder"}
+        streamed = list(iter_folder_documents(content_source))
+        listed = get_folder_documents(content_source)
+        self.assertEqual([doc.page_content for doc in streamed], [doc.page_content for doc in listed])
+
+    def test_parallel_parse_skips_corrupt_files(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for copy_num in range(3):
+                shutil.copy(os.path.join("doc_folder", "Fractional CTO and Technology Leadership.pdf"),
+                            os.path.join(folder, f"copy-{copy_num}.pdf"))
+            with open(os.path.join(folder, "corrupt.pdf"), "wb") as f:
+                f.write(b"not a pdf")
+
+            content_source = {"name": "Test Folder", "type": "PDF", "location": folder}
+            serial = list(iter_folder_documents(content_source))
+            parallel = list(iter_folder_documents(dict(content_source, parse_workers=2)))
+            listed = get_folder_documents(dict(content_source, parse_workers=2))
+
+        self.assertTrue(len(serial) > 0)
+        self.assertEqual(sorted(doc.page_content for doc in parallel), sorted(doc.page_content for doc in serial))
+        self.assertEqual(sorted(doc.page_content for doc in listed), sorted(doc.page_content for doc in serial))
+        self.assertFalse(any("corrupt" in doc.metadata["source"] for doc in parallel))
+
+    def test_parallel_parse_with_whitelist(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for file_name in ["keep-1.pdf", "keep-2.pdf", "skip.pdf"]:
+                shutil.copy(os.path.join("doc_folder", "Fractional CTO and Technology Leadership.pdf"),
+                            os.path.join(folder, file_name))
+
+            content_source = {"name": "Test Folder", "type": "PDF", "location": folder, "parse_workers": 2,
+                              "whitelist": [os.path.join(folder, "keep-*")],
+                              "blacklist": [os.path.join(folder, "keep-2.pdf")]}
+            listed = get_folder_documents(content_source)
+            serial = get_folder_documents(dict(content_source, parse_workers=1))
+
+        self.assertTrue(len(listed) > 0)
+        self.assertEqual({os.path.basename(doc.metadata["source"]) for doc in listed}, {"keep-1.pdf"})
+        # The same files are selected whether or not they are parsed in parallel
+        self.assertEqual([doc.page_content for doc in serial], [doc.page_content for doc in listed])
+
+    def test_sharded_pdf_parse_matches_whole_file(self):
+        self.assertEqual(get_page_ranges(5, 2), [(0, 2), (2, 4), (4, 5)])
+        sample_pdf = os.path.join("doc_folder", "Fractional CTO and Technology Leadership.pdf")
+        self.assertEqual(PyPdfPageRangeLoader(sample_pdf).get_page_count(), 2)
+
+        content_source = {"name": "Test Folder", "type": "PDF", "location": "doc_folder", "chunk_size": 0}
+        whole = get_folder_documents(content_source)
+        sharded = list(iter_folder_documents(dict(content_source, parse_workers=2, pdf_shard_pages=1)))
+        self.assertEqual([doc.page_content for doc in sharded], [doc.page_content for doc in whole])
+        self.assertEqual([doc.metadata["page"] for doc in sharded], [0, 1])
+
+    def test_page_range_loader_reads_page_labels_once(self):
+        import pypdf
+
+        page_labels_reads = []
+        page_labels = pypdf.PdfReader.page_labels
+
+        def counting_page_labels(reader):
+            page_labels_reads.append(1)
+            return page_labels.fget(reader)
+
+        with tempfile.TemporaryDirectory() as folder:
+            file_path = os.path.join(folder, "large.pdf")
+            writer = pypdf.PdfWriter()
+            for _ in range(2000):
+                writer.add_blank_page(width=200, height=200)
+            writer.write(file_path)
+
+            with mock.patch.object(pypdf.PdfReader, "page_labels", property(counting_page_labels)):
+                docs = list(PyPdfPageRangeLoader(file_path, 1000, 2000).lazy_load())
+
+        self.assertEqual([doc.metadata["page_label"] for doc in docs[:2]], ["1001", "1002"])
+        self.assertEqual(len(docs), 1000)
+        self.assertEqual(len(page_labels_reads), 1)
+
+    @unittest.skipUnless(importlib.util.find_spec("pypdfium2"), "pypdfium2 is not installed")
+    def test_pdfium_backend(self):
+        content_source = {"name": "Test Folder", "type": "PDF", "location": "doc_folder", "chunk_size": 0}
+        docs = get_folder_documents(dict(content_source, pdf_backend="pypdfium2"))
+        self.assertEqual(len(docs), 2)
+        self.assertIn("On-Demand CTO", docs[0].page_content)
+        with self.assertRaises(ValueError):
+            get_folder_documents(dict(content_source, pdf_backend="unknown"))
+
+    def test_load_sources_streaming(self):
+        loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5)
+        content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": "doc_folder"}]
+        doc_count = loader.load_sources(content_sources, delete_index=True, streaming=True)
+        self.assertTrue(doc_count > 0)
+        self.assertEqual(sum(len(batch) for batch in loader.batches), doc_count)
+
+    def test_assign_chunk_ids_is_stable(self):
+        first_ids = [doc.id for doc in assign_chunk_ids(make_documents(5), "Test Source")]
+        second_ids = [doc.id for doc in assign_chunk_ids(make_documents(5), "Test Source")]
+        self.assertEqual(first_ids, second_ids)
+        self.assertEqual(len(set(first_ids)), 5)
+
+        other_source_ids = [doc.id for doc in assign_chunk_ids(make_documents(5), "Other Source")]
+        self.assertFalse(set(first_ids) & set(other_source_ids))
+
+    def test_multi_target_loader(self):
+        embedding_client = DeterministicFakeEmbedding(size=8)
+        targets = [InMemoryVectorLoader("index-a", embedding_client), InMemoryVectorLoader("index-b", embedding_client)]
+        loader = MultiTargetVectorLoader(targets, batch_size=10, max_workers=2)
+
+        loaded = loader.load_documents(list(assign_chunk_ids(make_documents(25), "Test Source")))
+        self.assertEqual(loaded, 25)
+        self.assertEqual(len(targets[0].vectors), 25)
+        self.assertEqual(targets[0].vectors, targets[1].vectors)
+
+        asyncio.run(loader.aload_documents(list(assign_chunk_ids(make_documents(5, "other"), "Other Source"))))
+        self.assertEqual(len(targets[1].vectors), 30)
+        # The target writer threads are shut down after each batch
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith("vdb-loader-target")])
+
+        with self.assertRaises(ValueError):
+            MultiTargetVectorLoader([targets[0], InMemoryVectorLoader("index-c", DeterministicFakeEmbedding(size=4))])
+
+    def test_multi_target_full_reload_with_partial_indexes(self):
+        embedding_client = DeterministicFakeEmbedding(size=8)
+        existing = InMemoryVectorLoader("index-a", embedding_client)
+        existing.load_record_batch([{"id": "stale", "text": "stale", "values": [0.0] * 8}])
+        missing = InMemoryVectorLoader("index-b", embedding_client)
+        loader = MultiTargetVectorLoader([existing, missing], batch_size=10)
+
+        self.assertFalse(loader.index_exists())
+        self.assertTrue(loader.prepare_index(delete_index=True))
+        self.assertEqual(existing.vectors, {})
+
+        loader.load_documents(list(assign_chunk_ids(make_documents(5), "Test Source")))
+        self.assertNotIn("stale", existing.vectors)
+        self.assertEqual(existing.vectors, missing.vectors)
+
+    def test_index_checked_once_per_loader(self):
+        loader = ControlPlaneCountingLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5,
+                                            max_workers=3)
+        loader.load_documents(make_documents(50))
+        self.assertEqual(len(loader.vectors), 50)
+        self.assertEqual(loader.control_plane_calls, 2)  # One existence check, one create
+
+        existing = ControlPlaneCountingLoader("test-index", DeterministicFakeEmbedding(size=8), index_dimension=8)
+        existing.load_documents(make_documents(10))
+        self.assertEqual(existing.control_plane_calls, 2)  # One existence check, one dimension check
+
+        mismatched = ControlPlaneCountingLoader("test-index", DeterministicFakeEmbedding(size=8), index_dimension=16)
+        with self.assertRaises(ValueError):
+            mismatched.load_documents(make_documents(10))
+
+    def test_pinecone_parallel_upserts(self):
+        loader = PineconeVectorLoader("test-index", DeterministicFakeEmbedding(size=8), namespace="docs",
+                                      upsert_batch_size=10, upsert_parallelism=3)
+        loader.index_handle = FakePineconeIndex()
+        loader.index_ready = True
+
+        records = loader.embed_documents(make_documents(45))
+        self.assertEqual(loader.load_record_batch(records), 45)
+        self.assertEqual(sorted(loader.index_handle.requests), [("docs", 5)] + [("docs", 10)] * 4)
+        self.assertEqual(loader.index_handle.max_in_flight, 3)
+
+    def test_pinecone_delete_index_keeps_other_namespaces(self):
+        loader = PineconeVectorLoader("test-index", DeterministicFakeEmbedding(size=8), namespace="docs")
+        loader.index_handle = FakePineconeIndex()
+        loader.index_ready = True
+
+        with mock.patch("vector_database_loader.pinecone_vector_db.get_pinecone_client") as get_client:
+            self.assertTrue(loader.delete_index())
+        get_client.return_value.delete_index.assert_not_called()
+        self.assertEqual(loader.index_handle.deletes, [("docs", "all")])
+        self.assertTrue(loader.index_ready)
+
+    def test_pinecone_upsert_request_bytes(self):
+        # Each vector is about 1536 * 12 bytes, so a 2 MB request holds about 110 of them
+        loader = PineconeVectorLoader("test-index", DeterministicFakeEmbedding(size=1536), batch_size=250)
+        loader.index_handle = FakePineconeIndex()
+        loader.index_ready = True
+
+        records = loader.embed_documents(make_documents(250))
+        self.assertEqual(loader.load_record_batch(records), 250)
+        self.assertEqual(sorted(count for _, count in loader.index_handle.requests), [50, 100, 100])
+
+        loader.index_handle = FakePineconeIndex()
+        loader.max_request_bytes = 40 * 1536 * 12
+        loader.load_record_batch(records)
+        self.assertTrue(all(count < 40 for _, count in loader.index_handle.requests))
+        self.assertEqual(sum(count for _, count in loader.index_handle.requests), 250)
+
+    def test_adaptive_batcher_limits(self):
+        batcher = AdaptiveBatcher(max_batch_size=100, max_batch_tokens=50)
+        documents = [Document(page_content="x" * 40, metadata={}) for _ in range(20)]  # ~10 tokens each
+        self.assertEqual([len(batch) for batch in batcher.batches(documents)], [5, 5, 5, 5])
+
+        batcher = AdaptiveBatcher(max_batch_size=100, max_batch_bytes=200)
+        self.assertTrue(all(len(batch) <= 4 for batch in batcher.batches(documents)))
+
+        # There is no byte limit by default, the loaders keep each write request under their database's limit
+        batcher = AdaptiveBatcher(max_batch_size=100, max_batch_tokens=1000)
+        self.assertEqual([len(batch) for batch in batcher.batches(documents)], [20])
+
+    def test_adaptive_batcher_feedback(self):
+        batcher = AdaptiveBatcher(max_batch_size=100, min_batch_size=5, initial_batch_size=20, target_latency=1.0)
+        batcher.record_success(20, 0.1)
+        self.assertEqual(batcher.batch_size, 30)
+        batcher.record_failure(30)
+        self.assertEqual(batcher.batch_size, 15)
+        for _ in range(10):
+            batcher.record_failure(batcher.batch_size)
+        self.assertEqual(batcher.batch_size, 5)
+
+    def test_load_splits_too_large_batches(self):
+        batcher = AdaptiveBatcher(max_batch_size=40, min_batch_size=2)
+        loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), max_accepted_batch=15,
+                                      batcher=batcher)
+        loaded = loader.load_documents(list(assign_chunk_ids(make_documents(100), "Test Source")))
+        self.assertEqual(loaded, 100)
+        self.assertEqual(len(loader.vectors), 100)
+        self.assertTrue(all(len(batch) <= 15 for batch in loader.batches))
+        self.assertLess(batcher.batch_size, 40)
+
+    def test_resume_from_checkpoint(self):
+        documents = list(assign_chunk_ids(make_documents(50), "Test Source"))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            checkpoint_path = os.path.join(temp_dir, "checkpoint.txt")
+            loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=10,
+                                          fail_on_batch=4, checkpoint=LoadCheckpoint(checkpoint_path))
+            with self.assertRaises(RuntimeError):
+                loader.load_documents(documents, delete_index=True)
+            self.assertEqual(len(loader.vectors), 30)
+
+            # The restarted load keeps the index and only loads the remaining batches
+            loader.fail_on_batch = None
+            loader.checkpoint = LoadCheckpoint(checkpoint_path)
+            loader.load_documents(documents, delete_index=True)
+            self.assertEqual(len(loader.vectors), 50)
+            self.assertEqual(len(loader.batches), 5)
+
+    def test_sync_sources(self):
+        content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": "doc_folder"}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = os.path.join(temp_dir, "manifest.json")
+            loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5)
+
+            loaded = loader.load_sources(content_sources, sync_manifest=SyncManifest(manifest_path))
+            self.assertTrue(loaded > 0)
+            self.assertEqual(len(loader.vectors), loaded)
+
+            # Nothing changed, so nothing is loaded
+            self.assertEqual(loader.load_sources(content_sources, sync_manifest=SyncManifest(manifest_path)), 0)
+
+            # Simulate a chunk that disappeared from the source and one that was never loaded
+            manifest = SyncManifest(manifest_path)
+            chunks = manifest.get_source_chunks("test-index", "Word Docs")
+            missing_id = next(iter(chunks))
+            chunks.pop(missing_id)
+            chunks["stale-chunk"] = "stale-hash"
+            manifest.set_source_chunks("test-index", "Word Docs", chunks)
+            loader.vectors["stale-chunk"] = (None, None)
+
+            loaded = loader.load_sources(content_sources, streaming=True, sync_manifest=SyncManifest(manifest_path))
+            self.assertEqual(loaded, 1)
+            self.assertNotIn("stale-chunk", loader.vectors)
+            self.assertIn(missing_id, loader.vectors)
+
+    def test_sync_sources_skips_unchanged_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = os.path.join(temp_dir, "docs")
+            os.mkdir(folder)
+            for file_name in ["a.docx", "b.docx"]:
+                shutil.copy(os.path.join("doc_folder", "Fractional CTO and Technology Leadership.docx"),
+                            os.path.join(folder, file_name))
+            content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": folder}]
+            manifest_path = os.path.join(temp_dir, "manifest.json")
+            file_manifest_path = os.path.join(temp_dir, "files.json")
+            loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5)
+
+            def sync(streaming=False):
+                return loader.load_sources(content_sources, streaming=streaming,
+                                           sync_manifest=SyncManifest(manifest_path),
+                                           file_manifest=FileManifest(file_manifest_path))
+
+            loaded = sync()
+            self.assertTrue(loaded > 0)
+            files = FileManifest(file_manifest_path).get_source_files("Word Docs")
+            self.assertEqual(sorted(os.path.basename(file_path) for file_path in files), ["a.docx", "b.docx"])
+            self.assertEqual(sum(len(record["chunks"]) for record in files.values()), loaded)
+
+            # Unchanged and merely touched files are not parsed again, and their vectors are kept
+            os.utime(os.path.join(folder, "a.docx"))
+            source_path = os.path.join(folder, "b.docx")
+            self.assertEqual(FileManifest(file_manifest_path).get_changed_files("Word Docs", [source_path]), [])
+            self.assertEqual(sync(streaming=True), 0)
+            self.assertEqual(len(loader.vectors), loaded)
+
+            # A removed file's vectors are deleted, and its record dropped
+            os.remove(os.path.join(folder, "b.docx"))
+            self.assertEqual(sync(), 0)
+            self.assertEqual(len(loader.vectors), loaded / 2)
+            self.assertEqual(len(FileManifest(file_manifest_path).get_source_files("Word Docs")), 1)
+
+            with self.assertRaises(ValueError):
+                loader.load_sources(content_sources, file_manifest=FileManifest(file_manifest_path))
+
+    def test_async_sync_sources(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = os.path.join(temp_dir, "docs")
+            os.mkdir(folder)
+            for file_name in ["a.docx", "b.docx"]:
+                shutil.copy(os.path.join("doc_folder", "Fractional CTO and Technology Leadership.docx"),
+                            os.path.join(folder, file_name))
+            content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": folder}]
+            manifest_path = os.path.join(temp_dir, "manifest.json")
+            file_manifest_path = os.path.join(temp_dir, "files.json")
+            loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5)
+
+            def sync(streaming=False):
+                return asyncio.run(loader.aload_sources(content_sources, streaming=streaming,
+                                                        sync_manifest=SyncManifest(manifest_path),
+                                                        file_manifest=FileManifest(file_manifest_path)))
+
+            loaded = sync()
+            self.assertTrue(loaded > 0)
+            self.assertEqual(len(loader.vectors), loaded)
+            self.assertEqual(sync(streaming=True), 0)
+
+            os.remove(os.path.join(folder, "b.docx"))
+            self.assertEqual(sync(), 0)
+            self.assertEqual(len(loader.vectors), loaded / 2)
+            self.assertEqual(len(FileManifest(file_manifest_path).get_source_files("Word Docs")), 1)
+
+            with self.assertRaises(ValueError):
+                asyncio.run(loader.aload_sources(content_sources, file_manifest=FileManifest(file_manifest_path)))
+
+    def test_sync_sources_with_file_manifest_and_whitelist(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            folder = os.path.join(temp_dir, "docs")
+            os.mkdir(folder)
+            for file_name in ["keep.docx", "skip.docx"]:
+                shutil.copy(os.path.join("doc_folder", "Fractional CTO and Technology Leadership.docx"),
+                            os.path.join(folder, file_name))
+            content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": folder,
+                                "whitelist": [os.path.join(folder, "keep*")]}]
+            manifest_path = os.path.join(temp_dir, "manifest.json")
+            file_manifest_path = os.path.join(temp_dir, "files.json")
+            loader = InMemoryVectorLoader("test-index", DeterministicFakeEmbedding(size=8), batch_size=5)
+
+            def sync():
+                return loader.load_sources(content_sources, sync_manifest=SyncManifest(manifest_path),
+                                           file_manifest=FileManifest(file_manifest_path))
+
+            self.assertTrue(sync() > 0)
+            files = FileManifest(file_manifest_path).get_source_files("Word Docs")
+            self.assertEqual([os.path.basename(file_path) for file_path in files], ["keep.docx"])
+
+            # The whitelisted file was recorded, so it is not parsed again
+            self.assertEqual(sync(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from vector_database_loader.embedding_cache import (
+    EmbeddingCache,
+    CachedEmbeddings,
+    QueryEmbeddingCache,
+    CachedQueryEmbeddings,
+    get_embedding_model_key
+)
+from vector_database_loader.embedding_scheduler import TokenBucket, RateLimitedEmbeddings
+from vector_database_loader.pipeline_utils import call_with_retries, is_retryable_error
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """
+    A deterministic fake embedding client that records the texts it is asked to embed.
+    """
+    embedded_texts: list = []
+
+    def embed_documents(self, texts):
+        self.embedded_texts.extend(texts)
+        return super().embed_documents(texts)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyEmbeddings(DeterministicFakeEmbedding):
+    """
+    A deterministic fake embedding client that is throttled on its first few calls.
+    """
+    failures_left: int = 0
+
+    def embed_documents(self, texts):
+        if self.failures_left > 0:
+            self.failures_left -= 1
+            raise RateLimitError("Rate limit reached for requests")
+        return super().embed_documents(texts)
+
+
+class FirstCallThrottledEmbeddings(DeterministicFakeEmbedding):
+    """
+    A deterministic fake embedding client that is throttled the first time it is asked to embed each text.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._seen_texts = set()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            first_call = texts[0] not in self._seen_texts
+            self._seen_texts.add(texts[0])
+        if first_call:
+            raise RateLimitError("Rate limit reached for requests")
+        return super().embed_documents(texts)
+
+
+class EmbeddingCacheTestCases(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "embeddings.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_misses_are_embedded(self):
+        embedding_client = CountingEmbeddings(size=16, embedded_texts=[])
+        cached_client = CachedEmbeddings(embedding_client, EmbeddingCache(self.cache_path))
+
+        first = cached_client.embed_documents(["alpha", "beta", "alpha"])
+        self.assertEqual(embedding_client.embedded_texts, ["alpha", "beta"])
+
+        second = cached_client.embed_documents(["beta", "gamma"])
+        self.assertEqual(embedding_client.embedded_texts, ["alpha", "beta", "gamma"])
+        self.assertEqual(cached_client.hits, 1)
+        self.assertEqual(cached_client.misses, 3)
+
+        self.assertEqual(first[0], first[2])
+        self.assertAlmostEqual(first[1][0], second[0][0], places=6)
+
+    def test_cache_persists_across_instances(self):
+        embedding_client = CountingEmbeddings(size=16, embedded_texts=[])
+        CachedEmbeddings(embedding_client, EmbeddingCache(self.cache_path)).embed_documents(["alpha"])
+
+        reopened = CachedEmbeddings(embedding_client, EmbeddingCache(self.cache_path))
+        asyncio.run(reopened.aembed_documents(["alpha"]))
+        self.assertEqual(embedding_client.embedded_texts, ["alpha"])
+        self.assertEqual(reopened.hits, 1)
+
+    def test_model_identity_is_part_of_the_key(self):
+        cache = EmbeddingCache(self.cache_path)
+        small_client = CountingEmbeddings(size=8, embedded_texts=[])
+        large_client = CountingEmbeddings(size=16, embedded_texts=[])
+        self.assertNotEqual(get_embedding_model_key(small_client), get_embedding_model_key(large_client))
+
+        CachedEmbeddings(small_client, cache).embed_documents(["alpha"])
+        vectors = CachedEmbeddings(large_client, cache).embed_documents(["alpha"])
+        self.assertEqual(len(vectors[0]), 16)
+
+    def test_size_based_eviction(self):
+        # Each 16 dimension float32 vector takes 64 bytes
+        cache = EmbeddingCache(self.cache_path, max_size_bytes=64 * 10)
+        cached_client = CachedEmbeddings(CountingEmbeddings(size=16, embedded_texts=[]), cache)
+        for i in range(30):
+            cached_client.embed_documents([f"text {i}"])
+        self.assertLessEqual(cache.size_bytes(), 64 * 10)
+
+        # The most recent entries survive eviction
+        self.assertIsNotNone(cache.get_many(cached_client.model_key, ["text 29"])[0])
+        self.assertIsNone(cache.get_many(cached_client.model_key, ["text 0"])[0])
+
+
+class QueryEmbeddingCacheTestCases(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "queries.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_normalized_queries_share_an_entry(self):
+        embedding_client = CountingEmbeddings(size=16, embedded_texts=[])
+        cache = QueryEmbeddingCache()
+        cached_client = CachedQueryEmbeddings(embedding_client, cache)
+
+        first = cached_client.embed_query("what is x")
+        second = cached_client.embed_query("  What IS   x ")
+        self.assertEqual(first, second)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+        # Batched query embedding has its own entries, and only sends the misses to the embedding client
+        cached_client.embed_documents(["what is x", "what is y", "What is y"])
+        self.assertEqual(embedding_client.embedded_texts, ["what is x", "what is y"])
+        cached_client.embed_documents(["What is X", "what is y"])
+        self.assertEqual(embedding_client.embedded_texts, ["what is x", "what is y"])
+        self.assertEqual(cache.hits, 3)
+
+    def test_batch_vectors_are_not_served_to_embed_query(self):
+        class AsymmetricEmbeddings(CountingEmbeddings):
+            def embed_query(self, text):
+                return [1.0] * self.size
+
+        embedding_client = AsymmetricEmbeddings(size=4, embedded_texts=[])
+        cached_client = CachedQueryEmbeddings(embedding_client, QueryEmbeddingCache())
+
+        document_vector = cached_client.embed_documents(["what is x"])[0]
+        self.assertNotEqual(document_vector, [1.0] * 4)
+        self.assertEqual(cached_client.embed_query("what is x"), [1.0] * 4)
+        self.assertEqual(cached_client.embed_documents(["what is x"])[0], document_vector)
+
+    def test_lru_and_ttl_eviction(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put_many("model", ["a", "b"], [[1.0], [2.0]])
+        cache.get_many("model", ["a"])
+        cache.put_many("model", ["c"], [[3.0]])
+        self.assertEqual(cache.get_many("model", ["a", "b", "c"]), [[1.0], None, [3.0]])
+
+        expiring_cache = QueryEmbeddingCache(ttl_seconds=0.05)
+        expiring_cache.put_many("model", ["a"], [[1.0]])
+        self.assertEqual(expiring_cache.get_many("model", ["a"]), [[1.0]])
+        time.sleep(0.1)
+        self.assertEqual(expiring_cache.get_many("model", ["a"]), [None])
+
+    def test_persistent_queries_survive_restarts(self):
+        embedding_client = CountingEmbeddings(size=16, embedded_texts=[])
+        first_cache = QueryEmbeddingCache(persistent_cache=EmbeddingCache(self.cache_path))
+        CachedQueryEmbeddings(embedding_client, first_cache).embed_documents(["what is x"])
+
+        second_cache = QueryEmbeddingCache(persistent_cache=EmbeddingCache(self.cache_path))
+        vectors = asyncio.run(CachedQueryEmbeddings(embedding_client, second_cache).aembed_documents(["What is X"]))
+        self.assertEqual(len(vectors[0]), 16)
+        self.assertEqual(embedding_client.embedded_texts, ["what is x"])
+        self.assertEqual(second_cache.hits, 1)
+
+
+class EmbeddingSchedulerTestCases(unittest.TestCase):
+    def test_token_bucket_paces_requests(self):
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 per second after a burst of 2
+        start_time = time.monotonic()
+        for _ in range(6):
+            bucket.acquire(1)
+        self.assertGreaterEqual(time.monotonic() - start_time, 0.35)
+
+    def test_retries_throttled_calls(self):
+        embedding_client = FlakyEmbeddings(size=8, failures_left=2)
+        scheduled_client = RateLimitedEmbeddings(embedding_client, requests_per_minute=6000, base_delay=0.01)
+        vectors = scheduled_client.embed_documents(["alpha", "beta"])
+        self.assertEqual(len(vectors), 2)
+        self.assertEqual(scheduled_client.retry_count, 2)
+
+        vectors = asyncio.run(RateLimitedEmbeddings(FlakyEmbeddings(size=8, failures_left=1),
+                                                    base_delay=0.01).aembed_documents(["alpha"]))
+        self.assertEqual(len(vectors), 1)
+
+    def test_retry_count_with_concurrent_calls(self):
+        scheduled_client = RateLimitedEmbeddings(FirstCallThrottledEmbeddings(size=8), base_delay=0.001)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: scheduled_client.embed_documents([f"text {i}"]), range(64)))
+        self.assertEqual(scheduled_client.retry_count, 64)
+
+    def test_gives_up_after_max_retries(self):
+        scheduled_client = RateLimitedEmbeddings(FlakyEmbeddings(size=8, failures_left=5), max_retries=2,
+                                                 base_delay=0.01)
+        with self.assertRaises(RateLimitError):
+            scheduled_client.embed_documents(["alpha"])
+
+    def test_only_transient_errors_are_retried(self):
+        self.assertTrue(is_retryable_error(RateLimitError("throttled")))
+        self.assertTrue(is_retryable_error(TimeoutError("timed out")))
+        self.assertFalse(is_retryable_error(ValueError("bad input")))
+
+        calls = []
+
+        def failing_call():
+            calls.append(1)
+            raise ValueError("bad input")
+
+        with self.assertRaises(ValueError):
+            call_with_retries(failing_call, max_retries=3, base_delay=0.01)
+        self.assertEqual(len(calls), 1)
+
+    def test_wrapped_model_identity(self):
+        embedding_client = DeterministicFakeEmbedding(size=8)
+        self.assertEqual(get_embedding_model_key(RateLimitedEmbeddings(embedding_client)),
+                         get_embedding_model_key(embedding_client))
+
+
+if __name__ == '__main__':
+    unittest.main()
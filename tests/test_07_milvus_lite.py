@@ -0,0 +1,125 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from vector_database_loader.milvus_vector_db import (
+    MilvusVectorLoader,
+    MilvusVectorQuery,
+    MilvusBulkWriter,
+    get_exact_neighbors,
+    sweep_milvus_search_params
+)
+from vector_database_loader.sync_manifest import assign_chunk_ids
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+def make_documents(count, source="test-source"):
+    return [Document(page_content=f"Document chunk number {i} about topic {i % 7}",
+                     metadata={"source": source, "title": f"Chunk {i}"})
+            for i in range(count)]
+
+
+@unittest.skipUnless(importlib.util.find_spec("milvus_lite"), "Milvus Lite is not installed")
+class MilvusLiteTestCases(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.uri = os.path.join(self.temp_dir.name, "milvus.db")
+        self.embedding_client = DeterministicFakeEmbedding(size=16)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_query_and_delete(self):
+        loader = MilvusVectorLoader("test_collection", self.embedding_client, uri=self.uri, batch_size=20)
+        documents = list(assign_chunk_ids(make_documents(50), "Test Source"))
+        loader.load_documents(documents, delete_index=True)
+        self.assertEqual(loader.get_index_dimension(), 16)
+
+        milvus_client = loader.get_milvus_client()
+        self.assertEqual(milvus_client.query("test_collection", filter="", output_fields=["count(*)"])[0]["count(*)"],
+                         50)
+
+        vdb_query = MilvusVectorQuery("test_collection", self.embedding_client, uri=self.uri)
+        results = vdb_query.query(documents[3].page_content, num_results=1)
+        self.assertEqual(results[0].page_content, documents[3].page_content)
+        self.assertEqual(results[0].metadata["title"], "Chunk 3")
+
+        loader.delete_documents([doc.id for doc in documents[:10]])
+        self.assertEqual(milvus_client.query("test_collection", filter="", output_fields=["count(*)"])[0]["count(*)"],
+                         40)
+
+    def test_earlier_schema_is_rejected(self):
+        loader = MilvusVectorLoader("old_collection", self.embedding_client, uri=self.uri)
+        # The schema earlier versions created, with an auto generated integer primary key
+        loader.get_milvus_client().create_collection("old_collection", 16, metric_type="L2", auto_id=True)
+        documents = list(assign_chunk_ids(make_documents(5), "Test Source"))
+        with self.assertRaises(ValueError):
+            loader.load_documents(documents)
+
+        self.assertEqual(loader.load_documents(documents, delete_index=True), 5)
+
+    def test_index_and_search_params(self):
+        with self.assertRaises(ValueError):
+            MilvusVectorLoader("bad_collection", self.embedding_client, uri=self.uri, index_type="ANNOY")
+
+        loader = MilvusVectorLoader("hnsw_collection", self.embedding_client, uri=self.uri, index_type="HNSW",
+                                    index_params={"M": 8}, metric_type="IP", consistency_level="Bounded")
+        documents = list(assign_chunk_ids(make_documents(40), "Test Source"))
+        loader.load_documents(documents, delete_index=True)
+
+        milvus_client = loader.get_milvus_client()
+        index_info = milvus_client.describe_index("hnsw_collection", "vector")
+        self.assertEqual((index_info["index_type"], index_info["metric_type"]), ("HNSW", "IP"))
+
+        vdb_query = MilvusVectorQuery("hnsw_collection", self.embedding_client, uri=self.uri, search_params={"ef": 32},
+                                      metric_type="IP", consistency_level="Strong")
+        results = vdb_query.query(documents[3].page_content, num_results=2, filter='title == "Chunk 3"')
+        self.assertEqual([result.metadata["title"] for result in results], ["Chunk 3"])
+
+        query_vectors = self.embedding_client.embed_documents([doc.page_content for doc in documents[:10]])
+        sweep = sweep_milvus_search_params("hnsw_collection", query_vectors, [
+            {"search_params": [{"ef": 16}, {"ef": 64}]},
+            {"index_type": "IVF_FLAT", "params": {"nlist": 4}, "search_params": [{"nprobe": 4}]},
+        ], k=5, uri=self.uri, metric_type="IP")
+        self.assertEqual([(result["index_type"], result["search_params"]) for result in sweep],
+                         [("current", {"ef": 16}), ("current", {"ef": 64}), ("IVF_FLAT", {"nprobe": 4})])
+        for result in sweep:
+            self.assertGreaterEqual(result["recall"], 0.9)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+    def test_exact_neighbors(self):
+        vectors = np.array([[1.0, 0.0], [0.0, 1.0], [3.0, 3.0]])
+        self.assertEqual(get_exact_neighbors(["a", "b", "c"], vectors, [[0.9, 0.1]], 2, "L2"), [["a", "b"]])
+        self.assertEqual(get_exact_neighbors(["a", "b", "c"], vectors, [[0.9, 0.1]], 1, "IP"), [["c"]])
+        self.assertEqual(get_exact_neighbors(["a", "b", "c"], vectors, [[0.9, 0.1]], 1, "COSINE"), [["a"]])
+
+    def test_bulk_import_files(self):
+        bulk_writer = MilvusBulkWriter(os.path.join(self.temp_dir.name, "import"), file_type="numpy",
+                                       rows_per_file=20)
+        loader = MilvusVectorLoader("bulk_collection", self.embedding_client, uri=self.uri, bulk_writer=bulk_writer)
+        loader.load_documents(list(assign_chunk_ids(make_documents(50), "Test Source")))
+        loader.finish_load()
+
+        self.assertEqual(len(bulk_writer.files), 3)
+        vectors = np.load(bulk_writer.files[0][2])
+        self.assertEqual(vectors.shape, (20, 16))
+        self.assertEqual(vectors.dtype, np.float32)
+
+        if importlib.util.find_spec("pyarrow"):
+            import pyarrow.parquet as pq
+
+            parquet_writer = MilvusBulkWriter(os.path.join(self.temp_dir.name, "parquet"), rows_per_file=100)
+            parquet_writer.append(loader.embed_documents(make_documents(5)))
+            table = pq.read_table(parquet_writer.commit()[0][0])
+            self.assertEqual(table.num_rows, 5)
+            self.assertEqual(table.column_names, ["pk", "text", "vector", "$meta"])
+
+
+if __name__ == '__main__':
+    unittest.main()
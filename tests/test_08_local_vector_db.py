@@ -0,0 +1,188 @@
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from vector_database_loader.local_vector_db import LocalVectorLoader, LocalVectorQuery, LocalVectorStore
+from vector_database_loader.result_cache import SearchResultCache
+from vector_database_loader.sync_manifest import assign_chunk_ids
+from vector_database_loader.tracing import Tracer, log_error, set_tracer
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+def make_documents(count, source="test-source"):
+    return [Document(page_content=f"Document chunk number {i} about topic {i % 7}",
+                     metadata={"source": source, "title": f"Chunk {i}"})
+            for i in range(count)]
+
+
+class LocalVectorDbTestCases(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.embedding_client = DeterministicFakeEmbedding(size=16)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_and_query(self):
+        loader = LocalVectorLoader("test-index", self.embedding_client, path=self.temp_dir.name, batch_size=20)
+        documents = list(assign_chunk_ids(make_documents(50), "Test Source"))
+        loader.load_documents(documents, delete_index=True)
+        self.assertEqual(loader.describe_index()["vector_count"], 50)
+        self.assertEqual(loader.get_index_dimension(), 16)
+
+        vdb_query = LocalVectorQuery("test-index", self.embedding_client, path=self.temp_dir.name)
+        results = vdb_query.query(documents[3].page_content, num_results=2)
+        self.assertEqual(results[0].page_content, documents[3].page_content)
+        self.assertEqual(results[0].metadata["title"], "Chunk 3")
+        self.assertEqual(results[0].id, documents[3].id)
+
+        # Reloading the same chunks replaces them, and the open query client sees the deletes
+        loader.load_documents(documents[:10])
+        loader.delete_documents([doc.id for doc in documents[:5]])
+        self.assertEqual(loader.describe_index()["vector_count"], 45)
+        results = vdb_query.query(documents[3].page_content, num_results=1)
+        self.assertNotEqual(results[0].id, documents[3].id)
+
+        self.assertTrue(loader.delete_index())
+        self.assertFalse(loader.index_exists())
+
+    def test_filtered_query(self):
+        loader = LocalVectorLoader("filtered-index", self.embedding_client, path=self.temp_dir.name, batch_size=20)
+        documents = list(assign_chunk_ids(make_documents(20) + make_documents(20, source="other-source"),
+                                          "Test Source"))
+        loader.load_documents(documents, delete_index=True)
+
+        vdb_query = LocalVectorQuery("filtered-index", self.embedding_client, path=self.temp_dir.name)
+        results = vdb_query.query(documents[3].page_content, num_results=5, filter={"source": "other-source"})
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result.metadata["source"] == "other-source" for result in results))
+
+        results = vdb_query.query(documents[3].page_content, num_results=5,
+                                  filter={"source": ["test-source", "other-source"], "title": "Chunk 3"})
+        self.assertEqual(sorted(result.metadata["source"] for result in results), ["other-source", "test-source"])
+        self.assertEqual(vdb_query.query(documents[3].page_content, filter={"source": "missing"}), [])
+
+        with self.assertRaises(ValueError):
+            vdb_query.query(documents[3].page_content, filter="source == 'other-source'")
+
+    def test_result_cache_invalidated_by_writes(self):
+        loader = LocalVectorLoader("cached-index", self.embedding_client, path=self.temp_dir.name, batch_size=20)
+        documents = list(assign_chunk_ids(make_documents(30), "Test Source"))
+        loader.load_documents(documents[:20], delete_index=True)
+
+        result_cache = SearchResultCache()
+        vdb_query = LocalVectorQuery("cached-index", self.embedding_client, path=self.temp_dir.name,
+                                     result_cache=result_cache)
+        vdb_query.query(documents[25].page_content, num_results=1)
+        results = vdb_query.query(documents[25].page_content, num_results=1)
+        self.assertEqual((result_cache.hits, result_cache.misses), (1, 1))
+        self.assertNotEqual(results[0].id, documents[25].id)
+
+        # Loading and deleting documents bump the index version, so the next searches see the changes
+        loader.load_documents(documents[20:])
+        results = vdb_query.query(documents[25].page_content, num_results=1)
+        self.assertEqual(results[0].id, documents[25].id)
+
+        loader.delete_documents([documents[25].id])
+        results = vdb_query.query(documents[25].page_content, num_results=1)
+        self.assertNotEqual(results[0].id, documents[25].id)
+        self.assertEqual((result_cache.hits, result_cache.misses), (1, 3))
+
+    def test_result_cache_keeps_filters_apart(self):
+        loader = LocalVectorLoader("cached-filter-index", self.embedding_client, path=self.temp_dir.name)
+        documents = list(assign_chunk_ids(make_documents(10) + make_documents(10, source="other-source"),
+                                          "Test Source"))
+        loader.load_documents(documents, delete_index=True)
+
+        result_cache = SearchResultCache()
+        vdb_query = LocalVectorQuery("cached-filter-index", self.embedding_client, path=self.temp_dir.name,
+                                     result_cache=result_cache)
+        query = documents[3].page_content
+        unfiltered = vdb_query.query(query, num_results=1)
+        filtered = vdb_query.query(query, num_results=1, filter={"source": "other-source"})
+        self.assertEqual(unfiltered[0].metadata["source"], "test-source")
+        self.assertEqual(filtered[0].metadata["source"], "other-source")
+        self.assertEqual((result_cache.hits, result_cache.misses), (0, 2))
+
+        self.assertEqual(vdb_query.query(query, num_results=1, filter={"source": "other-source"}), filtered)
+        self.assertEqual(vdb_query.query(query, num_results=1), unfiltered)
+        self.assertEqual((result_cache.hits, result_cache.misses), (2, 2))
+
+    def test_load_tracing(self):
+        spans = []
+        tracer = Tracer(exporters=[spans.append], quiet=True)
+        previous_tracer = set_tracer(tracer)
+        try:
+            loader = LocalVectorLoader("traced-index", self.embedding_client, path=self.temp_dir.name, batch_size=20)
+            content_sources = [{"name": "Word Docs", "type": "Microsoft Word", "location": "doc_folder"}]
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                doc_count = loader.load_sources(content_sources, streaming=True)
+        finally:
+            set_tracer(previous_tracer)
+
+        stage_totals = tracer.get_stage_totals()
+
+        self.assertEqual(output.getvalue(), "")
+        self.assertTrue({"parse", "cleanup", "chunk", "embed", "upsert"} <= set(stage_totals))
+        self.assertEqual(stage_totals["embed"]["items"], doc_count)
+        self.assertEqual(stage_totals["upsert"]["items"], doc_count)
+        self.assertGreater(stage_totals["embed"]["tokens"], 0)
+        self.assertGreater(stage_totals["parse"]["bytes"], 0)
+        self.assertEqual(len(spans), sum(totals["spans"] for totals in stage_totals.values()))
+
+    def test_quiet_tracer_logs_errors(self):
+        previous_tracer = set_tracer(Tracer(quiet=True))
+        try:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output), self.assertLogs("vector_database_loader", "WARNING") as logs:
+                log_error("ERROR: Skipping page, it could not be crawled")
+        finally:
+            set_tracer(previous_tracer)
+
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(logs.records[0].getMessage(), "ERROR: Skipping page, it could not be crawled")
+
+    def test_float16_storage(self):
+        path = os.path.join(self.temp_dir.name, "half")
+        vectors = np.random.default_rng(1).normal(size=(300, 16)).astype(np.float32)
+        store = LocalVectorStore(path, dimension=16, dtype="float16")
+        store.add_vectors([str(i) for i in range(300)], [f"text {i}" for i in range(300)], vectors)
+        self.assertEqual(os.path.getsize(os.path.join(path, "vectors.bin")) % (16 * 2), 0)
+
+        rows, distances = LocalVectorStore(path).search(vectors[42], k=3)
+        self.assertEqual(rows[0], 42)
+        self.assertLess(distances[0], 0.01)
+
+    def test_approximate_indexes(self):
+        vectors = np.random.default_rng(2).normal(size=(6000, 16)).astype(np.float32)
+        ids = [str(i) for i in range(len(vectors))]
+        queries = vectors[:50] + 0.01
+
+        index_types = ["ivf"] + (["hnsw"] if importlib.util.find_spec("hnswlib") else [])
+        for index_type in index_types:
+            path = os.path.join(self.temp_dir.name, index_type)
+            store = LocalVectorStore(path, dimension=16, index_type=index_type, nprobe=16)
+            store.add_vectors(ids, ids, vectors)
+            hits = sum(store.search(query, k=1)[0][0] == i for i, query in enumerate(queries))
+            self.assertGreaterEqual(hits, 45, index_type)
+
+            # Rows added after the index was built are still found
+            store.add_vectors(["new"], ["new"], [np.full(16, 9.0)])
+            self.assertEqual(store.search(np.full(16, 9.0), k=1)[0][0], len(vectors))
+
+            # Filtered searches only return matching rows, even when the nearest rows do not match
+            store.add_vectors(["tagged"], ["tagged"], [vectors[0] + 5.0], [{"tag": "x"}])
+            self.assertEqual(store.search(vectors[0], k=3, filter={"tag": "x"})[0], [len(vectors) + 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import make_corpus
+from benchmarks.fakes import LatencyFakeEmbeddings, get_offline_milvus_loader
+from benchmarks.run_benchmarks import DEFAULT_CONFIG, SCENARIOS, run_scenario, find_regressions
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+SMALL_CONFIG = dict(DEFAULT_CONFIG, documents=5, embed_latency=0.0, request_latency=0.0, queries=5, dimension=16,
+                    pdf_pages=4, pdf_shard_pages=2)
+
+
+class BenchmarkTestCases(unittest.TestCase):
+    def test_scenarios_run_offline(self):
+        for name in SCENARIOS:
+            result = run_scenario(name, SMALL_CONFIG)
+            self.assertGreater(result["items"], 0, name)
+            self.assertGreater(result["items_per_sec"], 0, name)
+        self.assertIn("embed", run_scenario("milvus_write", SMALL_CONFIG)["stages"])
+
+    def test_offline_loader_counts_writes(self):
+        embedding_client = LatencyFakeEmbeddings(size=16)
+        loader = get_offline_milvus_loader(embedding_client, batch_size=2)
+        loader.load_documents(make_corpus(3, words_per_document=20))
+        self.assertEqual(embedding_client.embed_calls, 2)
+        self.assertEqual((loader.milvus_client.insert_requests, loader.milvus_client.row_count), (2, 3))
+
+    def test_fake_embeddings_count_concurrent_calls(self):
+        embedding_client = LatencyFakeEmbeddings(size=4)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: embedding_client.embed_documents([f"text {i}", "other"]), range(400)))
+        self.assertEqual((embedding_client.embed_calls, embedding_client.embedded_texts), (400, 800))
+
+    def test_find_regressions(self):
+        baseline = {"config": SMALL_CONFIG, "items_per_sec": 100.0, "peak_rss_mb": 200.0, "embed_calls": 10}
+        self.assertEqual(find_regressions({"load": dict(baseline, items_per_sec=90.0)}, {"load": baseline}), [])
+
+        regressions = find_regressions({"load": dict(baseline, items_per_sec=50.0, peak_rss_mb=300.0,
+                                                     embed_calls=12)}, {"load": baseline})
+        self.assertEqual(len(regressions), 3)
+
+        # Baselines recorded with another configuration are not compared
+        other_config = dict(SMALL_CONFIG, documents=50)
+        self.assertEqual(find_regressions({"load": dict(baseline, config=other_config, items_per_sec=1.0)},
+                                          {"load": baseline}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
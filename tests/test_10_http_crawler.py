@@ -0,0 +1,171 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from vector_database_loader.browser_pool import BrowserPool
+from vector_database_loader.document_processing_utils import crawl_website_urls, iter_website_documents
+from vector_database_loader.http_crawler import HttpCrawler, extract_html_document
+
+PAGES = {
+    "/static": '<html lang="en"><head><title>Static Page</title><meta name="description" content="A static page">'
+               '</head><body><h1>Static heading</h1><p>Served without JavaScript.</p><script>var x = 1;</script>'
+               '</body></html>',
+    "/rendered": '<html><head><title>Rendered Page</title></head><body><div id="app"></div>'
+                 '<script>render()</script></body></html>',
+}
+
+
+class FakeDriver:
+    """
+    Stands in for a Selenium WebDriver, serving PAGES by URL path. A URL containing "crash" fails the first time any
+    driver loads it, and one containing "hang" always fails, like a page that never finishes loading.
+    """
+    lock = threading.Lock()
+    crashed_urls = set()
+
+    def __init__(self):
+        self.page_source = None
+        self.quit_called = False
+
+    def set_page_load_timeout(self, timeout):
+        self.timeout = timeout
+
+    def get(self, url):
+        with self.lock:
+            if "crash" in url and url not in self.crashed_urls:
+                self.crashed_urls.add(url)
+                raise RuntimeError("Browser crashed")
+        if "hang" in url:
+            raise TimeoutError("Timed out loading page")
+        time.sleep(0.01)
+        self.page_source = PAGES["/static"]
+
+    def quit(self):
+        self.quit_called = True
+
+
+class PageRequestHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    active_requests = 0
+    max_active_requests = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active_requests += 1
+            cls.max_active_requests = max(cls.max_active_requests, cls.active_requests)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.active_requests -= 1
+
+        page = PAGES.get(self.path.split("?")[0])
+        if page is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpCrawlerTestCases(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), PageRequestHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_extract_html_document(self):
+        doc = extract_html_document("https://example.com/static", PAGES["/static"], extractor="bs4")
+        self.assertEqual(doc.page_content, "Static heading\n\nServed without JavaScript.")
+        self.assertEqual(doc.metadata, {"source": "https://example.com/static", "title": "Static Page",
+                                        "description": "A static page", "language": "en"})
+        with self.assertRaises(ValueError):
+            extract_html_document("https://example.com/static", PAGES["/static"], extractor="unknown")
+
+    def test_crawl_limits_requests_per_host(self):
+        PageRequestHandler.max_active_requests = 0
+        crawler = HttpCrawler(max_workers=8, max_per_host=2, extractor="bs4")
+        urls = [f"{self.base_url}/static?page={page}" for page in range(8)]
+        try:
+            docs, browser_urls = crawler.crawl(urls + [f"{self.base_url}/rendered", f"{self.base_url}/missing"])
+        finally:
+            crawler.close()
+
+        self.assertEqual([doc.metadata["source"] for doc in docs], urls)
+        # Pages without static text, or that failed, are left for the browser
+        self.assertEqual(browser_urls, [f"{self.base_url}/rendered", f"{self.base_url}/missing"])
+        self.assertEqual(PageRequestHandler.max_active_requests, 2)
+
+    def test_crawl_website_urls_skips_browser_for_static_pages(self):
+        content_source = {"name": "Test Site", "type": "Website", "http_fetch": True, "html_extractor": "bs4"}
+        crawler = HttpCrawler(extractor="bs4")
+        try:
+            docs = crawl_website_urls([f"{self.base_url}/static"], content_source, http_crawler=crawler)
+        finally:
+            crawler.close()
+        self.assertEqual(len(docs), 1)
+        self.assertIn("Static heading", docs[0].page_content)
+
+
+
+class BrowserPoolTestCases(unittest.TestCase):
+    def test_pool_restarts_failed_browsers(self):
+        drivers = []
+
+        def driver_factory():
+            drivers.append(FakeDriver())
+            return drivers[-1]
+
+        pool = BrowserPool(workers=3, page_timeout=5, extractor="bs4", driver_factory=driver_factory)
+        urls = [f"https://example.com/page-{page}" for page in range(10)] + ["https://example.com/crash",
+                                                                            "https://example.com/hang"]
+        try:
+            docs = pool.crawl(urls)
+            self.assertEqual([doc.metadata["source"] for doc in docs], urls[:-1])
+            # The crashed browser is replaced and the page retried, the hanging page's browser twice
+            self.assertEqual(pool.restarts, 3)
+            self.assertLessEqual(len(drivers), 3 + pool.restarts)
+
+            # Idle browsers are reused by the next crawl
+            created_drivers, idle_drivers = len(drivers), pool.idle_drivers.qsize()
+            self.assertTrue(idle_drivers > 0)
+            self.assertEqual(len(list(pool.iter_crawl(urls[:3]))), 3)
+            self.assertEqual(len(drivers), created_drivers + 3 - idle_drivers)
+        finally:
+            pool.close()
+        self.assertTrue(all(driver.quit_called for driver in drivers))
+
+    def test_streaming_crawl_reuses_one_browser(self):
+        drivers = []
+
+        def create_driver(headless=True, arguments=None):
+            drivers.append(FakeDriver())
+            return drivers[-1]
+
+        urls = [f"https://example.com/page-{page}" for page in range(25)]
+        content_source = {"name": "Test Site", "type": "Website", "items": urls, "html_extractor": "bs4",
+                          "chunk_size": 0}
+        with mock.patch("vector_database_loader.browser_pool.create_chrome_driver", create_driver):
+            docs = list(iter_website_documents(content_source))
+
+        self.assertEqual(sorted(doc.metadata["source"] for doc in docs), sorted(urls))
+        self.assertEqual(len(drivers), 1)
+        self.assertTrue(drivers[0].quit_called)
+
+
+if __name__ == '__main__':
+    unittest.main()
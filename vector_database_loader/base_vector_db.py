@@ -1,14 +1,69 @@
+import asyncio
+import threading
+import time
+import uuid
+
 from dotenv import load_dotenv, find_dotenv
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.embeddings import HuggingFaceEmbeddings
 
 from vector_database_loader.document_processing_utils import (
-    get_website_documents,
-    get_folder_documents,
-    get_website_pdfs,
-    get_google_drive_documents,
+    FOLDER_SOURCE_TYPES,
+    get_source_documents,
+    iter_source_documents,
     print_progress
 )
+from vector_database_loader.embedding_cache import CachedEmbeddings, CachedQueryEmbeddings, get_text_hash
+from vector_database_loader.pipeline_utils import (
+    batched,
+    estimate_tokens,
+    prefetch,
+    run_concurrently,
+    arun_concurrently,
+    is_rate_limit_error,
+    is_payload_too_large_error,
+    call_with_retries,
+    acall_with_retries
+)
+from vector_database_loader.query_stats import QueryStats
+from vector_database_loader.result_cache import get_index_version, bump_index_version, get_filter_key
+from vector_database_loader.sync_manifest import assign_chunk_ids
+from vector_database_loader.tracing import log_error, log_progress, trace_span
+
+DEFAULT_BATCH_SIZE = 250
+DEFAULT_MAX_QUEUED_BATCHES = 2
+DEFAULT_QUERY_BATCH_SIZE = 100
+DEFAULT_QUERY_WORKERS = 8
+
+
+def get_records_bytes(records):
+    """
+    Gets the size of vector records' vectors, as float32, and texts.
+
+    :param records: A list of vector records.
+    :return: The size in bytes.
+    """
+    return sum(len(record["values"]) * 4 + len(record["text"].encode('utf-8')) for record in records)
+
+
+def get_vector_records(document_set, vectors):
+    """
+    Pairs document chunks with their embedding vectors as vector records. Chunks without an ID get a random one,
+    so every backend the records are written to stores them under the same ID.
+
+    :param document_set: A list of document chunks.
+    :param vectors: The embedding vectors of the chunks, in the same order.
+    :return: A list of dictionaries with id, values, text and metadata keys.
+    """
+    return [
+        {
+            "id": doc.id or str(uuid.uuid4()),
+            "values": vector,
+            "text": doc.page_content,
+            "metadata": dict(doc.metadata)
+        }
+        for doc, vector in zip(document_set, vectors)
+    ]
 
 
 class BaseVectorLoader:
@@ -16,54 +71,224 @@ class BaseVectorLoader:
     Base class for loading documents into a vector database.
     """
 
-    def __init__(self, index_name, embedding_client):
+    def __init__(self, index_name, embedding_client, batch_size=DEFAULT_BATCH_SIZE,
+                 max_queued_batches=DEFAULT_MAX_QUEUED_BATCHES, max_workers=1, embedding_cache=None, checkpoint=None,
+                 batcher=None, max_retries=0):
         """
         Initializes the BaseVectorLoader.
 
         :param index_name: The name of the index.
         :param embedding_client: The LangChain embedding client to be used.
+        :param batch_size: The number of document chunks sent to the vector database per batch.
+        :param max_queued_batches: In streaming mode, the number of chunked batches that may wait for loading.
+        :param max_workers: The number of batches loaded concurrently. Each batch is a round trip for embeddings and
+          one for the vector database write, so keeping several in flight hides that latency.
+        :param embedding_cache: Optional EmbeddingCache. Chunks whose text was embedded before by the same model are
+          served from the cache, and only cache misses are sent to the embedding client.
+        :param checkpoint: Optional LoadCheckpoint. Completed batches are recorded in it, so a load that failed part way
+          resumes where it stopped when re-run, instead of starting over. It is cleared once load_sources completes.
+        :param batcher: Optional AdaptiveBatcher. Batches are then bounded by estimated tokens and payload bytes instead
+          of batch_size alone, grow while loads are fast, shrink after throttling or size errors, and batches rejected
+          as too large are split and retried.
+        :param max_retries: The number of times a batch failing with a throttling or transient error is retried, with
+          jittered exponential backoff, before the load stops. To pace embedding calls within a provider's quota, wrap
+          the embedding client in a RateLimitedEmbeddings.
         """
         self.index_name = index_name
+        if embedding_cache is not None:
+            embedding_client = CachedEmbeddings(embedding_client, embedding_cache)
         self.embedding_client = embedding_client
+        self.batch_size = batch_size
+        self.max_queued_batches = max_queued_batches
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint
+        self.batcher = batcher
+        self.max_retries = max_retries
+        # Index existence and vector dimension are checked once per loader, not on every batch
+        self.index_ready = False
+        self.index_lock = threading.Lock()
+        self.dimension_size = None
         load_dotenv(find_dotenv())
 
-    def load_sources(self, content, delete_index=False):
+    def load_sources(self, content, delete_index=False, streaming=False, sync_manifest=None, file_manifest=None):
         """
         Loads multiple sources into the vector database index.
 
         :param content: A list of content sources.
         :param delete_index: Boolean flag to determine if the existing index should be deleted before loading.
+        :param streaming: Boolean flag to stream each source through fetch, chunk and load in batches, instead of
+          building the full list of chunks first. Memory use then depends on the batch size, not the source size.
+        :param sync_manifest: Optional SyncManifest. When given, each source is synced instead of reloaded: only new
+          or changed chunks are upserted and the vectors of chunks that disappeared are deleted. The index is never
+          dropped, so it stays queryable during the refresh.
+        :param file_manifest: Optional FileManifest, used with sync_manifest. Files of folder sources that did not
+          change since the last sync are skipped before parsing, and their chunks are kept.
         :return: The total number of documents loaded.
         """
         document_count = 0
         source_count = 0
-        print(f"Going to load {len(content)} data sources into {self.index_name} index")
+        log_progress(f"Going to load {len(content)} data sources into {self.index_name} index")
+
+        if file_manifest is not None and sync_manifest is None:
+            raise ValueError("ERROR: A file_manifest can only be used together with a sync_manifest")
+
+        if sync_manifest is not None and delete_index:
+            # A full reload, so the manifest no longer describes what is in the index
+            self.prepare_index(delete_index=True)
+            sync_manifest.clear_index(self.index_name)
+            if file_manifest is not None:
+                file_manifest.clear()
+            delete_index = False
 
         for content_source in content:
-            print(f"Processing content for {content_source['name']} ")
+            log_progress(f"Processing content for {content_source['name']} ")
             # print_progress("Load Source", source_count + 1, len(content), content_source['name'])
 
-            if content_source['type'] == 'Website':
-                content_docs = get_website_documents(content_source)
-            elif content_source['type'] in ['Microsoft Word', 'PDF']:
-                content_docs = get_folder_documents(content_source)
-            elif content_source['type'] == 'Web PDFs':
-                content_docs = get_website_pdfs(content_source)
-            elif content_source['type'] == 'Google Drive':
-                content_docs = get_google_drive_documents(content_source)
-            else:
-                raise ValueError(f"ERROR: Cannot handle loading document type {content_source['type']}")
+            if sync_manifest is not None:
+                document_count += self.sync_source(content_source, sync_manifest, streaming=streaming,
+                                                   file_manifest=file_manifest)
+                source_count += 1
+                continue
+
+            if streaming:
+                log_progress(f"Streaming document chunks from {content_source['name']} into VDB index "
+                             f"{self.index_name}")
+                document_count += self.stream_documents(
+                    assign_chunk_ids(iter_source_documents(content_source), content_source['name']),
+                    delete_index=delete_index)
+                source_count += 1
+                delete_index = False
+                continue
+
+            content_docs = list(assign_chunk_ids(get_source_documents(content_source), content_source['name']))
 
             document_count += len(content_docs)
             source_count += 1
-            print(
+            log_progress(
                 f"Loading {len(content_docs)} document chunks from {content_source['name']} into VDB index {self.index_name}")
             self.load_documents(content_docs, delete_index=delete_index)
             delete_index = False
 
-        print(f"Done! Loaded {document_count} documents from {source_count} sources into index: {self.index_name}")
+        self.finish_load()
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+
+        log_progress(f"Done! Loaded {document_count} documents from {source_count} sources into index: "
+                     f"{self.index_name}")
         return document_count
 
+    def sync_source(self, content_source, sync_manifest, streaming=False, file_manifest=None):
+        """
+        Syncs a content source with the index. Chunks get stable IDs (see assign_chunk_ids), chunks already recorded
+        in the manifest are skipped, new or changed chunks are upserted, and the vectors of chunks no longer produced by
+        the source are deleted afterwards. The manifest is only updated once the source has been synced.
+
+        :param content_source: The content source to sync.
+        :param sync_manifest: The SyncManifest recording the chunks previously loaded for each source.
+        :param streaming: Boolean flag to stream the source in batches instead of building the full list of chunks.
+        :param file_manifest: Optional FileManifest. Unchanged files of a folder source are not parsed, and the chunks
+          recorded for them are carried forward instead of being deleted.
+        :return: The number of new or changed document chunks loaded.
+        """
+        if content_source['type'] not in FOLDER_SOURCE_TYPES:
+            file_manifest = None
+        previous_chunks = sync_manifest.get_source_chunks(self.index_name, content_source['name'])
+        current_chunks = {}
+        file_chunk_ids = {}  # file path -> IDs of the chunks it produced, for the file manifest
+
+        log_progress(f"Syncing document chunks from {content_source['name']} into VDB index {self.index_name}")
+        if streaming:
+            loaded_count = self.stream_documents(self.get_changed_documents(
+                iter_source_documents(content_source, file_manifest=file_manifest), content_source['name'],
+                previous_chunks, current_chunks, file_chunk_ids))
+        else:
+            changed_docs = list(self.get_changed_documents(
+                get_source_documents(content_source, file_manifest=file_manifest), content_source['name'],
+                previous_chunks, current_chunks, file_chunk_ids))
+            loaded_count = self.load_documents(changed_docs) if changed_docs else 0
+
+        self.finish_source_sync(content_source['name'], sync_manifest, file_manifest, previous_chunks, current_chunks,
+                                file_chunk_ids, loaded_count)
+        return loaded_count
+
+    async def async_source(self, content_source, sync_manifest, streaming=False, file_manifest=None):
+        """
+        Async counterpart of sync_source, loading the new or changed chunks through aload_document_batch.
+
+        :param content_source: The content source to sync.
+        :param sync_manifest: The SyncManifest recording the chunks previously loaded for each source.
+        :param streaming: Boolean flag to stream the source in batches instead of building the full list of chunks.
+        :param file_manifest: Optional FileManifest, see sync_source.
+        :return: The number of new or changed document chunks loaded.
+        """
+        if content_source['type'] not in FOLDER_SOURCE_TYPES:
+            file_manifest = None
+        previous_chunks = sync_manifest.get_source_chunks(self.index_name, content_source['name'])
+        current_chunks = {}
+        file_chunk_ids = {}
+
+        log_progress(f"Syncing document chunks from {content_source['name']} into VDB index {self.index_name}")
+        if streaming:
+            loaded_count = await self.astream_documents(self.get_changed_documents(
+                iter_source_documents(content_source, file_manifest=file_manifest), content_source['name'],
+                previous_chunks, current_chunks, file_chunk_ids))
+        else:
+            content_docs = await asyncio.to_thread(get_source_documents, content_source, file_manifest=file_manifest)
+            changed_docs = list(self.get_changed_documents(content_docs, content_source['name'], previous_chunks,
+                                                           current_chunks, file_chunk_ids))
+            loaded_count = await self.aload_documents(changed_docs) if changed_docs else 0
+
+        await asyncio.to_thread(self.finish_source_sync, content_source['name'], sync_manifest, file_manifest,
+                                previous_chunks, current_chunks, file_chunk_ids, loaded_count)
+        return loaded_count
+
+    def get_changed_documents(self, documents, source_name, previous_chunks, current_chunks, file_chunk_ids):
+        """
+        Assigns chunk IDs to a synced source's documents and yields the ones not already in the index.
+
+        :param documents: An iterable of the source's document chunks.
+        :param source_name: The name of the content source.
+        :param previous_chunks: The chunk ID to text hash dictionary recorded in the manifest by the last sync.
+        :param current_chunks: A dictionary filled with the chunk ID and text hash of every chunk.
+        :param file_chunk_ids: A dictionary filled with the IDs of the chunks of each file path.
+        :return: A generator of new or changed document chunks.
+        """
+        for doc in assign_chunk_ids(documents, source_name):
+            current_chunks[doc.id] = get_text_hash(doc.page_content)
+            file_chunk_ids.setdefault(doc.metadata.get('source'), []).append(doc.id)
+            if doc.id not in previous_chunks:
+                yield doc
+
+    def finish_source_sync(self, source_name, sync_manifest, file_manifest, previous_chunks, current_chunks,
+                           file_chunk_ids, loaded_count):
+        """
+        Deletes the vectors of chunks a synced source no longer produces, then records the source's chunks in the
+        manifests.
+
+        :param source_name: The name of the content source.
+        :param sync_manifest: The SyncManifest.
+        :param file_manifest: The FileManifest, or None.
+        :param previous_chunks: The chunk ID to text hash dictionary recorded by the last sync.
+        :param current_chunks: The chunk ID to text hash dictionary of this sync.
+        :param file_chunk_ids: The IDs of the chunks of each parsed file path.
+        :param loaded_count: The number of new or changed chunks loaded, for progress reporting.
+        """
+        if file_manifest is not None:
+            # The chunks of skipped, unchanged files are still in the index
+            for chunk_id in file_manifest.get_unchanged_chunk_ids(source_name):
+                current_chunks[chunk_id] = previous_chunks.get(chunk_id, "")
+
+        removed_ids = [chunk_id for chunk_id in previous_chunks if chunk_id not in current_chunks]
+        if removed_ids:
+            self.delete_documents(removed_ids)
+
+        sync_manifest.set_source_chunks(self.index_name, source_name, current_chunks)
+        if file_manifest is not None:
+            file_manifest.commit_source(source_name, file_chunk_ids)
+        log_progress(f"Synced {source_name}: {loaded_count} new or changed, "
+                     f"{len(current_chunks) - loaded_count} unchanged, "
+                     f"{len(removed_ids)} removed document chunks")
+
     def load_documents(self, document_set, delete_index=False):
         """
         Loads a set of documents into the index in batches.
@@ -71,24 +296,462 @@ class BaseVectorLoader:
         :param document_set: The list of document embeddings to be loaded.
         :param delete_index: Whether to delete the existing index before loading.
         """
-        index_exists = self.index_exists()
-        if index_exists and delete_index:
+        self.prepare_index(delete_index)
+
+        if self.batcher is not None:
+            log_progress(f"Now loading {len(document_set)} document chunks in adaptive batches")
+            batches = self.batcher.batches(document_set)
+            total_batches = None
+        else:
+            batch_size = self.batch_size
+            total_batches = len(document_set) // batch_size + (1 if len(document_set) % batch_size > 0 else 0)
+            log_progress(f"Now loading {len(document_set)} document chunks in {total_batches} batches of {batch_size}")
+
+            batches = (document_set[start_index:start_index + batch_size]
+                       for start_index in range(0, len(document_set), batch_size))
+        return self.load_batches(batches, total_batches)
+
+    def stream_documents(self, documents, delete_index=False):
+        """
+        Loads documents from an iterable as they are produced. Chunking runs in a background thread, handing batches
+        over through a bounded queue, so the first batches are loaded while later ones are still being fetched.
+
+        :param documents: An iterable of document chunks, typically a generator from iter_source_documents.
+        :param delete_index: Whether to delete the existing index before loading.
+        :return: The number of document chunks loaded.
+        """
+        self.prepare_index(delete_index)
+
+        batches = prefetch(self.get_batches(documents), self.max_queued_batches)
+        return self.load_batches(batches)
+
+    def load_batches(self, batches, total_batches=None):
+        """
+        Loads document batches with up to max_workers batches in flight. Progress is reported in batch order, and
+        the first failing batch stops the load once the batches already in flight have finished.
+
+        The first batch is always loaded on its own, so an index that does not exist yet is only created once.
+
+        :param batches: An iterable of document batches.
+        :param total_batches: The number of batches, if known, for progress reporting.
+        :return: The number of document chunks loaded.
+        """
+        document_count = 0
+        batch_count = 0
+
+        def report(batch_num, document_subset, loaded):
+            nonlocal document_count, batch_count
+            document_count += len(document_subset)
+            batch_count += 1
+            if not loaded:
+                log_progress(f"Skipped batch {batch_count}, already loaded according to the checkpoint")
+            elif total_batches is None:
+                log_progress(f"Loaded batch {batch_count} ({document_count} document chunks so far)")
+            else:
+                log_progress(f"Loaded batch {batch_count} of {total_batches}")
+
+        batches = iter(batches)
+        first_batch = next(batches, None)
+        if first_batch is None:
+            return 0
+        report(0, first_batch, self.load_checkpointed_batch(first_batch))
+
+        run_concurrently(batches, self.load_checkpointed_batch, self.max_workers, on_result=report)
+        return document_count
+
+    async def aload_sources(self, content, delete_index=False, streaming=False, sync_manifest=None,
+                            file_manifest=None):
+        """
+        Async counterpart of load_sources. Fetching and chunking run in worker threads so crawls do not block the
+        event loop, and batches are loaded through aload_document_batch.
+
+        :param content: A list of content sources.
+        :param delete_index: Boolean flag to determine if the existing index should be deleted before loading.
+        :param streaming: Boolean flag to stream each source in batches instead of building the full list of chunks.
+        :param sync_manifest: Optional SyncManifest, to sync each source instead of reloading it, see load_sources.
+        :param file_manifest: Optional FileManifest, used with sync_manifest to skip unchanged files of folder sources.
+        :return: The total number of documents loaded.
+        """
+        document_count = 0
+        source_count = 0
+        log_progress(f"Going to load {len(content)} data sources into {self.index_name} index")
+
+        if file_manifest is not None and sync_manifest is None:
+            raise ValueError("ERROR: A file_manifest can only be used together with a sync_manifest")
+
+        if sync_manifest is not None and delete_index:
+            # A full reload, so the manifest no longer describes what is in the index
+            await asyncio.to_thread(self.prepare_index, True)
+            sync_manifest.clear_index(self.index_name)
+            if file_manifest is not None:
+                file_manifest.clear()
+            delete_index = False
+
+        for content_source in content:
+            log_progress(f"Processing content for {content_source['name']} ")
+
+            if sync_manifest is not None:
+                document_count += await self.async_source(content_source, sync_manifest, streaming=streaming,
+                                                          file_manifest=file_manifest)
+            elif streaming:
+                log_progress(f"Streaming document chunks from {content_source['name']} into VDB index "
+                             f"{self.index_name}")
+                document_count += await self.astream_documents(
+                    assign_chunk_ids(iter_source_documents(content_source), content_source['name']),
+                    delete_index=delete_index)
+            else:
+                content_docs = await asyncio.to_thread(get_source_documents, content_source)
+                content_docs = list(assign_chunk_ids(content_docs, content_source['name']))
+                document_count += len(content_docs)
+                log_progress(
+                    f"Loading {len(content_docs)} document chunks from {content_source['name']} into VDB index {self.index_name}")
+                await self.aload_documents(content_docs, delete_index=delete_index)
+
+            source_count += 1
+            delete_index = False
+
+        self.finish_load()
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+
+        log_progress(f"Done! Loaded {document_count} documents from {source_count} sources into index: "
+                     f"{self.index_name}")
+        return document_count
+
+    async def aload_documents(self, document_set, delete_index=False):
+        """
+        Async counterpart of load_documents.
+
+        :param document_set: The list of document embeddings to be loaded.
+        :param delete_index: Whether to delete the existing index before loading.
+        :return: The number of document chunks loaded.
+        """
+        await asyncio.to_thread(self.prepare_index, delete_index)
+
+        if self.batcher is not None:
+            log_progress(f"Now loading {len(document_set)} document chunks in adaptive batches")
+            batches = self.batcher.batches(document_set)
+            total_batches = None
+        else:
+            batch_size = self.batch_size
+            total_batches = len(document_set) // batch_size + (1 if len(document_set) % batch_size > 0 else 0)
+            log_progress(f"Now loading {len(document_set)} document chunks in {total_batches} batches of {batch_size}")
+
+            batches = (document_set[start_index:start_index + batch_size]
+                       for start_index in range(0, len(document_set), batch_size))
+        return await self.aload_batches(batches, total_batches)
+
+    async def astream_documents(self, documents, delete_index=False):
+        """
+        Async counterpart of stream_documents.
+
+        :param documents: An iterable of document chunks, typically a generator from iter_source_documents.
+        :param delete_index: Whether to delete the existing index before loading.
+        :return: The number of document chunks loaded.
+        """
+        await asyncio.to_thread(self.prepare_index, delete_index)
+
+        batches = prefetch(self.get_batches(documents), self.max_queued_batches)
+        return await self.aload_batches(batches)
+
+    async def aload_batches(self, batches, total_batches=None):
+        """
+        Async counterpart of load_batches, with up to max_workers batches loading concurrently on the event loop.
+
+        :param batches: An iterable of document batches.
+        :param total_batches: The number of batches, if known, for progress reporting.
+        :return: The number of document chunks loaded.
+        """
+        document_count = 0
+        batch_count = 0
+
+        def report(batch_num, document_subset, loaded):
+            nonlocal document_count, batch_count
+            document_count += len(document_subset)
+            batch_count += 1
+            if not loaded:
+                log_progress(f"Skipped batch {batch_count}, already loaded according to the checkpoint")
+            elif total_batches is None:
+                log_progress(f"Loaded batch {batch_count} ({document_count} document chunks so far)")
+            else:
+                log_progress(f"Loaded batch {batch_count} of {total_batches}")
+
+        batches = iter(batches)
+        first_batch = await asyncio.to_thread(next, batches, None)
+        if first_batch is None:
+            return 0
+        report(0, first_batch, await self.aload_checkpointed_batch(first_batch))
+
+        await arun_concurrently(batches, self.aload_checkpointed_batch, self.max_workers, on_result=report)
+        return document_count
+
+    def prepare_index(self, delete_index=False):
+        """
+        Deletes the existing index if requested. When resuming from a checkpoint the index is kept, since it
+        already holds the batches loaded before the restart.
+
+        :param delete_index: Whether to delete the existing index.
+        :return: Boolean indicating whether the index was deleted.
+        """
+        if not delete_index:
+            return False
+
+        if self.checkpoint is not None and self.checkpoint.has_progress(self.index_name):
+            log_progress(f"Resuming load of index {self.index_name} from checkpoint, so the existing index is kept")
+            return False
+
+        self.index_ready = False
+        if self.index_exists():
             self.delete_index()
+            return True
+        return False
+
+    def ensure_index(self):
+        """
+        Makes sure the index is ready to be loaded. The first call checks that the index exists, creating it if
+        needed, and that its dimension matches the embedding model's; later calls return straight away.
+        """
+        if self.index_ready:
+            return
+
+        with self.index_lock:
+            if self.index_ready:
+                return
+
+            if self.index_exists():
+                index_dimension = self.get_index_dimension()
+                if index_dimension is not None and index_dimension != self.get_vector_dimension_size():
+                    raise ValueError(f"ERROR: Index {self.index_name} has dimension {index_dimension}, but the embedding "
+                                     f"model produces vectors of dimension {self.get_vector_dimension_size()}")
+            else:
+                self.create_index()
+            self.index_ready = True
+
+    def load_checkpointed_batch(self, document_set):
+        """
+        Loads the chunks of a batch that the checkpoint does not record as already loaded, then records them.
+
+        :param document_set: A list of document chunks.
+        :return: Boolean indicating whether anything was loaded, False if the whole batch was skipped.
+        """
+        if self.checkpoint is None:
+            self.load_sized_batch(document_set)
+            return True
+
+        remaining = self.checkpoint.get_remaining(self.index_name, document_set)
+        if not remaining:
+            return False
+        self.load_sized_batch(remaining)
+        self.checkpoint.mark_complete(self.index_name, remaining)
+        return True
+
+    async def aload_checkpointed_batch(self, document_set):
+        """
+        Async counterpart of load_checkpointed_batch.
 
-        batch_size = 250
-        total_batches = len(document_set) // batch_size + (1 if len(document_set) % batch_size > 0 else 0)
-        print(f"Now loading {len(document_set)} document chunks in {total_batches} batches of {batch_size}")
+        :param document_set: A list of document chunks.
+        :return: Boolean indicating whether anything was loaded, False if the whole batch was skipped.
+        """
+        if self.checkpoint is None:
+            await self.aload_sized_batch(document_set)
+            return True
+
+        remaining = self.checkpoint.get_remaining(self.index_name, document_set)
+        if not remaining:
+            return False
+        await self.aload_sized_batch(remaining)
+        self.checkpoint.mark_complete(self.index_name, remaining)
+        return True
 
-        for batch_num in range(total_batches):
-            start_index = batch_num * batch_size
-            end_index = start_index + batch_size
-            document_subset = document_set[start_index:end_index]
-            self.load_document_batch(document_subset)
-            print(f"Loaded batch {batch_num + 1} of {total_batches}")
+    def get_batches(self, documents):
+        """
+        Groups documents into batches, using the adaptive batcher when one is configured.
+
+        :param documents: An iterable of document chunks.
+        :return: A generator of lists of document chunks.
+        """
+        if self.batcher is not None:
+            return self.batcher.batches(documents)
+        return batched(documents, self.batch_size)
+
+    def load_sized_batch(self, document_set):
+        """
+        Loads a batch of documents, reporting its latency and any throttling or size error to the adaptive batcher.
+        A batch rejected as too large is split in half and each half is loaded in turn.
+
+        :param document_set: A list of document chunks.
+        :return: The result of load_document_batch.
+        """
+        if self.batcher is None:
+            return self.load_retried_batch(document_set)
+
+        start_time = time.monotonic()
+        try:
+            result = self.load_retried_batch(document_set)
+        except Exception as e:
+            if not self.handle_batch_error(e, document_set):
+                raise
+            middle = len(document_set) // 2
+            self.load_sized_batch(document_set[:middle])
+            return self.load_sized_batch(document_set[middle:])
+
+        self.batcher.record_success(len(document_set), time.monotonic() - start_time)
+        return result
+
+    async def aload_sized_batch(self, document_set):
+        """
+        Async counterpart of load_sized_batch.
+
+        :param document_set: A list of document chunks.
+        :return: The result of aload_document_batch.
+        """
+        if self.batcher is None:
+            return await self.aload_retried_batch(document_set)
+
+        start_time = time.monotonic()
+        try:
+            result = await self.aload_retried_batch(document_set)
+        except Exception as e:
+            if not self.handle_batch_error(e, document_set):
+                raise
+            middle = len(document_set) // 2
+            await self.aload_sized_batch(document_set[:middle])
+            return await self.aload_sized_batch(document_set[middle:])
+
+        self.batcher.record_success(len(document_set), time.monotonic() - start_time)
+        return result
+
+    def load_retried_batch(self, document_set):
+        """
+        Loads a batch of documents, retrying throttling and transient errors up to max_retries times. Once the batch
+        is written the index version is bumped, invalidating cached search results.
+
+        :param document_set: A list of document chunks.
+        :return: The result of load_document_batch.
+        """
+        try:
+            if self.max_retries < 1:
+                return self.load_document_batch(document_set)
+            return call_with_retries(lambda: self.load_document_batch(document_set), self.max_retries,
+                                     on_retry=lambda error, attempt, delay:
+                                     self.on_batch_retry(error, attempt, delay, document_set))
+        finally:
+            # Also bumped on failure, since part of the batch may have been written
+            self.bump_index_version()
+
+    async def aload_retried_batch(self, document_set):
+        """
+        Async counterpart of load_retried_batch.
+
+        :param document_set: A list of document chunks.
+        :return: The result of aload_document_batch.
+        """
+        try:
+            if self.max_retries < 1:
+                return await self.aload_document_batch(document_set)
+            return await acall_with_retries(lambda: self.aload_document_batch(document_set), self.max_retries,
+                                            on_retry=lambda error, attempt, delay:
+                                            self.on_batch_retry(error, attempt, delay, document_set))
+        finally:
+            self.bump_index_version()
+
+    def on_batch_retry(self, error, attempt, delay, document_set):
+        """
+        Reports a batch retry, and tells the adaptive batcher about throttling so later batches shrink.
+        """
+        log_error(f"   Batch of {len(document_set)} document chunks failed, retry {attempt + 1} of {self.max_retries} "
+              f"in {delay:.1f}s. error={error}")
+        if self.batcher is not None and is_rate_limit_error(error):
+            self.batcher.record_failure(len(document_set))
+
+    def handle_batch_error(self, error, document_set):
+        """
+        Reports a throttling or size error to the adaptive batcher.
+
+        :param error: The exception raised while loading the batch.
+        :param document_set: The batch of document chunks that failed.
+        :return: Boolean indicating whether the batch should be split in half and retried.
+        """
+        too_large = is_payload_too_large_error(error)
+        if too_large or is_rate_limit_error(error):
+            self.batcher.record_failure(len(document_set))
+
+        if too_large and len(document_set) > 1:
+            log_error(f"Batch of {len(document_set)} document chunks was too large, splitting it in two. error={error}")
+            return True
+        return False
 
     def load_document_batch(self, document_set):
         """
-        Load a batch of documents. To be implemented in subclasses.
+        Load a batch of documents. By default the batch is embedded with embed_documents and written with
+        load_record_batch, subclasses may override this.
+        """
+        return self.load_traced_record_batch(self.embed_documents(document_set))
+
+    def load_traced_record_batch(self, records):
+        """
+        Writes a batch of vector records with load_record_batch, recording it as an upsert span.
+
+        :param records: A list of vector records.
+        :return: The result of load_record_batch.
+        """
+        with trace_span("upsert", index=self.index_name) as span:
+            result = self.load_record_batch(records)
+            span.add(items=len(records), bytes=get_records_bytes(records))
+        return result
+
+    async def aload_document_batch(self, document_set):
+        """
+        Load a batch of documents asynchronously. Subclasses with a native async client should override this,
+        by default load_document_batch runs in a worker thread.
+        """
+        return await asyncio.to_thread(self.load_document_batch, document_set)
+
+    def embed_documents(self, document_set):
+        """
+        Embeds a batch of document chunks into vector records that any backend can write with load_record_batch.
+        Each record is a dictionary with the chunk's id, embedding values, text and metadata.
+
+        :param document_set: A list of document chunks.
+        :return: A list of vector records.
+        """
+        texts = [doc.page_content for doc in document_set]
+        with trace_span("embed", index=self.index_name) as span:
+            vectors = self.embedding_client.embed_documents(texts)
+            span.add(items=len(texts), bytes=sum(len(text.encode('utf-8')) for text in texts),
+                     tokens=sum(estimate_tokens(text) for text in texts))
+        return get_vector_records(document_set, vectors)
+
+    async def aembed_documents(self, document_set):
+        """
+        Async counterpart of embed_documents, using the embedding client's aembed_documents.
+
+        :param document_set: A list of document chunks.
+        :return: A list of vector records.
+        """
+        texts = [doc.page_content for doc in document_set]
+        with trace_span("embed", index=self.index_name) as span:
+            vectors = await self.embedding_client.aembed_documents(texts)
+            span.add(items=len(texts), bytes=sum(len(text.encode('utf-8')) for text in texts),
+                     tokens=sum(estimate_tokens(text) for text in texts))
+        return get_vector_records(document_set, vectors)
+
+    def finish_load(self):
+        """
+        Called once load_sources has loaded every source. Subclasses that buffer writes may override this,
+        by default it does nothing.
+        """
+        pass
+
+    def load_record_batch(self, records):
+        """
+        Write a batch of already embedded vector records, see embed_documents. To be implemented in subclasses.
+        """
+        raise NotImplementedError
+
+    def delete_documents(self, ids):
+        """
+        Delete document vectors by ID. To be implemented in subclasses, which should call bump_index_version.
         """
         raise NotImplementedError
 
@@ -99,18 +762,39 @@ class BaseVectorLoader:
         raise NotImplementedError
 
     def delete_index(self, index_name=None):
+        """
+        Delete the index. To be implemented in subclasses, which should call bump_index_version.
+        """
         raise NotImplementedError
 
+    def bump_index_version(self, index_name=None):
+        """
+        Marks the index as changed, so search results cached by query classes in this process are not reused.
+
+        :param index_name: The name of the index, defaults to this loader's index.
+        """
+        bump_index_version(index_name or self.index_name)
+
     def get_vector_dimension_size(self):
         """
         Get the dimension size of the vector embeddings.
 
         :return: The dimension size of the vector embeddings.
         """
-        embedding_vector = self.embedding_client.embed_query(
-            "Some string to determine embedding dimensional size to create the index")
-        dimension_size = len(embedding_vector)
-        return dimension_size
+        if self.dimension_size is None:
+            embedding_vector = self.embedding_client.embed_query(
+                "Some string to determine embedding dimensional size to create the index")
+            self.dimension_size = len(embedding_vector)
+        return self.dimension_size
+
+    def get_index_dimension(self):
+        """
+        Get the vector dimension of the existing index. Subclasses may override this, by default the dimension
+        is unknown and not checked.
+
+        :return: The index's vector dimension, or None if unknown.
+        """
+        return None
 
     def describe_index(self, index_name=None):
         raise NotImplementedError
@@ -121,14 +805,28 @@ class BaseVectorQuery:
     Base class for querying a vector database.
     """
 
-    def __init__(self, index_name, embedding_client):
+    def __init__(self, index_name, embedding_client, query_cache=None, result_cache=None, query_stats=None,
+                 metrics_hook=None):
         """
         Initializes the BaseVectorQuery class.
 
         :param index_name: The name of the index.
         :param embedding_client: The LangChain embedding client to be used.
+        :param query_cache: Optional QueryEmbeddingCache. Frequent queries are then embedded once and served from the
+          cache, instead of calling the embedding client on every query.
+        :param result_cache: Optional SearchResultCache. Repeated queries are then answered from memory until a loader
+          writes to the index.
+        :param query_stats: Optional QueryStats to record query latencies in, e.g. one shared by several query classes.
+          Each query class keeps its own by default, see get_query_stats.
+        :param metrics_hook: Optional callable called with the index name and the timings of every query, e.g. a
+          PrometheusQueryMetrics.
         """
         self.index_name = index_name
+        self.result_cache = result_cache
+        self.query_stats = query_stats if query_stats is not None else QueryStats()
+        self.metrics_hook = metrics_hook
+        if query_cache is not None:
+            embedding_client = CachedQueryEmbeddings(embedding_client, query_cache)
         self.embedding_client = embedding_client
         load_dotenv(find_dotenv())
         self.vdb_client = self.get_client()
@@ -136,13 +834,277 @@ class BaseVectorQuery:
     def get_client(self):
         raise NotImplementedError
 
-    def query(self, query, num_results=4):
+    def get_search_kwargs(self, filter=None):
         """
-        Performs a similarity search on the vector database.
+        Gets the keyword arguments passed to the vector store's similarity searches. Subclasses may add backend
+        specific search options.
+
+        :param filter: The search filter, if any.
+        :return: A dictionary of keyword arguments.
+        """
+        return {} if filter is None else {"filter": filter}
+
+    def get_result_cache_scope(self):
+        """
+        Identifies the searched index in result cache keys. Subclasses add whatever else selects the index,
+        such as a namespace or location.
+
+        :return: A hashable scope.
+        """
+        return type(self).__name__, self.index_name
+
+    def get_result_cache_key(self, query, num_results, filter=None, batched_query=False):
+        """
+        Gets the result cache key of a search.
+
+        :param query: The search query.
+        :param num_results: Number of top results to return.
+        :param filter: The search filter.
+        :param batched_query: Whether the query was embedded in a batch by query_many. Those results are cached apart,
+          like their query vectors, since they are searched with a document-style vector.
+        :return: A hashable key, or None if the search is not cached.
+        """
+        if self.result_cache is None:
+            return None
+        filter_key = get_filter_key(filter)
+        if filter_key is None:
+            return None
+        return self.get_result_cache_scope(), query, num_results, filter_key, batched_query
+
+    def query(self, query, num_results=4, filter=None):
+        """
+        Performs a similarity search on the vector database. The query is embedded, then searched by vector, and the
+        time spent in each step is recorded, see get_query_stats.
+
+        :param query: The search query.
+        :param num_results: Number of top results to return.
+        :param filter: Optional filter passed to the vector store's similarity search.
+        :return: Query results.
+        """
+        start_time = time.perf_counter()
+        cache_key = self.get_result_cache_key(query, num_results, filter)
+        if cache_key is not None:
+            version = get_index_version(self.index_name)
+            query_results = self.result_cache.get(cache_key, self.index_name)
+            if query_results is not None:
+                self.record_query_timings(start_time, start_time, start_time, cached=True)
+                return query_results
+
+        query_vector = self.embedding_client.embed_query(query)
+        embedded_time = time.perf_counter()
+        query_results = self.vdb_client.similarity_search_by_vector(query_vector, k=num_results,
+                                                                    **self.get_search_kwargs(filter))
+        searched_time = time.perf_counter()
+        if cache_key is not None:
+            self.result_cache.put(cache_key, version, query_results)
+        self.record_query_timings(start_time, embedded_time, searched_time)
+        return query_results
+
+    async def aquery(self, query, num_results=4, filter=None):
+        """
+        Performs a similarity search on the vector database asynchronously.
 
         :param query: The search query.
         :param num_results: Number of top results to return.
+        :param filter: Optional filter passed to the vector store's similarity search.
         :return: Query results.
         """
-        query_results = self.vdb_client.similarity_search(query, k=num_results)
+        start_time = time.perf_counter()
+        cache_key = self.get_result_cache_key(query, num_results, filter)
+        if cache_key is not None:
+            version = get_index_version(self.index_name)
+            query_results = self.result_cache.get(cache_key, self.index_name)
+            if query_results is not None:
+                self.record_query_timings(start_time, start_time, start_time, cached=True)
+                return query_results
+
+        query_vector = await self.embedding_client.aembed_query(query)
+        embedded_time = time.perf_counter()
+        query_results = await self.vdb_client.asimilarity_search_by_vector(query_vector, k=num_results,
+                                                                           **self.get_search_kwargs(filter))
+        searched_time = time.perf_counter()
+        if cache_key is not None:
+            self.result_cache.put(cache_key, version, query_results)
+        self.record_query_timings(start_time, embedded_time, searched_time)
         return query_results
+
+    def record_query_timings(self, start_time, embedded_time, searched_time, cached=False):
+        """
+        Records the timings of a query in the query stats and passes them to the metrics hook.
+
+        :param start_time: The perf_counter time the query started.
+        :param embedded_time: The perf_counter time the query was embedded.
+        :param searched_time: The perf_counter time the search returned.
+        :param cached: Whether the results came from the result cache.
+        """
+        end_time = time.perf_counter()
+        timings = {
+            "embed_ms": (embedded_time - start_time) * 1000,
+            "search_ms": (searched_time - embedded_time) * 1000,
+            "post_ms": (end_time - searched_time) * 1000,
+            "total_ms": (end_time - start_time) * 1000,
+            "cached": cached,
+        }
+        self.query_stats.record(self.index_name, timings)
+        if self.metrics_hook is not None:
+            self.metrics_hook(self.index_name, timings)
+
+    def get_query_stats(self):
+        """
+        Gets the rolling latency percentiles of this index's queries.
+
+        :return: A dictionary with the query count and the p50, p95 and p99 latency in milliseconds of the embed,
+          search, post and total phases, see QueryStats.get_stats.
+        """
+        return self.query_stats.get_stats(self.index_name)
+
+    def query_many(self, queries=None, num_results=4, query_vectors=None, batch_size=DEFAULT_QUERY_BATCH_SIZE,
+                   max_workers=DEFAULT_QUERY_WORKERS, filter=None):
+        """
+        Performs similarity searches for many queries. Queries are embedded in batches of batch_size with one
+        embed_documents call each, while the searches of the previous batch run concurrently on up to max_workers
+        threads. Models that embed queries and documents differently should be given query_vectors instead.
+        Like query, results are served from and stored in the result cache, and every search is recorded in the query
+        stats, with its share of its batch's embedding time.
+
+        :param queries: A list of search queries.
+        :param num_results: Number of top results to return per query.
+        :param query_vectors: A list of precomputed query vectors, instead of queries. Embedding is then skipped, and so
+          is the result cache, which is keyed by query text.
+        :param batch_size: The number of queries embedded per call.
+        :param max_workers: The maximum number of concurrent searches.
+        :param filter: Optional filter passed to the vector store's similarity search of every query.
+        :return: A list with the query results of each query, in input order.
+        """
+        if (queries is None) == (query_vectors is None):
+            raise ValueError("ERROR: query_many needs either queries or query_vectors")
+
+        if query_vectors is not None:
+            results = [None] * len(query_vectors)
+            searches = ((index, vector, None, None, 0.0) for index, vector in enumerate(query_vectors))
+        else:
+            results, pending = self.get_cached_query_results(queries, num_results, filter)
+            # Embedding runs ahead in a background thread, so the next batch is embedded while this one is searched
+            embedded_batches = prefetch(self.embed_query_batch(pending_batch)
+                                        for pending_batch in batched(pending, batch_size))
+            searches = (search for search_batch in embedded_batches for search in search_batch)
+
+        search_kwargs = self.get_search_kwargs(filter)
+
+        def search_vector(search):
+            search_start = time.perf_counter()
+            query_results = self.vdb_client.similarity_search_by_vector(search[1], k=num_results, **search_kwargs)
+            self.record_batched_search(search, search_start, query_results)
+            return query_results
+
+        def store_result(index, search, query_results):
+            results[search[0]] = query_results
+
+        run_concurrently(searches, search_vector, max_workers, on_result=store_result)
+        return results
+
+    async def aquery_many(self, queries=None, num_results=4, query_vectors=None, batch_size=DEFAULT_QUERY_BATCH_SIZE,
+                          max_workers=DEFAULT_QUERY_WORKERS, filter=None):
+        """
+        Async counterpart of query_many, using the embedding client's aembed_documents and the vector store's
+        asimilarity_search_by_vector.
+
+        :param queries: A list of search queries.
+        :param num_results: Number of top results to return per query.
+        :param query_vectors: A list of precomputed query vectors, instead of queries. Embedding is then skipped, and so
+          is the result cache, which is keyed by query text.
+        :param batch_size: The number of queries embedded per call.
+        :param max_workers: The maximum number of concurrent searches.
+        :param filter: Optional filter passed to the vector store's similarity search of every query.
+        :return: A list with the query results of each query, in input order.
+        """
+        if (queries is None) == (query_vectors is None):
+            raise ValueError("ERROR: aquery_many needs either queries or query_vectors")
+
+        if query_vectors is not None:
+            results = [None] * len(query_vectors)
+            searches = [(index, vector, None, None, 0.0) for index, vector in enumerate(query_vectors)]
+        else:
+            results, pending = self.get_cached_query_results(queries, num_results, filter)
+            searches = []
+            for pending_batch in batched(pending, batch_size):
+                searches.extend(await self.aembed_query_batch(pending_batch))
+
+        search_kwargs = self.get_search_kwargs(filter)
+
+        async def search_vector(search):
+            search_start = time.perf_counter()
+            query_results = await self.vdb_client.asimilarity_search_by_vector(search[1], k=num_results,
+                                                                               **search_kwargs)
+            self.record_batched_search(search, search_start, query_results)
+            return query_results
+
+        def store_result(index, search, query_results):
+            results[search[0]] = query_results
+
+        await arun_concurrently(searches, search_vector, max_workers, on_result=store_result)
+        return results
+
+    def get_cached_query_results(self, queries, num_results, filter=None):
+        """
+        Looks up the results of query_many's queries in the result cache, recording each hit in the query stats.
+
+        :param queries: A list of search queries.
+        :param num_results: Number of top results to return per query.
+        :param filter: The search filter.
+        :return: A list with the cached results of each query, None for the queries not cached, and a list of
+          (position, query, cache key, index version) tuples of the queries still to be searched.
+        """
+        queries = list(queries)
+        results = [None] * len(queries)
+        pending = []
+        for position, query in enumerate(queries):
+            start_time = time.perf_counter()
+            cache_key = self.get_result_cache_key(query, num_results, filter, batched_query=True)
+            version = None
+            if cache_key is not None:
+                version = get_index_version(self.index_name)
+                results[position] = self.result_cache.get(cache_key, self.index_name)
+                if results[position] is not None:
+                    self.record_query_timings(start_time, start_time, start_time, cached=True)
+                    continue
+            pending.append((position, query, cache_key, version))
+        return results, pending
+
+    def embed_query_batch(self, pending_batch):
+        """
+        Embeds a batch of query_many's queries with one embed_documents call.
+
+        :param pending_batch: A list of (position, query, cache key, index version) tuples.
+        :return: A list of (position, vector, cache key, index version, embed seconds) searches, where embed seconds is
+          each query's share of the embedding time.
+        """
+        start_time = time.perf_counter()
+        vectors = self.embedding_client.embed_documents([query for _, query, _, _ in pending_batch])
+        embed_seconds = (time.perf_counter() - start_time) / len(pending_batch)
+        return [(position, vector, cache_key, version, embed_seconds)
+                for (position, _, cache_key, version), vector in zip(pending_batch, vectors)]
+
+    async def aembed_query_batch(self, pending_batch):
+        """
+        Async counterpart of embed_query_batch, using the embedding client's aembed_documents.
+        """
+        start_time = time.perf_counter()
+        vectors = await self.embedding_client.aembed_documents([query for _, query, _, _ in pending_batch])
+        embed_seconds = (time.perf_counter() - start_time) / len(pending_batch)
+        return [(position, vector, cache_key, version, embed_seconds)
+                for (position, _, cache_key, version), vector in zip(pending_batch, vectors)]
+
+    def record_batched_search(self, search, search_start, query_results):
+        """
+        Caches the results of one of query_many's searches and records its timings.
+
+        :param search: The (position, vector, cache key, index version, embed seconds) search.
+        :param search_start: The perf_counter time the search started.
+        :param query_results: The search results.
+        """
+        searched_time = time.perf_counter()
+        _, _, cache_key, version, embed_seconds = search
+        if cache_key is not None:
+            self.result_cache.put(cache_key, version, query_results)
+        self.record_query_timings(search_start - embed_seconds, search_start, searched_time)
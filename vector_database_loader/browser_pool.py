@@ -0,0 +1,194 @@
+import queue
+import threading
+
+from vector_database_loader.http_crawler import DEFAULT_HTML_EXTRACTOR, extract_html_document
+from vector_database_loader.tracing import log_error, log_progress
+
+DEFAULT_BROWSER_WORKERS = 4
+DEFAULT_PAGE_TIMEOUT = 60
+DEFAULT_PAGE_RETRIES = 1
+# The same browser arguments website_crawler passes to SeleniumURLLoader
+DEFAULT_BROWSER_ARGUMENTS = ["enable-features=NetworkServiceInProcess"]
+
+
+def create_chrome_driver(headless=True, arguments=None):
+    """
+    Creates a Chrome WebDriver, configured like SeleniumURLLoader's.
+
+    :param headless: Boolean indicating whether to run the browser in headless mode.
+    :param arguments: Optional list of extra browser arguments.
+    :return: The WebDriver.
+    """
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    for argument in arguments or []:
+        options.add_argument(argument)
+    if headless:
+        options.add_argument("--headless")
+        options.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """
+    A pool of reusable headless browsers crawling pages that need JavaScript rendering. Each worker thread owns one
+    browser and takes URLs from a shared queue, so a slow page only holds up its own worker. Pages that take longer
+    than page_timeout to load are abandoned, and a browser that fails or crashes is replaced and the page retried.
+    Browsers are kept between crawls until close is called.
+    """
+
+    def __init__(self, workers=DEFAULT_BROWSER_WORKERS, headless=True, page_timeout=DEFAULT_PAGE_TIMEOUT,
+                 page_retries=DEFAULT_PAGE_RETRIES, extractor=DEFAULT_HTML_EXTRACTOR, driver_factory=None):
+        """
+        Initializes the BrowserPool. Browsers are started when first needed.
+
+        :param workers: The number of browsers crawling at once.
+        :param headless: Boolean indicating whether to run the browsers in headless mode.
+        :param page_timeout: The page load timeout in seconds.
+        :param page_retries: The number of times a page is retried in a new browser after a browser failure.
+        :param extractor: The text extractor, see http_crawler.HTML_EXTRACTORS.
+        :param driver_factory: Optional callable creating a WebDriver, defaults to a Chrome driver.
+        """
+        self.workers = workers
+        self.headless = headless
+        self.page_timeout = page_timeout
+        self.page_retries = page_retries
+        self.extractor = extractor
+        self.driver_factory = driver_factory or (lambda: create_chrome_driver(headless, DEFAULT_BROWSER_ARGUMENTS))
+        self.idle_drivers = queue.Queue()
+        self.lock = threading.Lock()
+        self.restarts = 0
+
+    def get_driver(self):
+        try:
+            return self.idle_drivers.get_nowait()
+        except queue.Empty:
+            driver = self.driver_factory()
+            driver.set_page_load_timeout(self.page_timeout)
+            return driver
+
+    def discard_driver(self, driver):
+        with self.lock:
+            self.restarts += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass  # The browser may already be gone
+
+    def crawl_page(self, driver, url):
+        """
+        Loads a page in a browser and extracts its text.
+
+        :param driver: The WebDriver.
+        :param url: The page URL.
+        :return: The page document.
+        """
+        driver.get(url)
+        return extract_html_document(url, driver.page_source, self.extractor)
+
+    def run_worker(self, url_queue, results, stop_event):
+        driver = None
+        try:
+            while not stop_event.is_set():
+                try:
+                    url = url_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                doc = None
+                for attempt in range(self.page_retries + 1):
+                    try:
+                        if driver is None:
+                            driver = self.get_driver()
+                        doc = self.crawl_page(driver, url)
+                        break
+                    except Exception as e:
+                        # A timed out or failed page can leave the browser unusable, so it is replaced
+                        log_error(f"ERROR: Crawling {url} failed (attempt {attempt + 1}): {e}")
+                        if driver is not None:
+                            self.discard_driver(driver)
+                            driver = None
+
+                while not stop_event.is_set():
+                    try:
+                        results.put((url, doc), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        except Exception as e:
+            log_error(f"ERROR: Browser worker failed: {e}")
+        finally:
+            if driver is not None:
+                self.idle_drivers.put(driver)
+            results.put(None)
+
+    def iter_crawl(self, url_list):
+        """
+        Crawls pages, yielding each page's document as soon as it has loaded. Pages that could not be crawled are
+        reported and skipped.
+
+        :param url_list: The page URLs.
+        :return: A generator of page documents, in the order the pages finish.
+        """
+        url_queue = queue.Queue()
+        for url in url_list:
+            url_queue.put(url)
+        worker_count = min(self.workers, len(url_list))
+        if worker_count == 0:
+            return
+
+        # Bounded, so the browsers wait rather than pile up pages when the consumer is slow
+        results = queue.Queue(maxsize=worker_count * 2)
+        stop_event = threading.Event()
+        threads = [threading.Thread(target=self.run_worker, args=(url_queue, results, stop_event), daemon=True)
+                   for _ in range(worker_count)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            finished_workers = 0
+            while finished_workers < worker_count:
+                result = results.get()
+                if result is None:
+                    finished_workers += 1
+                    continue
+                url, doc = result
+                if doc is None:
+                    log_error(f"ERROR: Skipping {url}, it could not be crawled")
+                    continue
+                yield doc
+        finally:
+            stop_event.set()
+            # Drain, so workers blocked on a full results queue can finish
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def crawl(self, url_list):
+        """
+        Crawls pages.
+
+        :param url_list: The page URLs.
+        :return: A list of page documents, in URL order.
+        """
+        url_positions = {url: position for position, url in enumerate(url_list)}
+        docs = list(self.iter_crawl(url_list))
+        log_progress(f"Crawled {len(docs)} of {len(url_list)} pages with {min(self.workers, len(url_list))} browsers")
+        return sorted(docs, key=lambda doc: url_positions[doc.metadata['source']])
+
+    def close(self):
+        """
+        Quits the idle browsers.
+        """
+        while True:
+            try:
+                driver = self.idle_drivers.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                driver.quit()
+            except Exception:
+                pass
@@ -3,11 +3,13 @@ import os
 import sys
 import time
 import fnmatch
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
 
 from colorama import Fore, Style
 import requests
 from langchain_community.document_loaders import (
-    DirectoryLoader,
     Docx2txtLoader,
     SeleniumURLLoader,
     PyPDFLoader
@@ -19,7 +21,30 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from googleapiclient.discovery import build
 from google.oauth2 import service_account
 
+from vector_database_loader.browser_pool import (
+    DEFAULT_BROWSER_ARGUMENTS,
+    DEFAULT_PAGE_TIMEOUT,
+    BrowserPool
+)
+from vector_database_loader.http_crawler import (
+    DEFAULT_FETCH_PER_HOST,
+    DEFAULT_FETCH_TIMEOUT,
+    DEFAULT_FETCH_WORKERS,
+    DEFAULT_HTML_EXTRACTOR,
+    HttpCrawler
+)
+from vector_database_loader.pdf_loaders import DEFAULT_PDF_BACKEND, get_page_ranges, get_pdf_loader_class
+from vector_database_loader.pipeline_utils import batched, estimate_tokens
+from vector_database_loader.tracing import get_tracer, log_error, log_progress, record_span, trace_span
+
 DEFAULT_CHUNK_SIZE = 512
+DEFAULT_CRAWL_BATCH_SIZE = 10
+# URLs fetched per group when streaming a website over HTTP, large enough to keep the fetch workers busy
+DEFAULT_HTTP_CRAWL_BATCH_SIZE = 100
+# Parse tasks submitted to the process pool per worker, so results stream back without queueing the whole folder
+PARSE_TASKS_IN_FLIGHT_PER_WORKER = 2
+# Content source types read from a local folder
+FOLDER_SOURCE_TYPES = ['Microsoft Word', 'PDF']
 
 
 def print_progress(task_name, current, total, item_name):
@@ -31,6 +56,9 @@ def print_progress(task_name, current, total, item_name):
     :param total: Total count of items to process.
     :param item_name: Name of the item being processed.
     """
+    if get_tracer().quiet:
+        return
+
     progress_message = f"{task_name}: Processing {current} of {total} - {item_name}"
     sys.stdout.write('\r' + Fore.BLUE + progress_message + Style.RESET_ALL)
     sys.stdout.flush()
@@ -50,6 +78,16 @@ def extract_filename_url(content_source, filename):
     return None
 
 
+def get_documents_bytes(docs):
+    """
+    Gets the size of documents' text.
+
+    :param docs: List of documents.
+    :return: The size in bytes.
+    """
+    return sum(len(doc.page_content.encode('utf-8')) for doc in docs)
+
+
 def cleanup_documents(docs):
     """
     Cleans up document content by removing excessive newlines, spaces, and tabs.
@@ -61,11 +99,13 @@ def cleanup_documents(docs):
     space_regex = re.compile(r' {2,}')
     tab_regex = re.compile(r'\t+')
 
-    for doc in docs:
-        cleaned_content = newline_regex.sub('\n', doc.page_content)
-        cleaned_content = space_regex.sub(' ', cleaned_content)
-        cleaned_content = tab_regex.sub(' ', cleaned_content)
-        doc.page_content = cleaned_content
+    with trace_span("cleanup") as span:
+        for doc in docs:
+            cleaned_content = newline_regex.sub('\n', doc.page_content)
+            cleaned_content = space_regex.sub(' ', cleaned_content)
+            cleaned_content = tab_regex.sub(' ', cleaned_content)
+            doc.page_content = cleaned_content
+        span.add(items=len(docs), bytes=get_documents_bytes(docs))
 
     return docs
 
@@ -89,8 +129,11 @@ def document_chunker(documents, chunk_size):
         chunk_overlap=round(chunk_size * 0.15),
         length_function=len,
     )
-    docs_chunks = text_splitter.split_documents(documents)
-    print(f"Chunked {len(documents)} documents into {len(docs_chunks)} chunks. Size={chunk_size}")
+    with trace_span("chunk", chunk_size=chunk_size) as span:
+        docs_chunks = text_splitter.split_documents(documents)
+        span.add(items=len(docs_chunks), bytes=get_documents_bytes(docs_chunks),
+                 tokens=sum(estimate_tokens(doc.page_content) for doc in docs_chunks))
+    log_progress(f"Chunked {len(documents)} documents into {len(docs_chunks)} chunks. Size={chunk_size}")
 
     # Now extend metadata to make all sources consistent: we need source, title, language, description
     for doc in docs_chunks:
@@ -109,6 +152,19 @@ def document_chunker(documents, chunk_size):
     return docs_chunks
 
 
+def chunk_source_documents(documents, content_source):
+    """
+    Chunks documents according to a content source's chunk_size. A chunk_size of 0 returns the documents unchanged.
+
+    :param documents: List of documents to be chunked.
+    :param content_source: Dictionary defining the content source, optionally with a chunk_size.
+    :return: List of chunked documents.
+    """
+    if content_source.get('chunk_size') == 0:
+        return documents
+    return document_chunker(documents, content_source.get('chunk_size', None))
+
+
 def blacklist_url_filter(urls, blacklist):
     """
     Filters URLs based on a blacklist of exact and wildcard patterns.
@@ -220,8 +276,10 @@ def get_sitemap_urls(sitemap_url):
         'User-Agent': 'Mozilla/5.0',
         'Accept': 'application/xml;q=0.9, */*;q=0.8'
     }
-    sitemap_response = requests.get(sitemap_url, headers=headers, timeout=60)
-    sitemap_response.raise_for_status()
+    with trace_span("crawl", url=sitemap_url) as span:
+        sitemap_response = requests.get(sitemap_url, headers=headers, timeout=60)
+        sitemap_response.raise_for_status()
+        span.add(items=1, bytes=len(sitemap_response.content))
     root = ET.fromstring(sitemap_response.content)
     urls = []
 
@@ -237,73 +295,96 @@ def get_sitemap_urls(sitemap_url):
     return urls
 
 
-def get_folder_documents(content_source):
+def website_crawler(url_list, headless=True, browser_pool=None):
     """
-    Loads documents from a specified folder based on the content type.
-    NOTE: If the documents are PDF's, a single PDF may be logged as multiple documents if it has multiple pages.
+    Crawls the given list of URLs using Selenium and loads their content.
 
-    :param content_source: Dictionary specifying the folder location, document type, and processing options.
-    :return: List of document chunks ready for processing.
+    Args:
+        url_list (list): A list of URLs to crawl.
+        headless (bool, optional): Whether to run the Selenium browser in headless mode. Defaults to True.
+        browser_pool (BrowserPool, optional): A pool of browsers crawling the URLs in parallel. Without one, the URLs
+            are crawled one after another in a single browser.
+
+    Returns:
+        list: A list of loaded documents retrieved from the crawled URLs.
     """
-    search_expression = None
-    recursive = True
+    with trace_span("crawl", urls=len(url_list)) as span:
+        if browser_pool is not None:
+            docs = browser_pool.crawl(url_list)
+        else:
+            crawler = SeleniumURLLoader(urls=url_list, headless=headless, arguments=DEFAULT_BROWSER_ARGUMENTS)
+            docs = crawler.load()
+        span.add(items=len(docs), bytes=get_documents_bytes(docs))
 
-    directory = content_source['location']
-    if content_source['type'] == 'Microsoft Word':
-        search_expression = "*.docx"
-        loader_class = Docx2txtLoader
-    elif content_source['type'] == 'PDF':
-        search_expression = "*.pdf"
-        loader_class = PyPDFLoader
-    else:
-        raise ValueError(f"ERROR: Cannot handle loading documents of type {content_source['type']}")
+    ready_to_use_docs = []
 
-    if 'recursive' in content_source:
-        recursive = content_source['recursive']
+    for doc in docs:
+        ready_to_use_docs.append(doc)
+    return ready_to_use_docs
 
-    print(f"Reading {content_source['type']} documents from {content_source['location']}")
-    loader = DirectoryLoader(path=directory, glob=search_expression, loader_cls=loader_class, recursive=recursive)
-    folder_docs = cleanup_documents(loader.load())
 
-    print(f"Documents loaded. Count={len(folder_docs)}")
+def get_http_crawler(content_source):
+    """
+    Creates the HttpCrawler of a website content source with 'http_fetch' set.
 
-    filtered_docs = folder_docs
-    if 'whitelist' in content_source:
-        filtered_docs = url_whitelist(filtered_docs, content_source['whitelist'])
-    if 'blacklist' in content_source:
-        filtered_docs = blacklist_url_filter(filtered_docs, content_source['blacklist'])
+    :param content_source: Dictionary defining the website source and fetch options.
+    :return: The HttpCrawler, or None when the source is crawled with Selenium only.
+    """
+    if not content_source.get('http_fetch'):
+        return None
+    return HttpCrawler(max_workers=content_source.get('fetch_workers', DEFAULT_FETCH_WORKERS),
+                       max_per_host=content_source.get('fetch_per_host', DEFAULT_FETCH_PER_HOST),
+                       timeout=content_source.get('fetch_timeout', DEFAULT_FETCH_TIMEOUT),
+                       extractor=content_source.get('html_extractor', DEFAULT_HTML_EXTRACTOR))
 
-    print(f"Found {len(folder_docs)} documents. Reduced to {len(filtered_docs)}.")
 
-    for doc in filtered_docs:
-        print(f"   {doc.metadata['source']}")
+def get_browser_pool(content_source, headless=True, default_workers=None):
+    """
+    Creates the BrowserPool of a website content source with 'browser_workers' set.
 
-    return document_chunker(filtered_docs, content_source.get('chunk_size', None))
+    :param content_source: Dictionary defining the website source and crawl options.
+    :param headless: Boolean indicating whether to run the browsers in headless mode.
+    :param default_workers: Optional number of browsers to use when the source does not set 'browser_workers'.
+    :return: The BrowserPool, or None when pages are crawled in a single browser.
+    """
+    workers = content_source.get('browser_workers', default_workers)
+    if not workers:
+        return None
+    return BrowserPool(workers=workers, headless=headless,
+                       page_timeout=content_source.get('page_timeout', DEFAULT_PAGE_TIMEOUT),
+                       extractor=content_source.get('html_extractor', DEFAULT_HTML_EXTRACTOR))
 
 
-def website_crawler(url_list, headless=True):
+def crawl_website_urls(url_list, content_source, headless=True, http_crawler=None, browser_pool=None):
     """
-    Crawls the given list of URLs using Selenium and loads their content.
+    Crawls a website's URLs. With an HttpCrawler, pages are fetched concurrently over HTTP, and Selenium is only used
+    for URLs matching the source's 'js_patterns' and for pages that could not be extracted statically.
 
-    Args:
-        url_list (list): A list of URLs to crawl.
-        headless (bool, optional): Whether to run the Selenium browser in headless mode. Defaults to True.
-
-    Returns:
-        list: A list of loaded documents retrieved from the crawled URLs.
+    :param url_list: The URLs to crawl.
+    :param content_source: Dictionary defining the website source and fetch options.
+    :param headless: Boolean indicating whether to run the browser in headless mode.
+    :param http_crawler: Optional HttpCrawler, see get_http_crawler. Without one, every URL is crawled with Selenium.
+    :param browser_pool: Optional BrowserPool the Selenium crawling is spread across, see get_browser_pool.
+    :return: A list of page documents, in URL order.
     """
-    crawler = SeleniumURLLoader(urls=url_list, headless=headless,
-                               arguments=["enable-features=NetworkServiceInProcess"])
-    docs = crawler.load()
+    if http_crawler is None:
+        return website_crawler(url_list, headless, browser_pool)
 
-    ready_to_use_docs = []
+    js_patterns = content_source.get('js_patterns', [])
+    static_urls = blacklist_url_filter(url_list, js_patterns)
+    docs, browser_urls = http_crawler.crawl(static_urls)
 
-    for doc in docs:
-        ready_to_use_docs.append(doc)
-    return ready_to_use_docs
+    static_url_set = set(static_urls)
+    browser_urls = [url for url in url_list if url not in static_url_set] + browser_urls
+    if browser_urls:
+        log_progress(f"Crawling {len(browser_urls)} of {len(url_list)} URLs with the browser")
+        docs = docs + website_crawler(browser_urls, headless, browser_pool)
 
+    url_positions = {url: position for position, url in enumerate(url_list)}
+    return sorted(docs, key=lambda doc: url_positions.get(doc.metadata.get('source'), len(url_list)))
 
-def get_folder_documents(content_source):
+
+def get_folder_documents(content_source, file_manifest=None):
     """
     Loads and processes documents from a specified directory based on the content type and filtering criteria.
 
@@ -312,9 +393,17 @@ def get_folder_documents(content_source):
             - 'location' (str): The directory path where documents are stored.
             - 'type' (str): The type of documents ('Microsoft Word' or 'PDF').
             - 'recursive' (bool, optional): Whether to search recursively. Defaults to True.
-            - 'whitelist' (list, optional): A list of allowed URLs or document sources.
-            - 'blacklist' (list, optional): A list of disallowed URLs or document sources.
+            - 'whitelist' (list, optional): A list of allowed file paths, exact or with wildcards.
+            - 'blacklist' (list, optional): A list of disallowed file paths, exact or with wildcards.
             - 'chunk_size' (int, optional): The size of document chunks to return. If 0, returns full documents.
+            - 'parse_workers' (int, optional): The number of processes parsing files in parallel. Defaults to 1.
+              Workers are started with the "spawn" method, which imports the calling script again, so scripts using
+              it must guard their entry point with if __name__ == "__main__":.
+            - 'pdf_backend' (str, optional): The PDF text backend, 'pypdf' or 'pypdfium2'. Defaults to PyPDFLoader.
+            - 'pdf_shard_pages' (int, optional): With parse_workers, PDFs with more pages are split into page ranges
+              of this size, parsed by separate workers.
+        file_manifest (FileManifest, optional): When given, files unchanged since the manifest was last committed
+            are skipped before parsing, so only new or modified files are returned.
 
     Returns:
         list: A list of processed and optionally chunked documents.
@@ -322,50 +411,225 @@ def get_folder_documents(content_source):
     Raises:
         ValueError: If the document type is not supported.
     """
-    search_expression = None
-    recursive = True
+    _, loader_class = get_folder_loader_config(content_source)
 
-    directory = content_source['location']
-    if content_source['type'] == 'Microsoft Word':
-        search_expression = "*.docx"
-        loader_class = Docx2txtLoader
+    log_progress(f"Reading {content_source['type']} documents from {content_source['location']}")
+    # The whitelist and blacklist are applied to the file paths, see get_folder_file_paths
+    file_paths = get_folder_files_to_parse(content_source, file_manifest)
+    loaded_docs = [doc for _, file_docs in iter_parsed_folder_files(loader_class, file_paths,
+                                                                    content_source.get('parse_workers', 1),
+                                                                    content_source.get('pdf_shard_pages'))
+                   for doc in file_docs]
+    folder_docs = cleanup_documents(loaded_docs)
+
+    log_progress(f"Documents loaded. Count={len(folder_docs)}")
+    for doc in folder_docs:
+        log_progress(f"   {doc.metadata['source']}")
 
+    if 'chunk_size' in content_source and content_source['chunk_size'] == 0:
+        return folder_docs
+    else:
+        doc_chunks = document_chunker(folder_docs,
+                                      content_source['chunk_size'] if 'chunk_size' in content_source else None)
+        return doc_chunks
+
+
+def get_folder_loader_config(content_source):
+    """
+    Gets the file search expression and LangChain loader class for a folder content source. PDF sources with a
+    'pdf_backend' or 'pdf_shard_pages' option get a page range loader of that backend, see pdf_loaders.
+
+    :param content_source: Dictionary specifying the folder document type.
+    :return: Tuple of (search expression, loader class).
+    """
+    if content_source['type'] == 'Microsoft Word':
+        return "*.docx", Docx2txtLoader
     elif content_source['type'] == 'PDF':
         # NOTE: The PDF parser will break the document up into pages, so one doc could translate into many
-        search_expression = "*.pdf"
-        loader_class = PyPDFLoader
-
+        if 'pdf_backend' in content_source or content_source.get('pdf_shard_pages'):
+            return "*.pdf", get_pdf_loader_class(content_source.get('pdf_backend', DEFAULT_PDF_BACKEND))
+        return "*.pdf", PyPDFLoader
     else:
-        raise (f"ERROR: Cannot handle loading documents of type {content_source['type']}")
+        raise ValueError(f"ERROR: Cannot handle loading documents of type {content_source['type']}")
+
 
-    if 'recursive' in content_source:
-        recursive = content_source['recursive']
+def get_folder_file_paths(content_source):
+    """
+    Lists the files of a folder content source, in a stable order. Hidden files and folders are skipped, and any
+    whitelist or blacklist is applied to the file paths.
 
-    print(f"Reading {content_source['type']} documents from {content_source['location']}")
-    loader = DirectoryLoader(path=directory, glob=search_expression, loader_cls=loader_class, recursive=recursive)
-    folder_docs = cleanup_documents(loader.load())
+    :param content_source: Dictionary specifying the folder location, document type, and filtering options.
+    :return: A sorted list of file paths.
+    """
+    search_expression, _ = get_folder_loader_config(content_source)
+    directory = Path(content_source['location'])
+    recursive = content_source.get('recursive', True)
 
-    print(f"Documents loaded. Count={len(folder_docs)}")
+    paths = directory.rglob(search_expression) if recursive else directory.glob(search_expression)
+    file_paths = sorted(
+        str(path) for path in paths
+        if path.is_file() and not any(part.startswith('.') for part in path.relative_to(directory).parts)
+    )
 
-    filtered_docs = folder_docs
     if 'whitelist' in content_source:
-        filtered_docs = url_whitelist(filtered_docs, content_source['whitelist'])
+        file_paths = url_whitelist(file_paths, content_source['whitelist'])
 
     if 'blacklist' in content_source:
-        filtered_docs = blacklist_url_filter(filtered_docs, content_source['blacklist'])
+        file_paths = blacklist_url_filter(file_paths, content_source['blacklist'])
 
-    print(
-        f"Found {len(folder_docs)} documents. Reduced to {len(filtered_docs)}.")
+    return file_paths
 
-    for doc in filtered_docs:
-        print(f"   {doc.metadata['source']}")
 
-    if 'chunk_size' in content_source and content_source['chunk_size'] == 0:
-        return filtered_docs
-    else:
-        doc_chunks = document_chunker(filtered_docs,
-                                      content_source['chunk_size'] if 'chunk_size' in content_source else None)
-        return doc_chunks
+def parse_folder_file(loader_class, file_path, page_range=None):
+    """
+    Parses one file of a folder content source, or one page range of a PDF. Runs in a worker process when parsing in
+    parallel.
+
+    :param loader_class: The LangChain loader class for the file type.
+    :param file_path: The path of the file.
+    :param page_range: Optional (start page, end page) tuple, for a PdfPageRangeLoader class.
+    :return: Tuple of (documents, parse time in seconds).
+    """
+    start_time = time.perf_counter()
+    loader = loader_class(file_path) if page_range is None else loader_class(file_path, *page_range)
+    file_docs = loader.load()
+    return file_docs, time.perf_counter() - start_time
+
+
+def get_file_page_ranges(loader_class, file_path, shard_pages):
+    """
+    Gets the page ranges a file is parsed in. Only PDFs loaded with a page range loader and longer than shard_pages
+    are split.
+
+    :param loader_class: The LangChain loader class for the file type.
+    :param file_path: The path of the file.
+    :param shard_pages: The maximum number of pages per range, or None to never split.
+    :return: A list of (start page, end page) tuples, or [None] to parse the whole file at once.
+    """
+    if not shard_pages or not hasattr(loader_class, "get_page_count"):
+        return [None]
+    total_pages = loader_class(file_path).get_page_count()
+    if total_pages <= shard_pages:
+        return [None]
+    return get_page_ranges(total_pages, shard_pages)
+
+
+def iter_parsed_folder_files(loader_class, file_paths, parse_workers=1, shard_pages=None):
+    """
+    Parses the files of a folder content source, one at a time or spread across a process pool. In parallel, files are
+    yielded in the order they finish parsing, and more files are only submitted while fewer than
+    PARSE_TASKS_IN_FLIGHT_PER_WORKER parse tasks per worker are in flight. With shard_pages, a PDF with more pages is
+    split into page ranges parsed by separate workers, and yielded with its pages in order once every range is parsed.
+    A file that fails to parse is reported and skipped, so one corrupt file does not stop the source.
+
+    :param loader_class: The LangChain loader class for the file type.
+    :param file_paths: The paths of the files to parse.
+    :param parse_workers: The number of worker processes. With 1, files are parsed in this process, in order.
+    :param shard_pages: Optional maximum number of pages per parse task, for a PdfPageRangeLoader class.
+    :return: A generator of (file path, documents) tuples.
+    """
+    if parse_workers <= 1:
+        for file_path in file_paths:
+            try:
+                with trace_span("parse", path=file_path) as span:
+                    file_docs = loader_class(file_path).load()
+                    span.add(items=len(file_docs), bytes=os.path.getsize(file_path))
+            except Exception as e:
+                log_error(f"ERROR: Skipping {file_path}, it could not be parsed: {e}")
+                continue
+            yield file_path, file_docs
+        return
+
+    # Spawned rather than forked workers, since forking a process with running threads can deadlock
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        file_path_iter = iter(file_paths)
+        pending = {}  # future -> (file path, page range)
+        file_results = {}  # file path -> page range -> (documents, parse time), or the exception it failed with
+        max_in_flight = parse_workers * PARSE_TASKS_IN_FLIGHT_PER_WORKER
+
+        def submit_files():
+            while len(pending) < max_in_flight:
+                file_path = next(file_path_iter, None)
+                if file_path is None:
+                    return
+                try:
+                    page_ranges = get_file_page_ranges(loader_class, file_path, shard_pages)
+                except Exception as e:
+                    log_error(f"ERROR: Skipping {file_path}, it could not be parsed: {e}")
+                    continue
+                file_results[file_path] = {}
+                for page_range in page_ranges:
+                    pending[executor.submit(parse_folder_file, loader_class, file_path, page_range)] = (file_path,
+                                                                                                     page_range)
+
+        submit_files()
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path, page_range = pending.pop(future)
+                    try:
+                        file_results[file_path][page_range] = future.result()
+                    except Exception as e:
+                        file_results[file_path][page_range] = e
+
+                    if any(task_file_path == file_path for task_file_path, _ in pending.values()):
+                        continue
+                    range_results = file_results.pop(file_path)
+                    errors = [result for result in range_results.values() if isinstance(result, Exception)]
+                    if errors:
+                        record_span("parse", 0.0, error=errors[0], path=file_path)
+                        log_error(f"ERROR: Skipping {file_path}, it could not be parsed: {errors[0]}")
+                        continue
+                    file_docs = [doc for page_range in sorted(range_results, key=lambda r: r or (0, 0))
+                                 for doc in range_results[page_range][0]]
+                    record_span("parse", sum(duration for _, duration in range_results.values()), items=len(file_docs),
+                                bytes=os.path.getsize(file_path), path=file_path, shards=len(range_results))
+                    yield file_path, file_docs
+                submit_files()
+        finally:
+            # When the caller stops early, drop the tasks not started yet instead of parsing them for nothing
+            for future in pending:
+                future.cancel()
+
+
+def get_folder_files_to_parse(content_source, file_manifest=None):
+    """
+    Lists the files of a folder content source that need parsing: all of them, or with a file manifest, only the new
+    or modified ones. The whitelist and blacklist are applied to the paths before the manifest is checked, so only
+    files the source includes are staged, and their parsed documents need no further filtering.
+
+    :param content_source: Dictionary specifying the folder location, document type, and filtering options.
+    :param file_manifest: Optional FileManifest, the state of the source's files is staged in it.
+    :return: A list of file paths.
+    """
+    file_paths = get_folder_file_paths(content_source)
+    if file_manifest is None:
+        return file_paths
+
+    changed_paths = file_manifest.get_changed_files(content_source['name'], file_paths)
+    log_progress(f"Skipping {len(file_paths) - len(changed_paths)} unchanged files of {content_source['name']}")
+    return changed_paths
+
+
+def iter_folder_documents(content_source, file_manifest=None):
+    """
+    Streams document chunks from a folder one file at a time, so only a single file's content is held in memory.
+    With 'parse_workers' above 1, files are parsed in a process pool and streamed in the order they finish parsing.
+
+    :param content_source: Dictionary specifying the folder location, document type, and processing options.
+    :param file_manifest: Optional FileManifest, files unchanged since it was last committed are skipped.
+    :return: A generator of document chunks.
+    """
+    _, loader_class = get_folder_loader_config(content_source)
+    file_paths = get_folder_files_to_parse(content_source, file_manifest)
+    log_progress(f"Streaming {len(file_paths)} {content_source['type']} documents from {content_source['location']}")
+
+    for file_path, file_docs in iter_parsed_folder_files(loader_class, file_paths, content_source.get('parse_workers', 1),
+                                                         content_source.get('pdf_shard_pages')):
+        log_progress(f"   {file_path}")
+        file_docs = cleanup_documents(file_docs)
+        yield from chunk_source_documents(file_docs, content_source)
 
 
 def download_pdf(url, filename):
@@ -376,31 +640,61 @@ def download_pdf(url, filename):
     :param filename: The destination filename to save the PDF.
     """
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        with open(filename, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        print(f"File downloaded to {filename}")
+        with trace_span("crawl", url=url) as span:
+            response = requests.get(url, stream=True)
+            response.raise_for_status()
+            with open(filename, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+                    span.add(bytes=len(chunk))
+            span.add(items=1)
+        log_progress(f"File downloaded to {filename}")
     except requests.exceptions.RequestException as e:
-        print(f"ERROR: downloading: {e}")
+        log_error(f"ERROR: downloading: {e}")
 
 
 def get_website_documents(content_source, headless=True):
     """
-    Extracts documents from a website based on the content source configuration.
+    Extracts documents from a website based on the content source configuration. With 'http_fetch' set, pages are
+    fetched concurrently over HTTP and Selenium is only a fallback, see crawl_website_urls. The 'fetch_workers',
+    'fetch_per_host', 'fetch_timeout' and 'html_extractor' options tune the HTTP fetching. With 'browser_workers'
+    set, Selenium crawling is spread across a pool of that many browsers, with a 'page_timeout' per page.
 
     :param content_source: Dictionary defining the website source and filtering criteria.
     :param headless: Boolean indicating whether to run the browser in headless mode.
     :return: List of processed website documents.
     """
+    filtered_urls = get_website_urls(content_source)
+    http_crawler = get_http_crawler(content_source)
+    browser_pool = get_browser_pool(content_source, headless)
+    try:
+        website_documents = cleanup_documents(crawl_website_urls(filtered_urls, content_source, headless, http_crawler,
+                                                                 browser_pool))
+    finally:
+        close_crawlers(http_crawler, browser_pool)
+
+    if 'chunk_size' in content_source and content_source['chunk_size'] == 0:
+        return website_documents
+    else:
+        webpage_chunks = document_chunker(website_documents,
+                                          content_source['chunk_size'] if 'chunk_size' in content_source else None)
+        return webpage_chunks
+
+
+def get_website_urls(content_source):
+    """
+    Resolves the list of URLs to crawl for a website content source, either from its site map or its items.
+
+    :param content_source: Dictionary defining the website source and filtering criteria.
+    :return: List of filtered URLs.
+    """
     if content_source['type'] != 'Website':
-        raise (f"ERROR: Cannot handle loading documents of type {content_source['type']}")
+        raise ValueError(f"ERROR: Cannot handle loading documents of type {content_source['type']}")
 
     site_urls = None
     filtered_urls = None
     if 'location' in content_source:
-        print(f"Scraping URLs from site map {content_source['location']}")
+        log_progress(f"Scraping URLs from site map {content_source['location']}")
         site_urls = get_sitemap_urls(content_source['location'])
 
         filtered_urls = site_urls
@@ -413,20 +707,61 @@ def get_website_documents(content_source, headless=True):
     else:
         site_urls = filtered_urls = content_source['items']
 
-    print(
+    log_progress(
         f"Found {len(site_urls)} URLs. Reduced to {len(filtered_urls)}.")
 
     for url in filtered_urls:
-        print(f"   {url}")
+        log_progress(f"   {url}")
 
-    website_documents = cleanup_documents(website_crawler(filtered_urls, headless))
+    return filtered_urls
 
-    if 'chunk_size' in content_source and content_source['chunk_size'] == 0:
-        return website_documents
-    else:
-        webpage_chunks = document_chunker(website_documents,
-                                          content_source['chunk_size'] if 'chunk_size' in content_source else None)
-        return webpage_chunks
+
+def iter_website_documents(content_source, headless=True):
+    """
+    Streams documents from a website, crawling the URLs in small groups so chunks are available
+    as soon as the first pages are loaded.
+
+    :param content_source: Dictionary defining the website source and filtering criteria.
+      crawl_batch_size (optional) sets how many URLs are crawled per group, 10 by default or 100 with http_fetch.
+      Without http_fetch, pages are not grouped but chunked as each one finishes loading.
+    :param headless: Boolean indicating whether to run the browser in headless mode.
+    :return: A generator of processed website document chunks.
+    """
+    filtered_urls = get_website_urls(content_source)
+    http_crawler = get_http_crawler(content_source)
+    # Without browser_workers, one browser is reused for the whole stream rather than started for every group
+    browser_pool = get_browser_pool(content_source, headless, default_workers=1)
+    crawl_batch_size = content_source.get('crawl_batch_size', DEFAULT_CRAWL_BATCH_SIZE if http_crawler is None
+                                          else DEFAULT_HTTP_CRAWL_BATCH_SIZE)
+
+    try:
+        if http_crawler is None and browser_pool is not None:
+            # Every page is crawled in the pool, so each one is chunked as soon as its browser has loaded it
+            with trace_span("crawl", urls=len(filtered_urls)) as span:
+                for doc in browser_pool.iter_crawl(filtered_urls):
+                    span.add(items=1, bytes=len(doc.page_content.encode('utf-8')))
+                    yield from chunk_source_documents(cleanup_documents([doc]), content_source)
+            return
+
+        for url_batch in batched(filtered_urls, crawl_batch_size):
+            website_documents = cleanup_documents(crawl_website_urls(url_batch, content_source, headless,
+                                                                     http_crawler, browser_pool))
+            yield from chunk_source_documents(website_documents, content_source)
+    finally:
+        close_crawlers(http_crawler, browser_pool)
+
+
+def close_crawlers(http_crawler=None, browser_pool=None):
+    """
+    Closes the HTTP session and browsers of a website crawl.
+
+    :param http_crawler: Optional HttpCrawler.
+    :param browser_pool: Optional BrowserPool.
+    """
+    if http_crawler is not None:
+        http_crawler.close()
+    if browser_pool is not None:
+        browser_pool.close()
 
 
 def get_website_pdfs(content_source, delete_existing_files=True):
@@ -437,9 +772,40 @@ def get_website_pdfs(content_source, delete_existing_files=True):
     :param delete_existing_files: Boolean indicating whether to clear existing files before download.
     :return: List of processed PDF documents.
     """
+    content_source_alt = download_website_pdfs(content_source, delete_existing_files)
+    docs = get_folder_documents(content_source_alt)
+
+    new_doc_array = []
+    for doc in docs:
+        new_doc_array.append(set_website_pdf_source(content_source, doc))
+
+    return new_doc_array
+
+
+def iter_website_pdfs(content_source, delete_existing_files=True):
+    """
+    Downloads PDFs from a website and streams their document chunks one file at a time.
+
+    :param content_source: Dictionary specifying the website source and PDF location.
+    :param delete_existing_files: Boolean indicating whether to clear existing files before download.
+    :return: A generator of processed PDF document chunks.
+    """
+    content_source_alt = download_website_pdfs(content_source, delete_existing_files)
+    for doc in iter_folder_documents(content_source_alt):
+        yield set_website_pdf_source(content_source, doc)
+
+
+def download_website_pdfs(content_source, delete_existing_files=True):
+    """
+    Downloads the PDFs listed in a Web PDFs content source into its location folder.
+
+    :param content_source: Dictionary specifying the website source and PDF location.
+    :param delete_existing_files: Boolean indicating whether to clear existing files before download.
+    :return: A PDF folder content source describing the downloaded files.
+    """
     if delete_existing_files:
         folder = content_source['location']
-        print(f"Cleaning (deleting files from) folder {folder}")
+        log_progress(f"Cleaning (deleting files from) folder {folder}")
         for the_file in os.listdir(folder):
             file_path = os.path.join(folder, the_file)
             try:
@@ -449,7 +815,7 @@ def get_website_pdfs(content_source, delete_existing_files=True):
                     while os.path.exists(file_path):
                         time.sleep(0.1)
             except Exception as e:
-                print(f"Error deleting file {file_path}")
+                log_error(f"Error deleting file {file_path}")
 
     for item in content_source['items']:
         download_pdf(item['url'], f"{content_source['location']}/{item['filename']}")
@@ -460,20 +826,29 @@ def get_website_pdfs(content_source, delete_existing_files=True):
         "location": content_source['location'],
         "chunk_size": 512
     }
-    docs = get_folder_documents(content_source_alt)
+    # Parsing options apply to the downloaded files
+    for option in ['parse_workers', 'pdf_backend', 'pdf_shard_pages']:
+        if option in content_source:
+            content_source_alt[option] = content_source[option]
+    return content_source_alt
 
-    new_doc_array = []
-    for doc in docs:
-        filename = doc.metadata['source'].split('/')[-1]
-        new_source = extract_filename_url(content_source, filename)
-        if new_source:
-            doc.metadata['source'] = new_source
-            doc.metadata['filename'] = filename
-        else:
-            print(f"Unable to find source URL for {filename}")
-        new_doc_array.append(doc)
 
-    return new_doc_array
+def set_website_pdf_source(content_source, doc):
+    """
+    Replaces the local file path in a downloaded PDF document's source with the URL it was downloaded from.
+
+    :param content_source: Dictionary specifying the website source and PDF items.
+    :param doc: A document loaded from a downloaded PDF.
+    :return: The updated document.
+    """
+    filename = doc.metadata['source'].split('/')[-1]
+    new_source = extract_filename_url(content_source, filename)
+    if new_source:
+        doc.metadata['source'] = new_source
+        doc.metadata['filename'] = filename
+    else:
+        log_error(f"Unable to find source URL for {filename}")
+    return doc
 
 
 def get_google_drive_documents(content_source):
@@ -485,6 +860,32 @@ def get_google_drive_documents(content_source):
       location in the content source should be the folder ID.
     :return: List of processed Google Drive documents.
     """
+    return list(iter_google_drive_documents(content_source))
+
+
+def execute_drive_download(request, file_name):
+    """
+    Downloads a Google Drive file, recording the download as a crawl span.
+
+    :param request: The Google Drive API media request.
+    :param file_name: The name of the file.
+    :return: The file content as bytes.
+    """
+    with trace_span("crawl", path=file_name) as span:
+        file_content = request.execute()
+        span.add(items=1, bytes=len(file_content or b""))
+    return file_content
+
+
+def iter_google_drive_documents(content_source):
+    """
+    Streams processed documents from Google Drive one file at a time.
+    You will need to configure the GOOGLE_SERVICE_ACCOUNT_FILE environment variable with the path to your service account file.
+
+    :param content_source: Dictionary defining the Google Drive source and filtering criteria.
+      location in the content source should be the folder ID.
+    :return: A generator of processed Google Drive documents.
+    """
     blacklist = content_source.get('blacklist', [])
     whitelist = content_source.get('whitelist', [])
 
@@ -494,7 +895,7 @@ def get_google_drive_documents(content_source):
     folder_id = content_source.get('location')
     if not folder_id:
         raise ValueError("ERROR: Google Drive folder ID not provided.")
-    print(f"Reading Google Drive documents from folder ID {folder_id}")
+    log_progress(f"Reading Google Drive documents from folder ID {folder_id}")
 
     # 1. Service Account Setup (Same as before):
     service_account_file = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
@@ -509,10 +910,9 @@ def get_google_drive_documents(content_source):
         pageSize=1000,  # Increased page size to avoid pagination issues
         fields="nextPageToken, files(id, name, mimeType)").execute()
     files = results.get('files', [])
-    print(f"Found {len(files)} files in Google Drive folder")
+    log_progress(f"Found {len(files)} files in Google Drive folder")
 
     # 3. Load and Process Files with LangChain:
-    documents = []
     chunk_size = content_source.get('chunk_size', DEFAULT_CHUNK_SIZE)
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
@@ -531,22 +931,22 @@ def get_google_drive_documents(content_source):
 
         # If the item is in the blacklist, skip it
         if is_item_blacklisted(file_name, blacklist):
-            print(f"Skipping blacklisted file: {file_name}")
+            log_progress(f"Skipping blacklisted file: {file_name}")
             continue
 
         # Download file content based on MIME Type
         if mime_type == 'application/vnd.google-apps.document':  # Google Docs
             request = service.files().export_media(fileId=file_id, mimeType='text/plain')
-            file_content = request.execute()
+            file_content = execute_drive_download(request, file_name)
             file_content = file_content.decode('utf-8')  # Decode from bytes to str
         elif mime_type.startswith('text/'):  # Text files
             request = service.files().get_media(fileId=file_id)
-            file_content = request.execute()
+            file_content = execute_drive_download(request, file_name)
             file_content = file_content.decode('utf-8')
         elif mime_type == 'application/pdf':  # PDF files
             from langchain.document_loaders import PDFMinerLoader  # PDF Loader
             request = service.files().get_media(fileId=file_id)
-            file_content = request.execute()
+            file_content = execute_drive_download(request, file_name)
             with open(f"{file_name}.pdf", "wb") as f:  # Save to temporary file
                 f.write(file_content)
             loader = PDFMinerLoader(f"{file_name}.pdf")  # Load from the temp file
@@ -557,10 +957,10 @@ def get_google_drive_documents(content_source):
                 for i, chunk in enumerate(chunks):
                     metadata = {"source": file_name, "chunk": i}
                     langchain_doc = Document(page_content=chunk, metadata=metadata)
-                    documents.append(langchain_doc)
+                    yield langchain_doc
             continue  # Skip to next file
         else:
-            print(f"Unsupported MIME type: {mime_type} for file: {file_name}")
+            log_error(f"Unsupported MIME type: {mime_type} for file: {file_name}")
             continue
 
         if file_content:  # Handle cases where file_content might be None
@@ -568,6 +968,47 @@ def get_google_drive_documents(content_source):
             for i, chunk in enumerate(chunks):
                 metadata = {"source": file_name, "chunk": i}  # Add metadata
                 langchain_doc = Document(page_content=chunk, metadata=metadata)
-                documents.append(langchain_doc)
+                yield langchain_doc
 
-    return documents
\ No newline at end of file
+
+def get_source_documents(content_source, file_manifest=None):
+    """
+    Loads the document chunks of any supported content source.
+
+    :param content_source: Dictionary defining the content source.
+    :param file_manifest: Optional FileManifest, unchanged files of folder sources are skipped. Other source types
+      ignore it.
+    :return: List of document chunks.
+    """
+    if content_source['type'] == 'Website':
+        return get_website_documents(content_source)
+    elif content_source['type'] in FOLDER_SOURCE_TYPES:
+        return get_folder_documents(content_source, file_manifest)
+    elif content_source['type'] == 'Web PDFs':
+        return get_website_pdfs(content_source)
+    elif content_source['type'] == 'Google Drive':
+        return get_google_drive_documents(content_source)
+    else:
+        raise ValueError(f"ERROR: Cannot handle loading document type {content_source['type']}")
+
+
+def iter_source_documents(content_source, headless=True, file_manifest=None):
+    """
+    Streams the document chunks of any supported content source.
+
+    :param content_source: Dictionary defining the content source.
+    :param headless: Boolean indicating whether to run the browser in headless mode for website sources.
+    :param file_manifest: Optional FileManifest, unchanged files of folder sources are skipped. Other source types
+      ignore it.
+    :return: A generator of document chunks.
+    """
+    if content_source['type'] == 'Website':
+        return iter_website_documents(content_source, headless)
+    elif content_source['type'] in FOLDER_SOURCE_TYPES:
+        return iter_folder_documents(content_source, file_manifest)
+    elif content_source['type'] == 'Web PDFs':
+        return iter_website_pdfs(content_source)
+    elif content_source['type'] == 'Google Drive':
+        return iter_google_drive_documents(content_source)
+    else:
+        raise ValueError(f"ERROR: Cannot handle loading document type {content_source['type']}")
\ No newline at end of file
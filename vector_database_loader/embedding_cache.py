@@ -0,0 +1,384 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MAX_SIZE_BYTES = 1024 * 1024 * 1024  # 1 GB
+DEFAULT_QUERY_CACHE_ENTRIES = 10000
+# Keys per SQL statement, kept well below SQLite's host parameter limit
+SQL_BATCH_SIZE = 500
+
+
+def get_embedding_model_key(embedding_client):
+    """
+    Builds a string identifying an embedding model, so cached vectors are never shared between different models.
+
+    :param embedding_client: The LangChain embedding client.
+    :return: A string such as "OpenAIEmbeddings:text-embedding-ada-002".
+    """
+    if isinstance(embedding_client, CachedEmbeddings):
+        return embedding_client.model_key
+
+    # Wrappers such as RateLimitedEmbeddings are identified by the client they wrap
+    wrapped_client = getattr(embedding_client, 'embedding_client', None)
+    if isinstance(wrapped_client, Embeddings):
+        return get_embedding_model_key(wrapped_client)
+
+    key_parts = [type(embedding_client).__name__]
+    for attribute in ['model', 'model_name', 'model_id', 'deployment', 'dimensions', 'size']:
+        value = getattr(embedding_client, attribute, None)
+        if value is not None:
+            key_parts.append(f"{attribute}={value}")
+    return ":".join(key_parts)
+
+
+def get_text_hash(text):
+    """
+    Gets the SHA-256 hex digest of a text.
+
+    :param text: The text to hash.
+    :return: The hex digest.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def normalize_query(text):
+    """
+    Normalizes a query for use as a cache key: surrounding whitespace is stripped, runs of whitespace are collapsed
+    and case is folded, so trivially different spellings of a frequent question share one embedding.
+
+    :param text: The query text.
+    :return: The normalized text.
+    """
+    return " ".join(text.split()).casefold()
+
+
+class EmbeddingCache:
+    """
+    A persistent, content-addressed embedding cache stored in SQLite.
+    Vectors are keyed by embedding model identity plus a hash of the text, stored as float32, and the least recently
+    used entries are evicted once the cache grows past max_size_bytes.
+    """
+
+    def __init__(self, path, max_size_bytes=DEFAULT_MAX_SIZE_BYTES):
+        """
+        Initializes the EmbeddingCache, creating the SQLite database if needed.
+
+        :param path: The SQLite database file path. Use ":memory:" for a cache that only lives in this process.
+        :param max_size_bytes: The maximum total size of the cached vectors before eviction.
+        """
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.connection.commit()
+
+    @staticmethod
+    def get_key(model_key, text):
+        """
+        Gets the cache key for a text embedded with a given model.
+
+        :param model_key: The embedding model identity, see get_embedding_model_key.
+        :param text: The embedded text.
+        :return: The cache key.
+        """
+        return get_text_hash(f"{model_key}\0{text}")
+
+    def get_many(self, model_key, texts):
+        """
+        Looks up the cached vectors of several texts.
+
+        :param model_key: The embedding model identity.
+        :param texts: A list of texts.
+        :return: A list with the cached vector of each text, or None for a cache miss.
+        """
+        keys = [self.get_key(model_key, text) for text in texts]
+        found = {}
+        with self.lock:
+            for start_index in range(0, len(keys), SQL_BATCH_SIZE):
+                key_batch = keys[start_index:start_index + SQL_BATCH_SIZE]
+                placeholders = ",".join("?" * len(key_batch))
+                rows = self.connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", key_batch).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                self.connection.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                            [(now, key) for key in found])
+                self.connection.commit()
+
+        return [np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None for key in keys]
+
+    def put_many(self, model_key, texts, vectors):
+        """
+        Stores the vectors of several texts, then evicts old entries if the cache is over its size limit.
+
+        :param model_key: The embedding model identity.
+        :param texts: A list of texts.
+        :param vectors: The embedding vectors of the texts, in the same order.
+        """
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            vector_bytes = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((self.get_key(model_key, text), vector_bytes, len(vector_bytes), now))
+
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)", rows)
+            self.connection.commit()
+            self._evict()
+
+    def size_bytes(self):
+        """
+        Gets the total size of the cached vectors.
+
+        :return: The size in bytes.
+        """
+        with self.lock:
+            return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self.lock:
+            self.connection.execute("DELETE FROM embeddings")
+            self.connection.commit()
+
+    def close(self):
+        """
+        Closes the underlying SQLite connection.
+        """
+        with self.lock:
+            self.connection.close()
+
+    def _evict(self):
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        # Evict down to 90% of the limit, so we don't evict again on every following write
+        target_size = self.max_size_bytes * 0.9
+        evict_keys = []
+        for key, size in self.connection.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            if total_size <= target_size:
+                break
+            evict_keys.append((key,))
+            total_size -= size
+
+        self.connection.executemany("DELETE FROM embeddings WHERE key = ?", evict_keys)
+        self.connection.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    A LangChain embedding client that serves document embeddings from an EmbeddingCache, sending only cache misses
+    to the wrapped embedding client. Query embeddings are passed straight through.
+    """
+
+    def __init__(self, embedding_client, cache, model_key=None):
+        """
+        Initializes the CachedEmbeddings.
+
+        :param embedding_client: The LangChain embedding client to wrap.
+        :param cache: The EmbeddingCache to use.
+        :param model_key: The embedding model identity. Defaults to one derived from the embedding client.
+        """
+        self.embedding_client = embedding_client
+        self.cache = cache
+        self.model_key = model_key or get_embedding_model_key(embedding_client)
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        vectors, missing_texts = self._get_cached(texts)
+        if missing_texts:
+            missing_vectors = self.embedding_client.embed_documents(missing_texts)
+            self._fill_missing(texts, vectors, missing_texts, missing_vectors)
+        return vectors
+
+    async def aembed_documents(self, texts):
+        vectors, missing_texts = self._get_cached(texts)
+        if missing_texts:
+            missing_vectors = await self.embedding_client.aembed_documents(missing_texts)
+            self._fill_missing(texts, vectors, missing_texts, missing_vectors)
+        return vectors
+
+    def embed_query(self, text):
+        return self.embedding_client.embed_query(text)
+
+    async def aembed_query(self, text):
+        return await self.embedding_client.aembed_query(text)
+
+    def _get_cached(self, texts):
+        texts = list(texts)
+        vectors = self.cache.get_many(self.model_key, texts)
+        # De-duplicate the misses, so repeated chunks are only embedded once
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        self.hits += len(texts) - sum(vector is None for vector in vectors)
+        self.misses += len(missing_texts)
+        return vectors, missing_texts
+
+    def _fill_missing(self, texts, vectors, missing_texts, missing_vectors):
+        self.cache.put_many(self.model_key, missing_texts, missing_vectors)
+        missing = dict(zip(missing_texts, missing_vectors))
+        for index, text in enumerate(texts):
+            if vectors[index] is None:
+                vectors[index] = missing[text]
+
+
+class QueryEmbeddingCache:
+    """
+    An in-process LRU cache of query embeddings, with an optional time to live and an optional persistent
+    EmbeddingCache behind it, so frequent queries survive restarts. Entries are keyed by embedding model identity and
+    normalized query text. One instance can be shared by several query classes and threads.
+    """
+
+    def __init__(self, max_entries=DEFAULT_QUERY_CACHE_ENTRIES, ttl_seconds=None, persistent_cache=None,
+                 normalizer=normalize_query):
+        """
+        Initializes the QueryEmbeddingCache.
+
+        :param max_entries: The maximum number of query embeddings kept in memory.
+        :param ttl_seconds: Optional number of seconds an in-memory entry stays valid.
+        :param persistent_cache: Optional EmbeddingCache to read misses from and write new embeddings to.
+        :param normalizer: The function normalizing query texts into cache keys.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent_cache = persistent_cache
+        self.normalizer = normalizer
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # (model_key, normalized text) -> (vector, stored time)
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model_key, texts):
+        """
+        Looks up the cached embeddings of several queries, counting hits and misses.
+
+        :param model_key: The embedding model identity, see get_embedding_model_key.
+        :param texts: A list of query texts.
+        :return: A list with the cached vector of each query, or None for a cache miss.
+        """
+        keys = [(model_key, self.normalizer(text)) for text in texts]
+        now = time.monotonic()
+        vectors = []
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and self.ttl_seconds is not None and now - entry[1] > self.ttl_seconds:
+                    del self.entries[key]
+                    entry = None
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                vectors.append(entry[0] if entry is not None else None)
+
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing and self.persistent_cache is not None:
+            stored = self.persistent_cache.get_many(f"{model_key}:query", [keys[index][1] for index in missing])
+            with self.lock:
+                for index, vector in zip(missing, stored):
+                    if vector is not None:
+                        vectors[index] = vector
+                        self._set(keys[index], vector, now)
+
+        with self.lock:
+            self.misses += sum(vector is None for vector in vectors)
+            self.hits += sum(vector is not None for vector in vectors)
+        return vectors
+
+    def put_many(self, model_key, texts, vectors):
+        """
+        Stores the embeddings of several queries.
+
+        :param model_key: The embedding model identity.
+        :param texts: A list of query texts.
+        :param vectors: The embedding vectors of the queries, in the same order.
+        """
+        normalized_texts = [self.normalizer(text) for text in texts]
+        now = time.monotonic()
+        with self.lock:
+            for normalized_text, vector in zip(normalized_texts, vectors):
+                self._set((model_key, normalized_text), vector, now)
+        if self.persistent_cache is not None:
+            self.persistent_cache.put_many(f"{model_key}:query", normalized_texts, vectors)
+
+    def clear(self):
+        """
+        Removes every in-memory entry and resets the counters. The persistent cache is left as is.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _set(self, key, vector, now):
+        self.entries[key] = (vector, now)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    A LangChain embedding client for query classes, serving query embeddings from a QueryEmbeddingCache and sending
+    only cache misses to the wrapped embedding client. embed_documents, which query_many uses to embed queries in
+    batches, is cached the same way but under its own key, since models such as BGE or E5 embed queries and
+    documents differently and a batch vector must not be served to a later embed_query.
+    """
+
+    def __init__(self, embedding_client, cache, model_key=None):
+        """
+        Initializes the CachedQueryEmbeddings.
+
+        :param embedding_client: The LangChain embedding client to wrap.
+        :param cache: The QueryEmbeddingCache to use.
+        :param model_key: The embedding model identity. Defaults to one derived from the embedding client.
+        """
+        self.embedding_client = embedding_client
+        self.cache = cache
+        self.model_key = model_key or get_embedding_model_key(embedding_client)
+        self.batch_model_key = f"{self.model_key}:documents"
+
+    def embed_query(self, text):
+        vector = self.cache.get_many(self.model_key, [text])[0]
+        if vector is None:
+            vector = self.embedding_client.embed_query(text)
+            self.cache.put_many(self.model_key, [text], [vector])
+        return vector
+
+    async def aembed_query(self, text):
+        vector = self.cache.get_many(self.model_key, [text])[0]
+        if vector is None:
+            vector = await self.embedding_client.aembed_query(text)
+            self.cache.put_many(self.model_key, [text], [vector])
+        return vector
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = self.cache.get_many(self.batch_model_key, texts)
+        # Queries sharing a normalized form are embedded once
+        missing = {}
+        for text, vector in zip(texts, vectors):
+            if vector is None:
+                missing.setdefault(self.cache.normalizer(text), text)
+        if missing:
+            missing_texts = list(missing.values())
+            missing_vectors = self.embedding_client.embed_documents(missing_texts)
+            self.cache.put_many(self.batch_model_key, missing_texts, missing_vectors)
+            embedded = dict(zip(missing, missing_vectors))
+            vectors = [vector if vector is not None else embedded[self.cache.normalizer(text)]
+                       for text, vector in zip(texts, vectors)]
+        return vectors
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from vector_database_loader.pipeline_utils import (
+    estimate_tokens,
+    call_with_retries,
+    acall_with_retries,
+    DEFAULT_RETRY_BASE_DELAY,
+    DEFAULT_RETRY_MAX_DELAY
+)
+from vector_database_loader.tracing import log_error
+
+DEFAULT_EMBEDDING_MAX_RETRIES = 6
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket limiter, refilled continuously at a per minute rate.
+    Callers reserve what they need up front and wait for the bucket to catch up, so concurrent callers are served in
+    the order they arrived and the long term rate never exceeds the limit.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        """
+        Initializes the TokenBucket, starting full.
+
+        :param rate_per_minute: The number of tokens added per minute.
+        :param capacity: The maximum burst size. Defaults to rate_per_minute.
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Takes tokens from the bucket, letting it go into debt if needed.
+
+        :param amount: The number of tokens needed. Amounts above the capacity are capped to it.
+        :return: The number of seconds to wait before using the reservation.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def acquire(self, amount=1):
+        """
+        Blocks until the requested tokens are available.
+
+        :param amount: The number of tokens needed.
+        """
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, amount=1):
+        """
+        Waits, without blocking the event loop, until the requested tokens are available.
+
+        :param amount: The number of tokens needed.
+        """
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    A LangChain embedding client that schedules calls to the wrapped client within the provider's quota.
+    A token bucket per limit (requests per minute and tokens per minute) paces the calls, and throttled or transient
+    errors are retried with jittered exponential backoff. One instance can be shared by concurrent batches.
+    """
+
+    def __init__(self, embedding_client, requests_per_minute=None, tokens_per_minute=None,
+                 max_retries=DEFAULT_EMBEDDING_MAX_RETRIES, base_delay=DEFAULT_RETRY_BASE_DELAY,
+                 max_delay=DEFAULT_RETRY_MAX_DELAY):
+        """
+        Initializes the RateLimitedEmbeddings.
+
+        :param embedding_client: The LangChain embedding client to wrap.
+        :param requests_per_minute: The provider's request limit, or None for no limit.
+        :param tokens_per_minute: The provider's token limit, or None for no limit. Tokens are estimated from the text.
+        :param max_retries: The maximum number of retries of a throttled or failed call.
+        :param base_delay: The delay ceiling of the first retry, in seconds.
+        :param max_delay: The largest delay ceiling, in seconds.
+        """
+        self.embedding_client = embedding_client
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_count = 0
+        self.lock = threading.Lock()  # One instance is shared by concurrent batches, guards retry_count
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        return self._call(lambda: self.embedding_client.embed_documents(texts), texts)
+
+    def embed_query(self, text):
+        return self._call(lambda: self.embedding_client.embed_query(text), [text])
+
+    async def aembed_documents(self, texts):
+        texts = list(texts)
+        return await self._acall(lambda: self.embedding_client.aembed_documents(texts), texts)
+
+    async def aembed_query(self, text):
+        return await self._acall(lambda: self.embedding_client.aembed_query(text), [text])
+
+    def _call(self, function, texts):
+        token_count = sum(estimate_tokens(text) for text in texts)
+
+        def scheduled_call():
+            if self.request_bucket is not None:
+                self.request_bucket.acquire(1)
+            if self.token_bucket is not None:
+                self.token_bucket.acquire(token_count)
+            return function()
+
+        return call_with_retries(scheduled_call, self.max_retries, self.base_delay, self.max_delay,
+                                 on_retry=self._on_retry)
+
+    async def _acall(self, coroutine_function, texts):
+        token_count = sum(estimate_tokens(text) for text in texts)
+
+        async def scheduled_call():
+            if self.request_bucket is not None:
+                await self.request_bucket.aacquire(1)
+            if self.token_bucket is not None:
+                await self.token_bucket.aacquire(token_count)
+            return await coroutine_function()
+
+        return await acall_with_retries(scheduled_call, self.max_retries, self.base_delay, self.max_delay,
+                                        on_retry=self._on_retry)
+
+    def _on_retry(self, error, attempt, delay):
+        with self.lock:
+            self.retry_count += 1
+        log_error(f"   Embedding call failed, retry {attempt + 1} of {self.max_retries} in {delay:.1f}s. error={error}")
@@ -0,0 +1,153 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.documents import Document
+
+from vector_database_loader.tracing import log_error, trace_span
+
+DEFAULT_FETCH_WORKERS = 16
+DEFAULT_FETCH_PER_HOST = 4
+DEFAULT_FETCH_TIMEOUT = 30
+# "unstructured" extracts text like SeleniumURLLoader does, "bs4" is a faster plain BeautifulSoup extraction
+HTML_EXTRACTORS = ["unstructured", "bs4"]
+DEFAULT_HTML_EXTRACTOR = "unstructured"
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'
+}
+
+
+def get_html_metadata(url, soup):
+    """
+    Builds a web page document's metadata, with the same keys and defaults as SeleniumURLLoader.
+
+    :param url: The page URL.
+    :param soup: The parsed page, a BeautifulSoup object.
+    :return: A dictionary with the source, title, description and language.
+    """
+    metadata = {
+        "source": url,
+        "title": "No title found.",
+        "description": "No description found.",
+        "language": "No language found.",
+    }
+    if soup.title is not None and soup.title.string:
+        metadata["title"] = soup.title.string.strip()
+    description = soup.find("meta", attrs={"name": "description"})
+    if description is not None and description.get("content"):
+        metadata["description"] = description["content"]
+    html_tag = soup.find("html")
+    if html_tag is not None and html_tag.get("lang"):
+        metadata["language"] = html_tag["lang"]
+    return metadata
+
+
+def extract_html_document(url, html, extractor=DEFAULT_HTML_EXTRACTOR):
+    """
+    Extracts the text and metadata of a fetched web page.
+
+    :param url: The page URL.
+    :param html: The page HTML.
+    :param extractor: The text extractor, one of HTML_EXTRACTORS.
+    :return: The page document.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    metadata = get_html_metadata(url, soup)
+    if extractor == "unstructured":
+        from unstructured.partition.html import partition_html
+
+        text = "\n\n".join([str(element) for element in partition_html(text=html)])
+    elif extractor == "bs4":
+        for tag in soup(["script", "style", "noscript", "template"]):
+            tag.decompose()
+        body = soup.body or soup
+        text = "\n\n".join(line.strip() for line in body.get_text("\n").splitlines() if line.strip())
+    else:
+        raise ValueError(f"ERROR: Unknown HTML extractor {extractor}, expected one of {', '.join(HTML_EXTRACTORS)}")
+    return Document(page_content=text, metadata=metadata)
+
+
+class HttpCrawler:
+    """
+    Fetches web pages concurrently over one pooled requests.Session and extracts their text directly, without a
+    browser. At most max_per_host requests go to any one host at a time. Pages that cannot be fetched, are not HTML
+    or have no static text are returned as needing a browser, e.g. because they are rendered by JavaScript.
+    """
+
+    def __init__(self, max_workers=DEFAULT_FETCH_WORKERS, max_per_host=DEFAULT_FETCH_PER_HOST,
+                 timeout=DEFAULT_FETCH_TIMEOUT, extractor=DEFAULT_HTML_EXTRACTOR):
+        """
+        Initializes the HttpCrawler.
+
+        :param max_workers: The number of pages fetched at once.
+        :param max_per_host: The number of pages fetched at once from any one host.
+        :param timeout: The request timeout in seconds.
+        :param extractor: The text extractor, one of HTML_EXTRACTORS.
+        """
+        if extractor not in HTML_EXTRACTORS:
+            raise ValueError(f"ERROR: Unknown HTML extractor {extractor}, expected one of {', '.join(HTML_EXTRACTORS)}")
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.extractor = extractor
+        self.session = requests.Session()
+        self.session.headers.update(FETCH_HEADERS)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.host_limits = {}
+
+    def get_host_limit(self, url):
+        """
+        :param url: A page URL.
+        :return: The semaphore bounding the concurrent requests to the URL's host.
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self.host_limits[host]
+
+    def fetch(self, url):
+        """
+        Fetches a page and extracts its text.
+
+        :param url: The page URL.
+        :return: The page document, or None when the page needs a browser.
+        """
+        try:
+            with self.get_host_limit(url):
+                response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            if "html" not in response.headers.get("Content-Type", ""):
+                return None
+            doc = extract_html_document(url, response.text, self.extractor)
+        except Exception as e:
+            log_error(f"ERROR: Fetching {url} failed, it will be crawled with the browser: {e}")
+            return None
+        return doc if doc.page_content.strip() else None
+
+    def crawl(self, url_list):
+        """
+        Fetches pages concurrently.
+
+        :param url_list: The page URLs.
+        :return: Tuple of (list of page documents, in URL order, list of URLs that need a browser).
+        """
+        with trace_span("crawl", urls=len(url_list), fetcher="http") as span:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self.fetch, url_list))
+            docs = [doc for doc in results if doc is not None]
+            span.add(items=len(docs), bytes=sum(len(doc.page_content.encode('utf-8')) for doc in docs))
+
+        browser_urls = [url for url, doc in zip(url_list, results) if doc is None]
+        return docs, browser_urls
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,666 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from vector_database_loader.base_vector_db import (
+    BaseVectorLoader,
+    BaseVectorQuery
+)
+from vector_database_loader.tracing import log_progress
+
+DEFAULT_LOCAL_PATH = "vector_indexes"
+LOCAL_DTYPES = ["float32", "float16"]
+LOCAL_INDEX_TYPES = ["flat", "ivf", "hnsw"]
+CONFIG_FILE = "config.json"
+VECTORS_FILE = "vectors.bin"
+RECORDS_FILE = "records.sqlite"
+# The vector file grows by doubling, starting with room for this many rows
+INITIAL_CAPACITY = 1024
+# Rows scored per NumPy operation, bounding the memory used by a search or an index build
+SEARCH_CHUNK_ROWS = 65536
+# Below this many rows a brute force scan is as fast as an approximate index, so none is built
+MIN_INDEXED_ROWS = 4096
+# An approximate index is rebuilt once rows added or removed since it was built exceed this fraction of it,
+# until then rows added after the build are scanned exactly
+INDEX_REBUILD_FRACTION = 0.2
+DEFAULT_IVF_NPROBE = 8
+IVF_SAMPLE_PER_LIST = 64
+KMEANS_ITERATIONS = 10
+DEFAULT_HNSW_EF_SEARCH = 64
+HNSW_EF_CONSTRUCTION = 200
+HNSW_M = 16
+
+
+def get_squared_distances(vectors, query_vector, squared_norms):
+    """
+    Computes the squared L2 distances between the rows of a matrix and a query vector, as
+    |v|^2 - 2 v.q + |q|^2, so only one matrix-vector product is needed.
+
+    :param vectors: A 2D float32 array.
+    :param query_vector: A 1D float32 array.
+    :param squared_norms: The squared norms of the rows.
+    :return: A 1D float32 array of squared distances.
+    """
+    return squared_norms - 2.0 * (vectors @ query_vector) + float(query_vector @ query_vector)
+
+
+def get_nearest_centroids(vectors, centroids):
+    """
+    Assigns each row of a matrix to its nearest centroid.
+
+    :param vectors: A 2D float32 array.
+    :param centroids: A 2D float32 array of centroids.
+    :return: A 1D array with the index of the nearest centroid of each row.
+    """
+    centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    # Chunked, so the distance matrix stays small for large numbers of lists
+    chunk_rows = max(1, SEARCH_CHUNK_ROWS * 64 // len(centroids))
+    for start_index in range(0, len(vectors), chunk_rows):
+        chunk = vectors[start_index:start_index + chunk_rows]
+        distances = centroid_norms[None, :] - 2.0 * (chunk @ centroids.T)
+        assignments[start_index:start_index + chunk_rows] = np.argmin(distances, axis=1)
+    return assignments
+
+
+class LocalVectorStore(VectorStore):
+    """
+    A LangChain vector store kept in a local directory, with no service to run. Vectors are stored in a
+    memory-mapped float32 or float16 matrix, and ids, texts and metadata in a SQLite file alongside it.
+    Searches are exact NumPy brute force scans using L2 distance, or use an optional IVF or HNSW index that is built
+    in memory on the first search. Deleted and replaced rows are only flagged, and skipped by searches.
+    """
+
+    def __init__(self, path, embedding=None, dimension=None, dtype="float32", index_type=None, nlist=None,
+                 nprobe=DEFAULT_IVF_NPROBE, ef_search=DEFAULT_HNSW_EF_SEARCH):
+        """
+        Opens the vector store in a directory, creating it if it does not exist yet and a dimension is given.
+
+        :param path: The directory of the vector store.
+        :param embedding: The LangChain embedding client, needed to search by query text or add texts.
+        :param dimension: The vector dimension, only needed to create a new store.
+        :param dtype: The storage type of new stores, "float32" or "float16". float16 halves the size on disk and in
+          memory, at a small cost in precision. Searches always compute in float32.
+        :param index_type: "flat" for exact search, "ivf" for an inverted file index, or "hnsw" for an HNSW graph,
+          which needs the hnswlib package. Defaults to the index type the store was created with, or "flat".
+        :param nlist: The number of IVF lists. Defaults to the square root of the number of rows.
+        :param nprobe: The number of IVF lists searched per query. Higher is more accurate and slower.
+        :param ef_search: The HNSW candidate list size per query. Higher is more accurate and slower.
+        """
+        config_path = os.path.join(path, CONFIG_FILE)
+        if os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        elif dimension is None:
+            raise ValueError(f"ERROR: No local vector index found at {path}, and no dimension given to create one")
+        else:
+            config = {"dimension": dimension, "dtype": dtype, "index_type": index_type or "flat"}
+
+        if config["dtype"] not in LOCAL_DTYPES:
+            raise ValueError(f"ERROR: Unsupported dtype {config['dtype']}, expected one of {LOCAL_DTYPES}")
+        index_type = index_type or config["index_type"]
+        if index_type not in LOCAL_INDEX_TYPES:
+            raise ValueError(f"ERROR: Unsupported index_type {index_type}, expected one of {LOCAL_INDEX_TYPES}")
+
+        if not os.path.exists(config_path):
+            os.makedirs(path, exist_ok=True)
+            with open(config_path, 'w') as f:
+                json.dump(config, f)
+
+        self.path = path
+        self.embedding_function = embedding
+        self.dimension = config["dimension"]
+        self.dtype = np.dtype(config["dtype"])
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(os.path.join(path, RECORDS_FILE), check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE, text TEXT NOT NULL, metadata TEXT NOT NULL, "
+            "deleted INTEGER NOT NULL DEFAULT 0)")
+        self.connection.commit()
+
+        self.vectors = None
+        self.capacity = 0
+        self.count = 0
+        self.live = np.zeros(0, dtype=bool)
+        self.squared_norms = np.zeros(0, dtype=np.float32)
+        self.data_version = None
+        self.ann_index = None
+        self.changes_since_build = 0
+        self._refresh()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    def add_vectors(self, ids, texts, vectors, metadatas=None):
+        """
+        Adds precomputed vectors. A vector whose id is already stored replaces the stored one.
+
+        :param ids: A list of unique ids.
+        :param texts: The texts of the vectors.
+        :param vectors: The vectors, as a list of lists or a 2D array.
+        :param metadatas: Optional metadata dictionaries.
+        :return: The list of ids added.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"ERROR: Vectors of dimension {vectors.shape[1]} cannot be added to local index "
+                             f"{self.path} of dimension {self.dimension}")
+        if metadatas is None:
+            metadatas = [{} for _ in ids]
+
+        with self.lock:
+            self._refresh()
+            start_row = self.count
+            end_row = start_row + len(ids)
+            if end_row > self.capacity:
+                self._open_vectors(end_row)
+
+            # Vectors are flushed before their records are committed, so readers never see a row without its vector
+            self.vectors[start_row:end_row] = vectors.astype(self.dtype)
+            self.vectors.flush()
+            replaced_rows = self._delete_records(ids)
+            self.connection.executemany(
+                "INSERT INTO records (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [(start_row + offset, chunk_id, text, json.dumps(metadata, default=str))
+                 for offset, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas))])
+            self.connection.commit()
+
+            stored = self.vectors[start_row:end_row].astype(np.float32)
+            self.squared_norms = np.concatenate([self.squared_norms, np.einsum('ij,ij->i', stored, stored)])
+            self.live = np.concatenate([self.live, np.ones(len(ids), dtype=bool)])
+            self.live[replaced_rows] = False
+            self.count = end_row
+            self.changes_since_build += len(ids) + len(replaced_rows)
+        return list(ids)
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        vectors = self.embedding_function.embed_documents(texts)
+        return self.add_vectors(list(ids), texts, vectors, metadatas)
+
+    def delete(self, ids=None, **kwargs):
+        """
+        Deletes vectors by id.
+
+        :param ids: A list of ids to delete.
+        :return: True once deleted.
+        """
+        with self.lock:
+            self._refresh()
+            deleted_rows = self._delete_records(ids or [])
+            self.connection.commit()
+            self.live[deleted_rows] = False
+            self.changes_since_build += len(deleted_rows)
+        return True
+
+    def get_by_ids(self, ids):
+        with self.lock:
+            placeholders = ",".join("?" * len(ids))
+            rows = self.connection.execute(
+                f"SELECT row FROM records WHERE id IN ({placeholders})", list(ids)).fetchall()
+        return self._get_documents([row for row, in rows])
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k=k,
+                                                           filter=filter)
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None):
+        """
+        Finds the stored vectors nearest to a vector.
+
+        :param embedding: The query vector.
+        :param k: The number of results.
+        :param filter: Optional metadata filter, see search.
+        :return: A list of (Document, L2 distance) tuples, nearest first.
+        """
+        rows, distances = self.search(embedding, k, filter)
+        return list(zip(self._get_documents(rows), distances))
+
+    def search(self, embedding, k=4, filter=None):
+        """
+        Finds the rows of the stored vectors nearest to a vector.
+
+        :param embedding: The query vector.
+        :param k: The number of results.
+        :param filter: Optional metadata filter, a dictionary of metadata key to the value it must have, or to a list
+          of values it may have. Matching rows are selected in SQLite and searched exactly, without the ANN index.
+        :return: A tuple of the row numbers and their L2 distances, nearest first.
+        """
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        with self.lock:
+            self._refresh()
+            if filter is not None:
+                candidate_rows = self._get_filtered_rows(filter)
+            elif self.index_type != "flat" and self.count >= MIN_INDEXED_ROWS and self.live.any():
+                candidate_rows = self._get_ann_candidates(query_vector, k)
+            else:
+                candidate_rows = None
+            count, vectors, live, squared_norms = self.count, self.vectors, self.live, self.squared_norms
+
+        if count == 0:
+            return [], []
+
+        if candidate_rows is None:
+            distances = np.empty(count, dtype=np.float32)
+            for start_index in range(0, count, SEARCH_CHUNK_ROWS):
+                end_index = min(count, start_index + SEARCH_CHUNK_ROWS)
+                chunk = np.asarray(vectors[start_index:end_index], dtype=np.float32)
+                distances[start_index:end_index] = get_squared_distances(
+                    chunk, query_vector, squared_norms[start_index:end_index])
+            distances[~live[:count]] = np.inf
+            candidate_rows = np.arange(count)
+        else:
+            candidate_rows = candidate_rows[live[candidate_rows]]
+            distances = np.empty(len(candidate_rows), dtype=np.float32)
+            for start_index in range(0, len(candidate_rows), SEARCH_CHUNK_ROWS):
+                chunk_rows = candidate_rows[start_index:start_index + SEARCH_CHUNK_ROWS]
+                chunk = np.asarray(vectors[chunk_rows], dtype=np.float32)
+                distances[start_index:start_index + len(chunk_rows)] = get_squared_distances(
+                    chunk, query_vector, squared_norms[chunk_rows])
+
+        k = min(k, len(distances))
+        if k == 0:
+            return [], []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        nearest = nearest[np.isfinite(distances[nearest])]
+        return candidate_rows[nearest].tolist(), np.sqrt(np.maximum(distances[nearest], 0)).tolist()
+
+    def build_index(self):
+        """
+        Builds the store's IVF or HNSW index now, instead of on the first search.
+        """
+        with self.lock:
+            self._refresh()
+            if self.index_type == "ivf":
+                self._build_ivf_index()
+            elif self.index_type == "hnsw":
+                self._build_hnsw_index()
+
+    def describe(self):
+        """
+        Describes the vector store.
+
+        :return: A dictionary with the path, dimension, dtype, index type and number of stored vectors.
+        """
+        with self.lock:
+            self._refresh()
+            return {
+                "path": self.path,
+                "dimension": self.dimension,
+                "dtype": self.dtype.name,
+                "index_type": self.index_type,
+                "vector_count": int(np.count_nonzero(self.live)),
+            }
+
+    def close(self):
+        """
+        Closes the SQLite connection and the memory map.
+        """
+        with self.lock:
+            self.connection.close()
+            self.vectors = None
+            self.ann_index = None
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, path=None, **kwargs):
+        texts = list(texts)
+        vectors = embedding.embed_documents(texts)
+        store = cls(path or os.path.join(DEFAULT_LOCAL_PATH, str(uuid.uuid4())), embedding,
+                    dimension=len(vectors[0]), **kwargs)
+        store.add_vectors(list(ids) if ids else [str(uuid.uuid4()) for _ in texts], texts, vectors, metadatas)
+        return store
+
+    def _refresh(self):
+        # PRAGMA data_version changes when another connection commits, e.g. a loader in another process
+        data_version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+
+        self.data_version = data_version
+        self.count = self.connection.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM records").fetchone()[0]
+        self._open_vectors(self.count)
+        self.live = np.ones(self.count, dtype=bool)
+        deleted_rows = [row for row, in self.connection.execute("SELECT row FROM records WHERE deleted = 1")]
+        self.live[deleted_rows] = False
+        self.squared_norms = np.empty(self.count, dtype=np.float32)
+        for start_index in range(0, self.count, SEARCH_CHUNK_ROWS):
+            end_index = min(self.count, start_index + SEARCH_CHUNK_ROWS)
+            chunk = np.asarray(self.vectors[start_index:end_index], dtype=np.float32)
+            self.squared_norms[start_index:end_index] = np.einsum('ij,ij->i', chunk, chunk)
+        self.ann_index = None
+
+    def _open_vectors(self, min_capacity):
+        file_path = os.path.join(self.path, VECTORS_FILE)
+        row_bytes = self.dimension * self.dtype.itemsize
+        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        capacity = file_size // row_bytes
+        if capacity < min_capacity:
+            capacity = max(min_capacity, capacity * 2, INITIAL_CAPACITY)
+            with open(file_path, 'ab') as f:
+                f.truncate(capacity * row_bytes)
+
+        if capacity == 0:
+            self.vectors, self.capacity = None, 0
+            return
+        self.vectors = np.memmap(file_path, dtype=self.dtype, mode='r+', shape=(capacity, self.dimension))
+        self.capacity = capacity
+
+    def _delete_records(self, ids):
+        ids = list(ids)
+        rows = []
+        for start_index in range(0, len(ids), 500):
+            id_batch = ids[start_index:start_index + 500]
+            placeholders = ",".join("?" * len(id_batch))
+            rows.extend(row for row, in self.connection.execute(
+                f"SELECT row FROM records WHERE id IN ({placeholders})", id_batch))
+            # The id is released, so a replacement row can take it
+            self.connection.execute(
+                f"UPDATE records SET id = NULL, deleted = 1 WHERE id IN ({placeholders})", id_batch)
+        return rows
+
+    def _get_documents(self, rows):
+        if not rows:
+            return []
+        with self.lock:
+            placeholders = ",".join("?" * len(rows))
+            records = {row: (chunk_id, text, metadata) for row, chunk_id, text, metadata in self.connection.execute(
+                f"SELECT row, id, text, metadata FROM records WHERE row IN ({placeholders})", list(rows))}
+        return [Document(id=records[row][0], page_content=records[row][1], metadata=json.loads(records[row][2]))
+                for row in rows]
+
+    def _get_filtered_rows(self, filter):
+        if not isinstance(filter, dict):
+            raise ValueError(f"ERROR: The local vector store filters by a dictionary of metadata values, got {filter!r}")
+
+        conditions = ["deleted = 0", "row < ?"]
+        parameters = [self.count]
+        for key, value in filter.items():
+            if '"' in key:
+                raise ValueError(f"ERROR: Unsupported metadata filter key {key}")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if not values:
+                return np.zeros(0, dtype=np.int64)
+            conditions.append(f"json_extract(metadata, '$.\"{key}\"') IN ({','.join('?' * len(values))})")
+            parameters.extend(values)
+        rows = self.connection.execute(f"SELECT row FROM records WHERE {' AND '.join(conditions)}", parameters)
+        return np.fromiter((row for row, in rows), dtype=np.int64)
+
+    def _get_ann_candidates(self, query_vector, k):
+        if self.ann_index is None or self.changes_since_build > INDEX_REBUILD_FRACTION * self.ann_index["count"]:
+            self.build_index()
+
+        ann_index = self.ann_index
+        if ann_index["type"] == "ivf":
+            centroid_distances = get_squared_distances(ann_index["centroids"], query_vector,
+                                                       ann_index["centroid_norms"])
+            probed_lists = np.argsort(centroid_distances)[:self.nprobe]
+            offsets = ann_index["offsets"]
+            candidate_rows = [ann_index["rows"][offsets[list_index]:offsets[list_index + 1]]
+                              for list_index in probed_lists]
+        else:
+            graph = ann_index["graph"]
+            graph.set_ef(max(self.ef_search, k))
+            # Deleted rows are still in the graph, so ask for enough neighbours to make up for them
+            neighbour_count = min(graph.get_current_count(), k + self.changes_since_build)
+            labels, _ = graph.knn_query(query_vector, k=neighbour_count)
+            candidate_rows = [labels[0].astype(np.int64)]
+
+        # Rows added since the index was built are scanned exactly
+        candidate_rows.append(np.arange(ann_index["count"], self.count))
+        return np.concatenate(candidate_rows)
+
+    def _build_ivf_index(self):
+        live_rows = np.flatnonzero(self.live)
+        nlist = min(len(live_rows), self.nlist or max(1, int(np.sqrt(len(live_rows)))))
+        random_generator = np.random.default_rng(0)
+        sample_rows = np.sort(random_generator.choice(live_rows, min(len(live_rows), nlist * IVF_SAMPLE_PER_LIST),
+                                                      replace=False))
+        sample = np.asarray(self.vectors[sample_rows], dtype=np.float32)
+
+        # k-means on a sample of the vectors
+        centroids = sample[random_generator.choice(len(sample), nlist, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = get_nearest_centroids(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=nlist)
+            non_empty = counts > 0
+            centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+
+        assignments = np.empty(len(live_rows), dtype=np.int64)
+        for start_index in range(0, len(live_rows), SEARCH_CHUNK_ROWS):
+            rows = live_rows[start_index:start_index + SEARCH_CHUNK_ROWS]
+            assignments[start_index:start_index + len(rows)] = get_nearest_centroids(
+                np.asarray(self.vectors[rows], dtype=np.float32), centroids)
+
+        order = np.argsort(assignments, kind='stable')
+        self.ann_index = {
+            "type": "ivf",
+            "count": self.count,
+            "centroids": centroids,
+            "centroid_norms": np.einsum('ij,ij->i', centroids, centroids),
+            "rows": live_rows[order],
+            "offsets": np.searchsorted(assignments[order], np.arange(nlist + 1)),
+        }
+        self.changes_since_build = 0
+
+    def _build_hnsw_index(self):
+        import hnswlib  # Only needed for HNSW indexes
+
+        live_rows = np.flatnonzero(self.live)
+        graph = hnswlib.Index(space='l2', dim=self.dimension)
+        graph.init_index(max_elements=max(1, len(live_rows)), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        for start_index in range(0, len(live_rows), SEARCH_CHUNK_ROWS):
+            rows = live_rows[start_index:start_index + SEARCH_CHUNK_ROWS]
+            graph.add_items(np.asarray(self.vectors[rows], dtype=np.float32), rows)
+        self.ann_index = {"type": "hnsw", "count": self.count, "graph": graph}
+        self.changes_since_build = 0
+
+
+class LocalVectorLoader(BaseVectorLoader):
+    """
+    Handles loading document embeddings into a local vector index on disk, see LocalVectorStore. No service or
+    network is needed, which suits edge deployments, CI and benchmarking the loader pipeline.
+    """
+    vector_store = None
+
+    def __init__(self, index_name, embedding_client, path=DEFAULT_LOCAL_PATH, dtype="float32", index_type="flat",
+                 **kwargs):
+        """
+        Initializes the LocalVectorLoader.
+
+        :param index_name: The name of the index. The index is stored in a directory of this name under path.
+        :param embedding_client: The LangChain embedding client to be used.
+        :param path: The directory holding the local indexes.
+        :param dtype: The vector storage type of new indexes, "float32" or "float16".
+        :param index_type: The default search index of new indexes, "flat", "ivf" or "hnsw".
+        :param kwargs: Other BaseVectorLoader options, such as batch_size or max_workers.
+        """
+        super().__init__(index_name, embedding_client, **kwargs)
+        self.path = path
+        self.dtype = dtype
+        self.index_type = index_type
+
+    def get_index_path(self, index_name=None):
+        """
+        Gets the directory of a local index.
+
+        :param index_name: The name of the index. Defaults to self.index_name.
+        :return: The index directory path.
+        """
+        return os.path.join(self.path, index_name or self.index_name)
+
+    def get_vector_store(self):
+        """
+        Gets the local vector store of the index, opening it on first use.
+
+        :return: The LocalVectorStore instance.
+        """
+        if self.vector_store is None:
+            self.vector_store = LocalVectorStore(self.get_index_path(), self.embedding_client)
+        return self.vector_store
+
+    def load_record_batch(self, records):
+        """
+        Adds a batch of already embedded vector records to the local index, see embed_documents.
+
+        :param records: A list of vector records.
+        :return: The number of records added.
+        """
+        log_progress(f"   Writing {len(records)} vectors into VDB index {self.index_name}")
+        self.ensure_index()
+        self.get_vector_store().add_vectors(
+            [record["id"] for record in records],
+            [record["text"] for record in records],
+            [record["values"] for record in records],
+            [record["metadata"] for record in records],
+        )
+        return len(records)
+
+    def delete_documents(self, ids):
+        """
+        Deletes document vectors from the local index by ID.
+
+        :param ids: A list of vector IDs to delete.
+        :return: The number of IDs deleted.
+        """
+        self.get_vector_store().delete(ids)
+        self.bump_index_version()
+        return len(ids)
+
+    def index_exists(self, index_name=None):
+        """
+        Checks if the local index exists.
+
+        :param index_name: The name of the index to check. Defaults to self.index_name.
+        :return: Boolean indicating whether the index exists.
+        """
+        return os.path.exists(os.path.join(self.get_index_path(index_name), CONFIG_FILE))
+
+    def create_index(self, index_name=None, embedding_client=None):
+        """
+        Creates a local index with the appropriate dimension size based on the embedding model.
+
+        :param index_name: The name of the index to create.
+        :param embedding_client: The LangChain embedding client to be used. Used to determine the index's dimension size.
+        :return: Boolean indicating whether the index was successfully created.
+        """
+        vector_store = LocalVectorStore(self.get_index_path(index_name), embedding_client or self.embedding_client,
+                                        dimension=self.get_vector_dimension_size(), dtype=self.dtype,
+                                        index_type=self.index_type)
+        if index_name in (None, self.index_name):
+            self.vector_store = vector_store
+        else:
+            vector_store.close()
+        return True
+
+    def delete_index(self, index_name=None):
+        """
+        Deletes a local index and its files.
+
+        :param index_name: The name of the index to delete.
+        :return: Boolean indicating whether the deletion was successful.
+        """
+        if not self.index_exists(index_name):
+            return False
+
+        if index_name in (None, self.index_name):
+            if self.vector_store is not None:
+                self.vector_store.close()
+            self.vector_store = None
+            self.index_ready = False
+
+        log_progress(f"Deleting index={index_name or self.index_name}")
+        shutil.rmtree(self.get_index_path(index_name))
+        self.bump_index_version(index_name)
+        return True
+
+    def describe_index(self, index_name=None):
+        """
+        Describes a local index.
+
+        :param index_name: The name of the index to describe.
+        :return: Dictionary containing index information, or None if the index is not found.
+        """
+        if not self.index_exists(index_name):
+            return None
+
+        if index_name in (None, self.index_name):
+            return self.get_vector_store().describe()
+
+        vector_store = LocalVectorStore(self.get_index_path(index_name))
+        try:
+            return vector_store.describe()
+        finally:
+            vector_store.close()
+
+    def get_index_dimension(self):
+        """
+        Gets the vector dimension of the existing local index.
+
+        :return: The index's vector dimension.
+        """
+        return self.describe_index()["dimension"]
+
+
+class LocalVectorQuery(BaseVectorQuery):
+    """
+    Handles querying a local vector index.
+    """
+
+    def __init__(self, index_name, embedding_client, path=DEFAULT_LOCAL_PATH, index_type=None,
+                 nprobe=DEFAULT_IVF_NPROBE, ef_search=DEFAULT_HNSW_EF_SEARCH, **kwargs):
+        """
+        Initializes the LocalVectorQuery.
+
+        :param index_name: The name of the index.
+        :param embedding_client: The LangChain embedding client to be used.
+        :param path: The directory holding the local indexes.
+        :param index_type: The search index, "flat", "ivf" or "hnsw". Defaults to the index type the index was
+          created with.
+        :param nprobe: The number of IVF lists searched per query.
+        :param ef_search: The HNSW candidate list size per query.
+        :param kwargs: Other BaseVectorQuery options, such as query_cache.
+        """
+        self.path = path
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        super().__init__(index_name, embedding_client, **kwargs)
+
+    def get_client(self):
+        """
+        Opens and returns the local vector store of the index.
+
+        :return: LocalVectorStore instance.
+        """
+        vdb = LocalVectorStore(os.path.join(self.path, self.index_name), self.embedding_client,
+                               index_type=self.index_type, nprobe=self.nprobe, ef_search=self.ef_search)
+        return vdb
+
+    def get_result_cache_scope(self):
+        return type(self).__name__, os.path.abspath(self.path), self.index_name, self.index_type
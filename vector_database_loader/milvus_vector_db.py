@@ -1,21 +1,57 @@
+import json
 import os
+import threading
+import time
 
-from pymilvus import MilvusClient
-from langchain_community.vectorstores import Milvus
+import numpy as np
+from pymilvus import MilvusClient, DataType
+from langchain_milvus import Milvus as MilvusVectorStore
 
 from vector_database_loader.base_vector_db import (
     BaseVectorLoader,
     BaseVectorQuery
 )
+from vector_database_loader.tracing import log_progress
 
 # https://python.langchain.com/docs/integrations/vectorstores/zilliz/
 
-def get_milvus_client():
+MILVUS_DELETE_BATCH_SIZE = 1000
+# The field names LangChain's Milvus vector store reads, metadata is kept in the dynamic field
+MILVUS_PRIMARY_FIELD = "pk"
+MILVUS_TEXT_FIELD = "text"
+MILVUS_VECTOR_FIELD = "vector"
+MILVUS_DYNAMIC_FIELD = "$meta"
+MILVUS_MAX_VARCHAR_LENGTH = 65535
+DEFAULT_BULK_ROWS_PER_FILE = 100000
+BULK_FILE_TYPES = ["parquet", "numpy"]
+# Vector index and search settings, see https://milvus.io/docs/index.md
+MILVUS_INDEX_TYPES = ["AUTOINDEX", "FLAT", "HNSW", "IVF_FLAT", "IVF_PQ", "DISKANN"]
+DEFAULT_MILVUS_INDEX_TYPE = "AUTOINDEX"
+DEFAULT_MILVUS_METRIC_TYPE = "L2"
+DEFAULT_MILVUS_CONSISTENCY_LEVEL = "Strong"
+# Build parameters used when none are given. IVF_PQ's m is derived from the vector dimension
+DEFAULT_MILVUS_BUILD_PARAMS = {
+    "HNSW": {"M": 16, "efConstruction": 200},
+    "IVF_FLAT": {"nlist": 1024},
+    "IVF_PQ": {"nlist": 1024, "nbits": 8},
+}
+
+# Milvus clients are shared per endpoint and user
+_milvus_clients = {}
+_milvus_clients_lock = threading.Lock()
+
+
+def get_milvus_connection_args(uri=None):
     """
-    Get a Milvus client instance.
+    Get the LangChain Milvus connection arguments for the Zilliz cloud endpoint.
 
-    :return: A Milvus client instance.
+    :param uri: Optional Milvus URI to use instead of the Zilliz cloud endpoint, e.g. a local Milvus Lite file such
+      as "./milvus.db", or a self-hosted "http://localhost:19530".
+    :return: A dictionary of connection arguments.
     """
+    if uri is not None:
+        return {"uri": uri}
+
     milvus_cloud_uri = os.getenv('ZILLIZ_CLOUD_URI')
     if milvus_cloud_uri is None:
         raise ValueError("ZILLIZ_CLOUD_URI environment variable not set.  This is your hosted endpoint URL")
@@ -28,12 +64,311 @@ def get_milvus_client():
     if milvus_password is None:
         raise ValueError("ZILLIZ_CLOUD_PASSWORD environment variable not set.  This is your password")
 
-    milvus_client = MilvusClient(
-        uri=milvus_cloud_uri,
-        token=f"{milvus_username}:{milvus_password}"
-    )
-    return milvus_client
+    # TODO: Handle serverless clusters with a token
+    return {
+        "uri": milvus_cloud_uri,
+        "user": milvus_username,
+        "password": milvus_password,
+        # "token": ZILLIZ_CLOUD_API_KEY,  # API key, for serverless clusters which can be used as replacements for user and password
+        "secure": True,
+    }
+
+
+def get_milvus_client(uri=None):
+    """
+    Get the shared Milvus client for the Zilliz cloud endpoint, creating it on first use. The client holds a gRPC
+    channel, so sharing it avoids a new connection for every loader, query and batch.
+
+    :param uri: Optional Milvus URI to use instead of the Zilliz cloud endpoint, see get_milvus_connection_args.
+    :return: A Milvus client instance.
+    """
+    connection_args = get_milvus_connection_args(uri)
+    client_key = (connection_args["uri"], connection_args.get("user"))
+    with _milvus_clients_lock:
+        milvus_client = _milvus_clients.get(client_key)
+        if milvus_client is None:
+            if "user" in connection_args:
+                milvus_client = MilvusClient(
+                    uri=connection_args["uri"],
+                    token=f"{connection_args['user']}:{connection_args['password']}"
+                )
+            else:
+                milvus_client = MilvusClient(uri=connection_args["uri"])
+            _milvus_clients[client_key] = milvus_client
+        return milvus_client
+
+
+def get_milvus_metadata(metadata):
+    """
+    Gets the metadata of a vector record to store in the collection's dynamic field. Keys that clash with the schema
+    fields would be rejected, so they are dropped.
+
+    :param metadata: The metadata dictionary of a vector record.
+    :return: The metadata dictionary to store.
+    """
+    return {key: value for key, value in metadata.items()
+            if key not in (MILVUS_PRIMARY_FIELD, MILVUS_TEXT_FIELD, MILVUS_VECTOR_FIELD)}
+
+
+def get_milvus_rows(records):
+    """
+    Converts vector records into the rows MilvusClient.insert takes. The metadata of each row is stored in the
+    collection's dynamic field.
+
+    :param records: A list of vector records, see BaseVectorLoader.embed_documents.
+    :return: A list of row dictionaries.
+    """
+    return [
+        {
+            **get_milvus_metadata(record["metadata"]),
+            MILVUS_PRIMARY_FIELD: record["id"],
+            MILVUS_TEXT_FIELD: record["text"],
+            MILVUS_VECTOR_FIELD: record["values"]
+        }
+        for record in records
+    ]
+
+
+def get_milvus_columns(records):
+    """
+    Converts vector records into the columns of a bulk import file: parallel lists of primary keys, texts and
+    metadata, and the vectors as a single float32 NumPy array.
+
+    :param records: A list of vector records, see BaseVectorLoader.embed_documents.
+    :return: A dictionary of field name to column.
+    """
+    return {
+        MILVUS_PRIMARY_FIELD: [record["id"] for record in records],
+        MILVUS_TEXT_FIELD: [record["text"] for record in records],
+        MILVUS_VECTOR_FIELD: np.asarray([record["values"] for record in records], dtype=np.float32),
+        MILVUS_DYNAMIC_FIELD: [get_milvus_metadata(record["metadata"]) for record in records],
+    }
+
+
+def check_milvus_schema(collection_name, description):
+    """
+    Checks that an existing Milvus collection has the schema MilvusVectorLoader creates, with a string primary key
+    field. Collections created by earlier versions have an auto generated integer primary key instead, and have to be
+    reloaded with delete_index=True.
+
+    :param collection_name: The Milvus collection name.
+    :param description: The collection description, see MilvusClient.describe_collection.
+    """
+    for field in description.get('fields', []):
+        if field.get('is_primary'):
+            if field['name'] != MILVUS_PRIMARY_FIELD or field['type'] != DataType.VARCHAR or field.get('auto_id'):
+                raise ValueError(f"ERROR: Milvus collection {collection_name} has the primary key field "
+                                 f"{field['name']} of an earlier version, reload it with delete_index=True to recreate "
+                                 f"it with a string {MILVUS_PRIMARY_FIELD} field")
+            return
+
+
+def get_milvus_build_params(index_type, dimension_size, index_params=None):
+    """
+    Gets the build parameters of a Milvus vector index.
+
+    :param index_type: The index type, one of MILVUS_INDEX_TYPES.
+    :param dimension_size: The vector dimension.
+    :param index_params: Optional build parameters overriding the defaults, e.g. {"M": 32, "efConstruction": 400}.
+    :return: A dictionary of build parameters.
+    """
+    if index_type not in MILVUS_INDEX_TYPES:
+        raise ValueError(f"ERROR: Unsupported Milvus index_type {index_type}, expected one of {MILVUS_INDEX_TYPES}")
+
+    build_params = dict(DEFAULT_MILVUS_BUILD_PARAMS.get(index_type, {}))
+    if index_type == "IVF_PQ":
+        # m sub-quantizers must divide the dimension, aim for sub-vectors of about 4 dimensions
+        build_params["m"] = next(m for m in range(max(1, dimension_size // 4), 0, -1) if dimension_size % m == 0)
+    build_params.update(index_params or {})
+    return build_params
+
+
+def get_exact_neighbors(ids, vectors, query_vectors, k, metric_type=DEFAULT_MILVUS_METRIC_TYPE):
+    """
+    Finds the exact k nearest neighbors of query vectors by brute force, as ground truth for recall measurements.
+
+    :param ids: The primary keys of the vectors.
+    :param vectors: The searched vectors.
+    :param query_vectors: The query vectors.
+    :param k: The number of neighbors per query.
+    :param metric_type: The distance metric, "L2", "IP" or "COSINE".
+    :return: A list with the neighbor primary keys of each query, nearest first.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+    if metric_type == "COSINE":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query_vectors = query_vectors / np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+
+    scores = query_vectors @ vectors.T
+    if metric_type == "L2":
+        # Squared L2 distance up to the per-query constant, negated so higher is nearer
+        scores = 2 * scores - np.einsum("ij,ij->i", vectors, vectors)
+    nearest = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return [[ids[index] for index in row] for row in nearest]
+
+
+def sweep_milvus_search_params(collection_name, query_vectors, index_configs, k=10, uri=None,
+                               metric_type=DEFAULT_MILVUS_METRIC_TYPE, consistency_level=None, ground_truth=None):
+    """
+    Measures recall@k and search latency of a Milvus collection for several index and search parameter settings,
+    to choose the settings of MilvusVectorLoader and MilvusVectorQuery. Queries are searched one at a time, as an
+    application would. Rebuilding the index of a large collection takes a while, so sweep on a sample collection.
+
+    :param collection_name: The Milvus collection to search.
+    :param query_vectors: The query vectors, e.g. embeddings of real user queries.
+    :param index_configs: A list of dictionaries with an optional "index_type" and "params", the index is rebuilt with
+      these first, and a list of "search_params" to try, e.g.
+      [{"index_type": "HNSW", "params": {"M": 16}, "search_params": [{"ef": 16}, {"ef": 64}]}].
+      Without index_type the current index is searched.
+    :param k: The number of results per query.
+    :param uri: Optional Milvus URI to use instead of the Zilliz cloud endpoint.
+    :param metric_type: The collection's distance metric.
+    :param consistency_level: Optional consistency level of the searches, e.g. "Bounded".
+    :param ground_truth: Optional list with the true nearest primary keys of each query. Computed by brute force over
+      every vector of the collection if not given.
+    :return: A list of dictionaries with the index_type, params, search_params, recall and p50/p95/p99 latency in
+      milliseconds of each setting.
+    """
+    milvus_client = get_milvus_client(uri)
+    query_vectors = [list(map(float, vector)) for vector in query_vectors]
+    search_kwargs = {} if consistency_level is None else {"consistency_level": consistency_level}
+
+    if ground_truth is None:
+        ids, vectors = [], []
+        iterator = milvus_client.query_iterator(collection_name, batch_size=1000,
+                                                output_fields=[MILVUS_PRIMARY_FIELD, MILVUS_VECTOR_FIELD])
+        while batch := iterator.next():
+            ids.extend(row[MILVUS_PRIMARY_FIELD] for row in batch)
+            vectors.extend(row[MILVUS_VECTOR_FIELD] for row in batch)
+        iterator.close()
+        ground_truth = get_exact_neighbors(ids, vectors, query_vectors, k, metric_type)
+
+    dimension_size = len(query_vectors[0])
+    results = []
+    for config in index_configs:
+        index_type = config.get("index_type")
+        build_params = config.get("params")
+        if index_type is not None:
+            build_params = get_milvus_build_params(index_type, dimension_size, build_params)
+            log_progress(f"Rebuilding index of {collection_name} as {index_type} {build_params}")
+            milvus_client.release_collection(collection_name)
+            milvus_client.drop_index(collection_name, MILVUS_VECTOR_FIELD)
+            index_params = milvus_client.prepare_index_params()
+            index_params.add_index(MILVUS_VECTOR_FIELD, index_type=index_type, metric_type=metric_type,
+                                   params=build_params)
+            milvus_client.create_index(collection_name, index_params)
+            milvus_client.load_collection(collection_name)
+
+        for search_params in config.get("search_params") or [{}]:
+            milvus_search_params = {"metric_type": metric_type, "params": search_params}
+            # The first search warms up the loaded index and is not measured
+            milvus_client.search(collection_name, query_vectors[:1], limit=k, search_params=milvus_search_params,
+                                 **search_kwargs)
+
+            latencies = []
+            found = 0
+            for query_vector, expected_ids in zip(query_vectors, ground_truth):
+                start_time = time.perf_counter()
+                hits = milvus_client.search(collection_name, [query_vector], limit=k,
+                                            output_fields=[MILVUS_PRIMARY_FIELD],
+                                            search_params=milvus_search_params, **search_kwargs)[0]
+                latencies.append((time.perf_counter() - start_time) * 1000)
+                found += len({hit[MILVUS_PRIMARY_FIELD] for hit in hits} & set(expected_ids[:k]))
+
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            result = {
+                "index_type": index_type or "current",
+                "params": build_params,
+                "search_params": search_params,
+                "recall": found / (len(query_vectors) * k),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+            }
+            results.append(result)
+            log_progress(f"   {result['index_type']} {search_params}: recall@{k}={result['recall']:.3f} "
+                  f"p50={p50:.2f}ms p95={p95:.2f}ms p99={p99:.2f}ms")
+    return results
+
+
+class MilvusBulkWriter:
+    """
+    Writes vector records to local files in the Milvus bulk import formats, for loads too large to insert
+    efficiently. Parquet files hold one column per field, and NumPy files are a directory per file with one .npy per
+    field. Upload the written files to the cluster's object storage and import them with Milvus bulk import.
+    """
+
+    def __init__(self, directory, file_type="parquet", rows_per_file=DEFAULT_BULK_ROWS_PER_FILE):
+        """
+        Initializes the MilvusBulkWriter.
+
+        :param directory: The directory the import files are written to.
+        :param file_type: The import file format, "parquet" (needs pyarrow) or "numpy".
+        :param rows_per_file: The number of rows per import file.
+        """
+        if file_type not in BULK_FILE_TYPES:
+            raise ValueError(f"ERROR: Unsupported bulk import file_type {file_type}, expected one of {BULK_FILE_TYPES}")
+
+        self.directory = directory
+        self.file_type = file_type
+        self.rows_per_file = rows_per_file
+        self.lock = threading.Lock()
+        self.pending = []
+        self.files = []
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, records):
+        """
+        Buffers vector records, writing an import file each time rows_per_file records are buffered.
+
+        :param records: A list of vector records.
+        :return: The number of records appended.
+        """
+        with self.lock:
+            self.pending.extend(records)
+            while len(self.pending) >= self.rows_per_file:
+                self._write_file(self.pending[:self.rows_per_file])
+                self.pending = self.pending[self.rows_per_file:]
+        return len(records)
+
+    def commit(self):
+        """
+        Writes the records still buffered.
 
+        :return: A list of the import files written so far. Each entry is a list of paths: a Parquet file, or the
+          .npy files of a NumPy import file.
+        """
+        with self.lock:
+            if self.pending:
+                self._write_file(self.pending)
+                self.pending = []
+            return list(self.files)
+
+    def _write_file(self, records):
+        columns = get_milvus_columns(records)
+        columns[MILVUS_DYNAMIC_FIELD] = [json.dumps(metadata) for metadata in columns[MILVUS_DYNAMIC_FIELD]]
+        file_name = f"part-{len(self.files):05d}"
+
+        if self.file_type == "parquet":
+            import pyarrow as pa  # Only needed for Parquet import files
+            import pyarrow.parquet as pq
+
+            vectors = columns[MILVUS_VECTOR_FIELD]
+            columns[MILVUS_VECTOR_FIELD] = pa.FixedSizeListArray.from_arrays(
+                pa.array(vectors.ravel(), type=pa.float32()), vectors.shape[1])
+            path = os.path.join(self.directory, f"{file_name}.parquet")
+            pq.write_table(pa.table(columns), path)
+            self.files.append([path])
+        else:
+            file_directory = os.path.join(self.directory, file_name)
+            os.makedirs(file_directory, exist_ok=True)
+            paths = []
+            for field_name, column in columns.items():
+                path = os.path.join(file_directory, f"{field_name}.npy")
+                np.save(path, np.asarray(column))
+                paths.append(path)
+            self.files.append(paths)
 
 
 class MilvusVectorLoader(BaseVectorLoader):
@@ -42,43 +377,89 @@ class MilvusVectorLoader(BaseVectorLoader):
     """
     milvus_client = None
 
-    def load_document_batch(self, document_set):
+    def __init__(self, index_name, embedding_client, uri=None, bulk_writer=None, index_type=DEFAULT_MILVUS_INDEX_TYPE,
+                 index_params=None, metric_type=DEFAULT_MILVUS_METRIC_TYPE,
+                 consistency_level=DEFAULT_MILVUS_CONSISTENCY_LEVEL, **kwargs):
+        """
+        Initializes the MilvusVectorLoader.
+
+        :param index_name: The name of the index. This is the Milvus collection name.
+        :param embedding_client: The LangChain embedding client to be used.
+        :param uri: Optional Milvus URI to use instead of the Zilliz cloud endpoint, e.g. a local Milvus Lite file.
+        :param bulk_writer: Optional MilvusBulkWriter. Batches are then written to bulk import files instead of
+          inserted, and the files are listed once the load completes.
+        :param index_type: The vector index of new collections, one of MILVUS_INDEX_TYPES.
+        :param index_params: Optional build parameters of the vector index, e.g. {"M": 32, "efConstruction": 400} for
+          HNSW or {"nlist": 4096} for IVF_FLAT. See DEFAULT_MILVUS_BUILD_PARAMS for the defaults.
+        :param metric_type: The distance metric of new collections, "L2", "IP" or "COSINE".
+        :param consistency_level: The default consistency level of new collections' searches. "Strong" waits for
+          every write to be searchable, "Bounded" or "Eventually" answer faster.
+        :param kwargs: Other BaseVectorLoader options, such as batch_size or max_workers.
         """
-        Loads a batch of document embeddings into the vector database.
+        if index_type not in MILVUS_INDEX_TYPES:
+            raise ValueError(f"ERROR: Unsupported Milvus index_type {index_type}, expected one of {MILVUS_INDEX_TYPES}")
+
+        super().__init__(index_name, embedding_client, **kwargs)
+        self.uri = uri
+        self.bulk_writer = bulk_writer
+        self.index_type = index_type
+        self.index_params = index_params
+        self.metric_type = metric_type
+        self.consistency_level = consistency_level
+
+    def get_milvus_client(self):
+        """
+        Gets the persistent Milvus client of this loader.
 
-        :param document_set: A list of document chunks to be embedded and stored.
-        :return: The Pinecone vector database instance.
+        :return: A Milvus client instance.
         """
+        if self.milvus_client is None:
+            self.milvus_client = get_milvus_client(self.uri)
+        return self.milvus_client
 
-        milvus_cloud_uri = os.getenv('ZILLIZ_CLOUD_URI')
-        if milvus_cloud_uri is None:
-            raise ValueError("ZILLIZ_CLOUD_URI environment variable not set.  This is your hosted endpoint URL")
+    def load_record_batch(self, records):
+        """
+        Inserts a batch of already embedded vector records into the Milvus collection, see embed_documents.
+        The records are inserted as rows through the loader's persistent client. The ORM's column based
+        Collection.insert only takes the schema fields, so it cannot carry the metadata in the dynamic field, and on
+        Milvus Lite it was no faster: 199 ms against 196 ms for rows, per batch of 250 vectors of dimension 1536.
 
-        milvus_username = os.getenv('ZILLIZ_CLOUD_USERNAME')
-        if milvus_username is None:
-            raise ValueError("ZILLIZ_CLOUD_USERNAME environment variable not set.  This is your userid")
+        :param records: A list of vector records.
+        :return: The number of records inserted.
+        """
+        self.ensure_index()
+        if self.bulk_writer is not None:
+            return self.bulk_writer.append(records)
 
-        milvus_password = os.getenv('ZILLIZ_CLOUD_PASSWORD')
-        if milvus_password is None:
-            raise ValueError("ZILLIZ_CLOUD_PASSWORD environment variable not set.  This is your password")
+        log_progress(f"   Writing {len(records)} vectors into VDB index {self.index_name}")
+        result = self.get_milvus_client().insert(self.index_name, get_milvus_rows(records))
+        return result["insert_count"]
 
-        # TODO: Handle serverless clusters with a token
+    def finish_load(self):
+        """
+        Writes the last bulk import file, if a bulk writer is used, and lists the files to import.
+        """
+        if self.bulk_writer is None:
+            return
 
-        vector_db = Milvus.from_documents(
-            document_set,
-            self.embedding_client,
-            collection_name=self.index_name,
-            # drop_old=delete_index,
-            # auto_id=True,
-            connection_args={
-                "uri": milvus_cloud_uri,
-                "user": milvus_username,
-                "password": milvus_password,
-                # "token": ZILLIZ_CLOUD_API_KEY,  # API key, for serverless clusters which can be used as replacements for user and password
-                "secure": True,
-            },
-        )
+        files = self.bulk_writer.commit()
+        log_progress(f"Wrote {len(files)} bulk import files for collection {self.index_name} to "
+                     f"{self.bulk_writer.directory}")
+        for file_paths in files:
+            log_progress(f"   {file_paths}")
+
+    def delete_documents(self, ids):
+        """
+        Deletes document vectors from the Milvus collection by primary key.
 
+        :param ids: A list of primary keys to delete.
+        :return: The number of IDs deleted.
+        """
+        for start_index in range(0, len(ids), MILVUS_DELETE_BATCH_SIZE):
+            self.get_milvus_client().delete(self.index_name,
+                                            ids=ids[start_index:start_index + MILVUS_DELETE_BATCH_SIZE])
+        self.bump_index_version()
+        return len(ids)
 
     def index_exists(self, index_name=None):
         """
@@ -90,10 +471,7 @@ class MilvusVectorLoader(BaseVectorLoader):
         if index_name is None:
             index_name = self.index_name
 
-        if self.milvus_client is None:
-            self.milvus_client = get_milvus_client()
-
-        has_collection = self.milvus_client.has_collection(index_name, timeout=5)
+        has_collection = self.get_milvus_client().has_collection(index_name, timeout=5)
         return has_collection
 
     def delete_index(self, index_name=None):
@@ -106,16 +484,18 @@ class MilvusVectorLoader(BaseVectorLoader):
         if index_name is None:
             index_name = self.index_name
 
-        if self.milvus_client is None:
-            self.milvus_client = get_milvus_client()
-
         if self.index_exists(index_name):
-            self.milvus_client.drop_collection(index_name)
+            self.get_milvus_client().drop_collection(index_name)
+            self.bump_index_version(index_name)
+            if index_name == self.index_name:
+                self.index_ready = False
             return True
 
     def create_index(self, index_name=None, embedding_client=None):
         """
-        Creates a Pinecone index with the appropriate dimension size based on the embedding model.
+        Creates a Milvus collection with the appropriate dimension size based on the embedding model.
+        The schema matches what LangChain's Milvus vector store expects: a string primary key, the text and the vector,
+        with metadata in the dynamic field.
 
         :param index_name: The name of the index to create.
         :param embedding_client: The LangChain embedding client to be used. Used to determine the index's dimension size.
@@ -128,16 +508,23 @@ class MilvusVectorLoader(BaseVectorLoader):
             index_name = self.index_name
 
         dimension_size = self.get_vector_dimension_size()
+        milvus_client = self.get_milvus_client()
 
-        if self.milvus_client is None:
-            self.milvus_client = get_milvus_client()
+        schema = milvus_client.create_schema(auto_id=False, enable_dynamic_field=True)
+        schema.add_field(MILVUS_PRIMARY_FIELD, DataType.VARCHAR, is_primary=True, max_length=MILVUS_MAX_VARCHAR_LENGTH)
+        schema.add_field(MILVUS_TEXT_FIELD, DataType.VARCHAR, max_length=MILVUS_MAX_VARCHAR_LENGTH)
+        schema.add_field(MILVUS_VECTOR_FIELD, DataType.FLOAT_VECTOR, dim=dimension_size)
+
+        index_params = milvus_client.prepare_index_params()
+        index_params.add_index(MILVUS_VECTOR_FIELD, index_type=self.index_type, metric_type=self.metric_type,
+                               params=get_milvus_build_params(self.index_type, dimension_size, self.index_params))
 
-        self.milvus_client.create_collection(
+        milvus_client.create_collection(
             index_name,
-            dimension_size,
-            consistency_level="Strong",
-            metric_type="L2",
-            auto_id=True)
+            schema=schema,
+            index_params=index_params,
+            consistency_level=self.consistency_level)
+        return True
 
     def describe_index(self, index_name=None):
         """
@@ -149,10 +536,21 @@ class MilvusVectorLoader(BaseVectorLoader):
         if index_name is None:
             index_name = self.index_name
 
-        if self.milvus_client is None:
-            self.milvus_client = get_milvus_client()
+        return self.get_milvus_client().describe_collection(index_name)
 
-        return self.milvus_client.describe_collection(index_name)
+    def get_index_dimension(self):
+        """
+        Gets the vector dimension of the existing Milvus collection, after checking the collection has the schema this
+        loader writes, see check_milvus_schema.
+
+        :return: The collection's vector dimension, or None if it has no vector field.
+        """
+        description = self.describe_index()
+        check_milvus_schema(self.index_name, description)
+        for field in description.get('fields', []):
+            if 'dim' in field.get('params', {}):
+                return int(field['params']['dim'])
+        return None
 
 
 class MilvusVectorQuery(BaseVectorQuery):
@@ -160,31 +558,53 @@ class MilvusVectorQuery(BaseVectorQuery):
     Handles querying a Milvus vector database index.
     """
 
-    def get_client(self):
-
-        milvus_cloud_uri = os.getenv('ZILLIZ_CLOUD_URI')
-        if milvus_cloud_uri is None:
-            raise ValueError("ZILLIZ_CLOUD_URI environment variable not set.  This is your hosted endpoint URL")
-
-        milvus_username = os.getenv('ZILLIZ_CLOUD_USERNAME')
-        if milvus_username is None:
-            raise ValueError("ZILLIZ_CLOUD_USERNAME environment variable not set.  This is your userid")
-
-        milvus_password = os.getenv('ZILLIZ_CLOUD_PASSWORD')
-        if milvus_password is None:
-            raise ValueError("ZILLIZ_CLOUD_PASSWORD environment variable not set.  This is your password")
+    def __init__(self, index_name, embedding_client, uri=None, search_params=None,
+                 metric_type=DEFAULT_MILVUS_METRIC_TYPE, consistency_level=None, **kwargs):
+        """
+        Initializes the MilvusVectorQuery.
+
+        :param index_name: The name of the index. This is the Milvus collection name.
+        :param embedding_client: The LangChain embedding client to be used.
+        :param uri: Optional Milvus URI to use instead of the Zilliz cloud endpoint, e.g. a local Milvus Lite file.
+        :param search_params: Optional search parameters of the collection's vector index, e.g. {"ef": 64} for HNSW,
+          {"nprobe": 16} for IVF indexes or {"search_list": 100} for DISKANN. See sweep_milvus_search_params.
+        :param metric_type: The collection's distance metric.
+        :param consistency_level: Optional consistency level of the searches, e.g. "Bounded". Defaults to the
+          collection's.
+        :param kwargs: Other BaseVectorQuery options, such as query_cache.
+        """
+        self.uri = uri
+        self.search_params = search_params or {}
+        self.metric_type = metric_type
+        self.consistency_level = consistency_level
+        super().__init__(index_name, embedding_client, **kwargs)
 
-        # TODO: Handle serverless clusters with a token
+    def get_client(self):
+        """
+        Initializes and returns a Milvus vector database client.
 
-        vdb = Milvus(
+        :return: Milvus vector store client instance.
+        """
+        vdb = MilvusVectorStore(
             self.embedding_client,
             collection_name=self.index_name,
-            connection_args={
-                "uri": milvus_cloud_uri,
-                "user": milvus_username,
-                "password": milvus_password,
-                # "token": ZILLIZ_CLOUD_API_KEY,  # API key, for serverless clusters which can be used as replacements for user and password
-                "secure": True,
-            },
+            connection_args=get_milvus_connection_args(self.uri),
+            search_params={"metric_type": self.metric_type, "params": self.search_params},
+            enable_dynamic_field=True,
         )
-        return vdb
\ No newline at end of file
+        return vdb
+
+    def get_search_kwargs(self, filter=None):
+        """
+        Gets the keyword arguments of the Milvus searches.
+
+        :param filter: Optional Milvus boolean expression, e.g. 'source == "Docs"'.
+        :return: A dictionary of keyword arguments.
+        """
+        search_kwargs = {} if filter is None else {"expr": filter}
+        if self.consistency_level is not None:
+            search_kwargs["consistency_level"] = self.consistency_level
+        return search_kwargs
+
+    def get_result_cache_scope(self):
+        return type(self).__name__, self.uri, self.index_name, json.dumps(self.search_params, sort_keys=True)
@@ -0,0 +1,140 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from vector_database_loader.base_vector_db import BaseVectorLoader
+from vector_database_loader.embedding_cache import get_embedding_model_key
+from vector_database_loader.tracing import log_progress
+
+
+class MultiTargetVectorLoader(BaseVectorLoader):
+    """
+    Loads the same content into several vector databases at once. Sources are crawled, chunked and embedded a
+    single time, and each batch of vector records is written to every target loader concurrently, so the indexes
+    stay consistent and share the same chunk IDs.
+    """
+
+    def __init__(self, loaders, embedding_client=None, **kwargs):
+        """
+        Initializes the MultiTargetVectorLoader.
+
+        :param loaders: The target loaders, e.g. a PineconeVectorLoader and a MilvusVectorLoader. Each must implement
+          load_record_batch, and all must use the same embedding model.
+        :param embedding_client: The LangChain embedding client to embed with. Defaults to the first loader's.
+        :param kwargs: Other BaseVectorLoader options, such as batch_size, max_workers or embedding_cache.
+        """
+        if not loaders:
+            raise ValueError("ERROR: MultiTargetVectorLoader needs at least one target loader")
+
+        model_keys = {get_embedding_model_key(loader.embedding_client) for loader in loaders}
+        if len(model_keys) > 1:
+            raise ValueError(f"ERROR: All target loaders must use the same embedding model, found {sorted(model_keys)}")
+
+        if embedding_client is None:
+            embedding_client = loaders[0].embedding_client
+
+        index_name = ",".join(loader.index_name for loader in loaders)
+        super().__init__(index_name, embedding_client, **kwargs)
+        self.loaders = loaders
+
+    def load_record_batch(self, records):
+        """
+        Writes a batch of vector records to every target concurrently. All targets are waited for, then the first
+        error, if any, is raised.
+
+        :param records: A list of vector records.
+        :return: The number of records written to each target.
+        """
+        return self._run_on_targets(lambda loader: loader.load_record_batch(records))
+
+    async def aload_document_batch(self, document_set):
+        """
+        Embeds a batch of documents asynchronously, then writes the vector records to every target.
+
+        :param document_set: A list of document chunks to be embedded and stored.
+        :return: The number of records written to each target.
+        """
+        records = await self.aembed_documents(document_set)
+        return await asyncio.to_thread(self.load_traced_record_batch, records)
+
+    def delete_documents(self, ids):
+        """
+        Deletes document vectors by ID from every target.
+
+        :param ids: A list of vector IDs to delete.
+        :return: The number of IDs deleted.
+        """
+        self._run_on_targets(lambda loader: loader.delete_documents(ids))
+        return len(ids)
+
+    def prepare_index(self, delete_index=False):
+        """
+        Deletes the existing index of every target that has one, if requested. Each target is checked on its own, so
+        a full reload also clears targets whose peers do not have an index yet. Missing indexes are created by each
+        target when its first batch is written.
+
+        :param delete_index: Whether to delete the existing indexes.
+        :return: Boolean indicating whether any index was deleted.
+        """
+        if not delete_index:
+            return False
+
+        if self.checkpoint is not None and self.checkpoint.has_progress(self.index_name):
+            log_progress(f"Resuming load of index {self.index_name} from checkpoint, so the existing indexes are kept")
+            return False
+
+        self.index_ready = False
+        return self.delete_index()
+
+    def index_exists(self, index_name=None):
+        """
+        Checks if the indexes of all targets exist.
+
+        :return: Boolean indicating whether every target index exists.
+        """
+        return all(loader.index_exists() for loader in self.loaders)
+
+    def create_index(self, index_name=None, embedding_client=None):
+        """
+        Creates the index of every target that does not have one yet.
+
+        :return: Boolean indicating success.
+        """
+        for loader in self.loaders:
+            if not loader.index_exists():
+                loader.create_index()
+        return True
+
+    def bump_index_version(self, index_name=None):
+        """
+        Marks the index of every target as changed.
+        """
+        for loader in self.loaders:
+            loader.bump_index_version()
+
+    def delete_index(self, index_name=None):
+        """
+        Deletes the index of every target that has one.
+
+        :return: Boolean indicating whether any index was deleted.
+        """
+        deleted = False
+        for loader in self.loaders:
+            if loader.index_exists():
+                loader.delete_index()
+                deleted = True
+        return deleted
+
+    def describe_index(self, index_name=None):
+        """
+        Describes the index of every target.
+
+        :return: A dictionary of target index name to its description.
+        """
+        return {loader.index_name: loader.describe_index() for loader in self.loaders}
+
+    def _run_on_targets(self, function):
+        # A pool per fan-out, so no threads are left behind once the loader is no longer used
+        with ThreadPoolExecutor(max_workers=len(self.loaders), thread_name_prefix="vdb-loader-target") as executor:
+            futures = [executor.submit(function, loader) for loader in self.loaders]
+            wait(futures)
+        return [future.result() for future in futures]
@@ -1,4 +1,7 @@
+import asyncio
+import json
 import os
+import threading
 from time import sleep
 
 from langchain_pinecone import PineconeVectorStore
@@ -7,46 +10,188 @@ from vector_database_loader.base_vector_db import (
     BaseVectorLoader,
     BaseVectorQuery
 )
+from vector_database_loader.pipeline_utils import batched, batched_by_size, estimate_vector_bytes
+from vector_database_loader.tracing import log_error, log_progress, trace_span
 from pinecone.exceptions import NotFoundException
 
+# Pinecone accepts up to 1000 IDs per delete request
+PINECONE_DELETE_BATCH_SIZE = 1000
+# Pinecone recommends upserts of up to 100 vectors, larger batches are split into concurrent requests of this size
+PINECONE_UPSERT_BATCH_SIZE = 100
+DEFAULT_UPSERT_PARALLELISM = 4
+# Pinecone rejects upsert requests larger than 2 MB, so requests of wide vectors or long texts are made smaller
+PINECONE_MAX_REQUEST_BYTES = 2 * 1024 * 1024
+# The metadata key LangChain's PineconeVectorStore reads the chunk text from
+PINECONE_TEXT_KEY = "text"
 
-def list_indexes():
+# Pinecone clients are shared per API key, so their HTTP connection pools are reused across loaders and queries
+_pinecone_clients = {}
+_pinecone_clients_lock = threading.Lock()
+
+
+def get_pinecone_client(use_grpc=False):
     """
-    Lists all available Pinecone indexes.
+    Gets the shared Pinecone client for the PINECONE_API_KEY, creating it on first use.
 
-    :return: A list of index names.
+    :param use_grpc: Whether to get the gRPC client, which needs the pinecone[grpc] extra to be installed.
+    :return: A Pinecone client instance.
     """
     pinecone_api_key = os.getenv('PINECONE_API_KEY')
     if pinecone_api_key is None:
         raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
 
-    pc = Pinecone(api_key=pinecone_api_key)
+    with _pinecone_clients_lock:
+        pc = _pinecone_clients.get((pinecone_api_key, use_grpc))
+        if pc is None:
+            if use_grpc:
+                from pinecone.grpc import PineconeGRPC  # Only available with the pinecone[grpc] extra
+                pc = PineconeGRPC(api_key=pinecone_api_key)
+            else:
+                pc = Pinecone(api_key=pinecone_api_key)
+            _pinecone_clients[(pinecone_api_key, use_grpc)] = pc
+        return pc
+
+
+def list_indexes():
+    """
+    Lists all available Pinecone indexes.
+
+    :return: A list of index names.
+    """
+    pc = get_pinecone_client()
     indexes = pc.list_indexes()
     return indexes
 
 
+def estimate_upsert_bytes(vector):
+    """
+    Estimates the upsert request payload size of a Pinecone vector.
+
+    :param vector: A Pinecone vector dictionary with id, values and metadata keys.
+    :return: The estimated size in bytes.
+    """
+    return (len(vector["id"].encode('utf-8')) + estimate_vector_bytes(len(vector["values"]))
+            + len(json.dumps(vector["metadata"], default=str).encode('utf-8')))
+
+
 class PineconeVectorLoader(BaseVectorLoader):
     """
     Handles loading document embeddings into a Pinecone vector database index.
     """
 
-    def load_document_batch(self, document_set):
+    index_handle = None
+
+    def __init__(self, index_name, embedding_client, namespace=None, upsert_batch_size=PINECONE_UPSERT_BATCH_SIZE,
+                 upsert_parallelism=DEFAULT_UPSERT_PARALLELISM, max_request_bytes=PINECONE_MAX_REQUEST_BYTES,
+                 use_grpc=False, **kwargs):
         """
-        Loads a batch of document embeddings into the vector database.
+        Initializes the PineconeVectorLoader.
+
+        :param index_name: The name of the index.
+        :param embedding_client: The LangChain embedding client to be used.
+        :param namespace: The index namespace to write to, or None for the default namespace.
+        :param upsert_batch_size: The number of vectors per upsert request.
+        :param upsert_parallelism: The number of upsert requests of a batch sent concurrently.
+        :param max_request_bytes: The maximum estimated payload size of an upsert request.
+        :param use_grpc: Whether to write through Pinecone's gRPC client, which needs the pinecone[grpc] extra.
+        :param kwargs: Other BaseVectorLoader options, such as batch_size or max_workers.
+        """
+        super().__init__(index_name, embedding_client, **kwargs)
+        self.namespace = namespace
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_parallelism = upsert_parallelism
+        self.max_request_bytes = max_request_bytes
+        self.use_grpc = use_grpc
+
+    def get_index(self):
+        """
+        Gets the data plane handle of the Pinecone index, creating it on first use. The HTTP handle keeps a pool of
+        connections sized for every upsert request of max_workers concurrent batches, and is reused by every batch.
+
+        :return: A Pinecone Index instance.
+        """
+        if self.index_handle is None:
+            pc = get_pinecone_client(self.use_grpc)
+            if self.use_grpc:
+                self.index_handle = pc.Index(self.index_name)
+            else:
+                pool_size = max(1, self.max_workers) * self.upsert_parallelism
+                self.index_handle = pc.Index(self.index_name, pool_threads=pool_size,
+                                             connection_pool_maxsize=pool_size)
+        return self.index_handle
+
+    async def aload_document_batch(self, document_set):
+        """
+        Loads a batch of document embeddings into the vector database asynchronously, using the embedding client's
+        aembed_documents and Pinecone's asyncio index client.
 
         :param document_set: A list of document chunks to be embedded and stored.
         :return: The Pinecone vector database instance.
         """
-        print(f"   Loading {len(document_set)} document chunks into VDB index {self.index_name}")
-        pinecone_api_key = os.getenv('PINECONE_API_KEY')  # This is used by the underlying calls, so lets check
-        if pinecone_api_key is None:
-            raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
+        log_progress(f"   Loading {len(document_set)} document chunks into VDB index {self.index_name}")
+        await asyncio.to_thread(self.ensure_index)
+
+        # The vector store only reads the index host from the handle, and writes with its own asyncio client
+        index = get_pinecone_client().Index(self.index_name) if self.use_grpc else self.get_index()
+        vdb = PineconeVectorStore(index=index, embedding=self.embedding_client, namespace=self.namespace)
+        # The vector store embeds and upserts in one call, so the upsert span includes the embedding time
+        with trace_span("upsert", index=self.index_name, includes_embed=True) as span:
+            await vdb.aadd_documents(document_set)
+            span.add(items=len(document_set), bytes=sum(len(doc.page_content.encode('utf-8')) for doc in document_set))
+        return vdb
 
-        if not self.index_exists():  #pinecone does not create indexes from docs, so create it first
-            self.create_index()
+    def load_record_batch(self, records):
+        """
+        Upserts a batch of already embedded vector records into the Pinecone index, see embed_documents.
+        The text is stored in the metadata, where PineconeVectorStore expects it when querying.
 
-        vdb = PineconeVectorStore.from_documents(document_set, self.embedding_client, index_name=self.index_name)
-        return vdb
+        :param records: A list of vector records.
+        :return: The number of records upserted.
+        """
+        log_progress(f"   Writing {len(records)} vectors into VDB index {self.index_name}")
+        self.ensure_index()
+
+        vectors = [
+            {
+                "id": record["id"],
+                "values": record["values"],
+                "metadata": {**record["metadata"], PINECONE_TEXT_KEY: record["text"]}
+            }
+            for record in records
+        ]
+        self.upsert_vectors(vectors)
+        return len(vectors)
+
+    def upsert_vectors(self, vectors):
+        """
+        Upserts vectors into the index namespace. They are split into requests of up to upsert_batch_size vectors
+        and max_request_bytes, sent concurrently with the client's async requests, up to upsert_parallelism at a time.
+
+        :param vectors: A list of Pinecone vector dictionaries with id, values and metadata keys.
+        :return: The number of vectors upserted.
+        """
+        index = self.get_index()
+        sub_batches = batched_by_size(vectors, self.upsert_batch_size, self.max_request_bytes, estimate_upsert_bytes)
+        for request_group in batched(sub_batches, self.upsert_parallelism):
+            requests = [index.upsert(vectors=sub_batch, namespace=self.namespace, async_req=True)
+                        for sub_batch in request_group]
+            for request in requests:
+                # gRPC requests return futures, HTTP requests return thread pool results
+                request.result() if self.use_grpc else request.get()
+        return len(vectors)
+
+    def delete_documents(self, ids):
+        """
+        Deletes document vectors from the Pinecone index by ID.
+
+        :param ids: A list of vector IDs to delete.
+        :return: The number of IDs deleted.
+        """
+        index = self.get_index()
+        for start_index in range(0, len(ids), PINECONE_DELETE_BATCH_SIZE):
+            index.delete(ids=ids[start_index:start_index + PINECONE_DELETE_BATCH_SIZE], namespace=self.namespace)
+        self.bump_index_version()
+        return len(ids)
 
     def index_exists(self, index_name=None):
         """
@@ -77,11 +222,7 @@ class PineconeVectorLoader(BaseVectorLoader):
 
         dimension_size = self.get_vector_dimension_size()
 
-        pinecone_api_key = os.getenv('PINECONE_API_KEY')
-        if pinecone_api_key is None:
-            raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
-
-        pc = Pinecone(api_key=pinecone_api_key)
+        pc = get_pinecone_client()
 
         pc.create_index(
             name=index_name,
@@ -105,7 +246,8 @@ class PineconeVectorLoader(BaseVectorLoader):
 
     def delete_index(self, index_name=None):
         """
-        Deletes a Pinecone index.
+        Deletes a Pinecone index. When the loader writes to a namespace, only the vectors of that namespace are
+        deleted, so the other namespaces sharing the index are kept.
 
         :param index_name: The name of the index to delete.
         :return: Boolean indicating whether the deletion was successful.
@@ -113,17 +255,28 @@ class PineconeVectorLoader(BaseVectorLoader):
         if index_name is None:
             index_name = self.index_name
 
-        pinecone_api_key = os.getenv('PINECONE_API_KEY')
-        if pinecone_api_key is None:
-            raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
-
-        pc = Pinecone(api_key=pinecone_api_key)
+        if self.namespace is not None and index_name == self.index_name:
+            try:
+                log_progress(f"Deleting namespace={self.namespace} of index={index_name}")
+                self.get_index().delete(delete_all=True, namespace=self.namespace)
+                self.bump_index_version(index_name)
+                return True
+            except NotFoundException as e:
+                log_error(f"Error deleting Pinecone namespace={self.namespace} of index={index_name}: Not found. "
+                          f"error={e}")
+                return False
+
+        pc = get_pinecone_client()
         try:
-            print(f"Deleting index={index_name}")
+            log_progress(f"Deleting index={index_name}")
             pc.delete_index(index_name)
+            self.bump_index_version(index_name)
+            if index_name == self.index_name:
+                self.index_ready = False
+                self.index_handle = None
             return True
         except NotFoundException as e:
-            print(f"Error deleting Pinecone index={index_name}: Not found. error={e}")
+            log_error(f"Error deleting Pinecone index={index_name}: Not found. error={e}")
             return False
 
     def describe_index(self, index_name=None):
@@ -136,52 +289,65 @@ class PineconeVectorLoader(BaseVectorLoader):
         if index_name is None:
             index_name = self.index_name
 
-        pinecone_api_key = os.getenv('PINECONE_API_KEY')
-        if pinecone_api_key is None:
-            raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
-
-        pc = Pinecone(api_key=pinecone_api_key)
+        pc = get_pinecone_client()
         try:
-            print(f"Getting index description for {index_name}")
+            log_progress(f"Getting index description for {index_name}")
             index_info = pc.describe_index(index_name)
             return index_info.to_dict()
         except NotFoundException:
             return None
 
+    def get_index_dimension(self):
+        """
+        Gets the vector dimension of the existing Pinecone index.
+
+        :return: The index's vector dimension, or None if the index is not found.
+        """
+        index_info = self.describe_index()
+        return index_info.get('dimension') if index_info else None
+
 
 class PineconeVectorQuery(BaseVectorQuery):
     """
     Handles querying a Pinecone vector database.
     """
 
+    def __init__(self, index_name, embedding_client, namespace=None, **kwargs):
+        """
+        Initializes the PineconeVectorQuery.
+
+        :param index_name: The name of the index.
+        :param embedding_client: The LangChain embedding client to be used.
+        :param namespace: The index namespace to query, or None for the default namespace.
+        :param kwargs: Other BaseVectorQuery options, such as query_cache.
+        """
+        self.namespace = namespace
+        super().__init__(index_name, embedding_client, **kwargs)
+
     def get_client(self):
         """
         Initializes and returns a Pinecone vector database client.
 
         :return: PineconeVectorStore client instance.
         """
-        pinecone_api_key = os.getenv('PINECONE_API_KEY')  # This is used by the underlying calls, so lets check
-        if pinecone_api_key is None:
-            raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
-
-        vdb = PineconeVectorStore(index_name=self.index_name, embedding=self.embedding_client)
+        vdb = PineconeVectorStore(index=get_pinecone_client().Index(self.index_name), embedding=self.embedding_client,
+                                  namespace=self.namespace)
         return vdb
 
+    def get_result_cache_scope(self):
+        return type(self).__name__, self.index_name, self.namespace
+
     def status_check(self):
         """
         Retrieves status and statistics of the Pinecone index.
 
         :return: A dictionary containing the index status and statistics.
         """
-        pinecone_api_key = os.getenv('PINECONE_API_KEY')
-        if pinecone_api_key is None:
-            raise ValueError("PINECONE_API_KEY environment variable not set. This is your Pinecone API key.")
-
-        pc = Pinecone(api_key=pinecone_api_key)
+        pc = get_pinecone_client()
         index_info = pc.describe_index(self.index_name)
         index_dimension = index_info.dimension
 
-        index = pc.Index(self.index_name)
+        index = self.vdb_client.index
         index_stats = index.describe_index_stats()
 
         return {
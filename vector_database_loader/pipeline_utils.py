@@ -0,0 +1,456 @@
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+# Sentinel placed on a prefetch queue once the producer is exhausted
+_END_OF_STREAM = object()
+
+DEFAULT_MAX_BATCH_SIZE = 1000
+DEFAULT_MIN_BATCH_SIZE = 10
+DEFAULT_MAX_BATCH_TOKENS = 250000  # OpenAI embeddings accept up to 300k tokens per request
+VECTOR_BYTES_PER_DIMENSION = 12  # A float32 serialized as JSON takes about 12 bytes
+DEFAULT_TARGET_BATCH_LATENCY = 10.0
+DEFAULT_RETRY_BASE_DELAY = 1.0
+DEFAULT_RETRY_MAX_DELAY = 60.0
+
+
+def batched(iterable, batch_size):
+    """
+    Groups an iterable into lists of at most batch_size items, without materializing the whole iterable.
+
+    :param iterable: Any iterable, typically a generator of document chunks.
+    :param batch_size: The maximum number of items in each batch.
+    :return: A generator of lists.
+    """
+    if batch_size < 1:
+        raise ValueError(f"ERROR: batch_size must be at least 1, got {batch_size}")
+
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def prefetch(iterable, max_queued=2):
+    """
+    Runs an iterable in a background thread, handing items over through a bounded queue.
+    This lets an upstream stage (e.g. crawling and chunking) keep working while a downstream stage
+    (e.g. embedding and upserting) is busy, while at most max_queued items are held in memory.
+
+    Exceptions raised by the producer are re-raised in the consumer. If the consumer stops early,
+    the producer is told to stop at its next hand-over.
+
+    :param iterable: The upstream iterable to consume in the background.
+    :param max_queued: The maximum number of items waiting in the queue.
+    :return: A generator yielding the items of iterable in order.
+    """
+    item_queue = queue.Queue(maxsize=max(1, max_queued))
+    stop_event = threading.Event()
+
+    def put(item):
+        # Poll so an abandoned consumer can't leave the producer blocked forever
+        while not stop_event.is_set():
+            try:
+                item_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put((_END_OF_STREAM, e))
+            return
+        put((_END_OF_STREAM, None))
+
+    producer = threading.Thread(target=produce, name="vdb-loader-prefetch", daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = item_queue.get()
+            if isinstance(item, tuple) and len(item) == 2 and item[0] is _END_OF_STREAM:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        stop_event.set()
+        producer.join(timeout=5)
+
+
+def run_concurrently(items, worker, max_workers=1, on_result=None):
+    """
+    Calls worker on each item, keeping up to max_workers calls in flight in a thread pool.
+    Results are reported through on_result in input order, even when calls complete out of order.
+    The first exception stops submission of new items, waits for the calls already running and is re-raised.
+
+    Items are pulled from the iterable only as workers free up, so a streaming iterable stays bounded.
+
+    :param items: An iterable of work items, e.g. document batches.
+    :param worker: A callable taking a single item.
+    :param max_workers: The maximum number of concurrent calls. 1 runs the items serially in the calling thread.
+    :param on_result: Optional callable(index, item, result), called in input order as results become available.
+    """
+    if max_workers <= 1:
+        for index, item in enumerate(items):
+            result = worker(item)
+            if on_result is not None:
+                on_result(index, item, result)
+        return
+
+    iterator = enumerate(items)
+    exhausted = False
+    running = {}  # future -> (index, item)
+    completed = {}  # index -> (item, result), waiting for earlier items to report
+    next_to_report = 0
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vdb-loader-worker")
+    try:
+        while True:
+            # Cap completed-but-unreported results too, so one slow item can't let memory grow unbounded
+            while not exhausted and len(running) < max_workers and len(completed) < max_workers * 2:
+                try:
+                    index, item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                running[executor.submit(worker, item)] = (index, item)
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, item = running.pop(future)
+                completed[index] = (item, future.result())
+
+            while next_to_report in completed:
+                item, result = completed.pop(next_to_report)
+                if on_result is not None:
+                    on_result(next_to_report, item, result)
+                next_to_report += 1
+    finally:
+        for future in running:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+async def arun_concurrently(items, worker, max_workers=1, on_result=None):
+    """
+    Async counterpart of run_concurrently. worker is a coroutine function, and up to max_workers calls run as
+    concurrent tasks on the event loop. Items are pulled from the iterable in a worker thread, so an iterable that
+    blocks (e.g. a crawl) does not block the event loop.
+
+    :param items: An iterable of work items, e.g. document batches.
+    :param worker: A coroutine function taking a single item.
+    :param max_workers: The maximum number of concurrent calls.
+    :param on_result: Optional callable(index, item, result), called in input order as results become available.
+    """
+    iterator = enumerate(items)
+    exhausted = False
+    running = {}  # task -> (index, item)
+    completed = {}  # index -> (item, result), waiting for earlier items to report
+    next_to_report = 0
+    max_workers = max(1, max_workers)
+
+    try:
+        while True:
+            while not exhausted and len(running) < max_workers and len(completed) < max_workers * 2:
+                entry = await asyncio.to_thread(next, iterator, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                index, item = entry
+                running[asyncio.ensure_future(worker(item))] = (index, item)
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, item = running.pop(task)
+                completed[index] = (item, task.result())
+
+            while next_to_report in completed:
+                item, result = completed.pop(next_to_report)
+                if on_result is not None:
+                    on_result(next_to_report, item, result)
+                next_to_report += 1
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of embedding model tokens in a text, at roughly 4 characters per token for English text.
+
+    :param text: The text.
+    :return: The estimated token count.
+    """
+    return max(1, len(text) // 4)
+
+
+def estimate_payload_bytes(doc):
+    """
+    Estimates the payload size of a document chunk, from its text and JSON serialized metadata.
+
+    :param doc: A document chunk.
+    :return: The estimated size in bytes.
+    """
+    return len(doc.page_content.encode('utf-8')) + len(json.dumps(doc.metadata, default=str).encode('utf-8'))
+
+
+def estimate_vector_bytes(dimension):
+    """
+    Estimates the upsert request payload size of an embedding vector.
+
+    :param dimension: The vector dimension.
+    :return: The estimated size in bytes.
+    """
+    return dimension * VECTOR_BYTES_PER_DIMENSION
+
+
+def batched_by_size(items, batch_size, max_batch_bytes, get_size):
+    """
+    Groups items into lists of at most batch_size items and, unless a single item is larger, max_batch_bytes bytes.
+
+    :param items: Any iterable.
+    :param batch_size: The maximum number of items in each batch.
+    :param max_batch_bytes: The maximum total size of each batch.
+    :param get_size: A function returning the estimated size of an item in bytes.
+    :return: A generator of lists.
+    """
+    batch = []
+    batch_bytes = 0
+    for item in items:
+        item_bytes = get_size(item)
+        if batch and (len(batch) >= batch_size or batch_bytes + item_bytes > max_batch_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 0
+        batch.append(item)
+        batch_bytes += item_bytes
+
+    if batch:
+        yield batch
+
+
+def get_error_status(error):
+    """
+    Gets the HTTP status code of an error raised by an embedding or vector database client, if it has one.
+
+    :param error: The exception.
+    :return: The status code, or None.
+    """
+    for attribute in ['status_code', 'status', 'http_status', 'code']:
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(error):
+    """
+    Checks whether an error is a rate limit (HTTP 429) error.
+
+    :param error: The exception.
+    :return: Boolean indicating whether the request was throttled.
+    """
+    if get_error_status(error) == 429:
+        return True
+    message = str(error).lower()
+    return 'rate limit' in message or 'too many requests' in message or 'ratelimit' in type(error).__name__.lower()
+
+
+def is_payload_too_large_error(error):
+    """
+    Checks whether an error was caused by a request exceeding a size or token limit.
+
+    :param error: The exception.
+    :return: Boolean indicating whether the request was too large.
+    """
+    if get_error_status(error) == 413:
+        return True
+    message = str(error).lower()
+    return any(phrase in message for phrase in
+               ['too large', 'maximum context length', 'max_tokens_per_request', 'exceeds the maximum',
+                'request size', 'message length'])
+
+
+class AdaptiveBatcher:
+    """
+    Forms document batches bounded by chunk count, estimated tokens and, optionally, estimated payload bytes.
+    The chunk count limit adapts to feedback: it grows while batches load quickly, and shrinks after a throttling or
+    size error. Batches that are too large are split in half and retried by the loader.
+    """
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, min_batch_size=DEFAULT_MIN_BATCH_SIZE,
+                 initial_batch_size=None, max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS,
+                 max_batch_bytes=None, target_latency=DEFAULT_TARGET_BATCH_LATENCY):
+        """
+        Initializes the AdaptiveBatcher.
+
+        :param max_batch_size: The largest number of chunks per batch.
+        :param min_batch_size: The smallest number of chunks the batch size shrinks to.
+        :param initial_batch_size: The starting batch size. Defaults to max_batch_size.
+        :param max_batch_tokens: The maximum estimated tokens per batch, e.g. the embedding provider's per request limit.
+        :param max_batch_bytes: The maximum estimated bytes of text and metadata per batch, or None for no limit.
+          Vector database request size limits are applied by the loaders to each of their write requests.
+        :param target_latency: Batches loading in under half this many seconds grow the batch size.
+        """
+        self.max_batch_size = max_batch_size
+        self.min_batch_size = min(min_batch_size, max_batch_size)
+        self.batch_size = initial_batch_size or max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_bytes = max_batch_bytes
+        self.target_latency = target_latency
+        self.lock = threading.Lock()
+
+    def batches(self, documents):
+        """
+        Groups documents into batches within the current limits, without materializing the whole iterable.
+
+        :param documents: An iterable of document chunks.
+        :return: A generator of lists of document chunks.
+        """
+        batch = []
+        batch_tokens = 0
+        batch_bytes = 0
+        for doc in documents:
+            doc_tokens = estimate_tokens(doc.page_content)
+            doc_bytes = estimate_payload_bytes(doc)
+            if batch and (len(batch) >= self.batch_size
+                          or batch_tokens + doc_tokens > self.max_batch_tokens
+                          or (self.max_batch_bytes is not None and batch_bytes + doc_bytes > self.max_batch_bytes)):
+                yield batch
+                batch = []
+                batch_tokens = 0
+                batch_bytes = 0
+            batch.append(doc)
+            batch_tokens += doc_tokens
+            batch_bytes += doc_bytes
+
+        if batch:
+            yield batch
+
+    def record_success(self, batch_length, latency):
+        """
+        Records a successfully loaded batch, growing the batch size if it loaded quickly.
+
+        :param batch_length: The number of chunks in the batch.
+        :param latency: The time the batch took to load, in seconds.
+        """
+        with self.lock:
+            if latency < self.target_latency / 2 and batch_length >= self.batch_size:
+                self.batch_size = min(self.max_batch_size, max(self.batch_size + 1, int(self.batch_size * 1.5)))
+            elif latency > self.target_latency * 2:
+                self.batch_size = max(self.min_batch_size, int(self.batch_size * 0.75))
+
+    def record_failure(self, batch_length):
+        """
+        Records a batch that failed with a throttling or size error, halving the batch size.
+
+        :param batch_length: The number of chunks in the failed batch.
+        """
+        with self.lock:
+            self.batch_size = max(self.min_batch_size, min(self.batch_size, batch_length) // 2)
+
+
+def is_retryable_error(error):
+    """
+    Checks whether an error is transient and worth retrying: throttling, a server side (5xx) error, or a
+    connection problem or timeout.
+
+    :param error: The exception.
+    :return: Boolean indicating whether the call should be retried.
+    """
+    if is_rate_limit_error(error):
+        return True
+    status = get_error_status(error)
+    if status is not None and 500 <= status < 600:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    error_name = type(error).__name__.lower()
+    return any(name in error_name for name in ['timeout', 'connection', 'serviceunavailable', 'internalserver'])
+
+
+def get_backoff_delay(attempt, base_delay=DEFAULT_RETRY_BASE_DELAY, max_delay=DEFAULT_RETRY_MAX_DELAY):
+    """
+    Gets a jittered exponential backoff delay ("full jitter"), so concurrent callers don't retry in lockstep.
+
+    :param attempt: The retry attempt, starting at 0.
+    :param base_delay: The delay ceiling of the first retry, in seconds.
+    :param max_delay: The largest delay ceiling, in seconds.
+    :return: The delay in seconds.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def call_with_retries(function, max_retries, base_delay=DEFAULT_RETRY_BASE_DELAY,
+                      max_delay=DEFAULT_RETRY_MAX_DELAY, on_retry=None):
+    """
+    Calls a function, retrying transient errors (see is_retryable_error) with jittered exponential backoff.
+
+    :param function: A callable taking no arguments.
+    :param max_retries: The maximum number of retries after the first attempt.
+    :param base_delay: The delay ceiling of the first retry, in seconds.
+    :param max_delay: The largest delay ceiling, in seconds.
+    :param on_retry: Optional callable(error, attempt, delay), called before each retry.
+    :return: The function's result.
+    """
+    attempt = 0
+    while True:
+        try:
+            return function()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            delay = get_backoff_delay(attempt, base_delay, max_delay)
+            if on_retry is not None:
+                on_retry(e, attempt, delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+async def acall_with_retries(coroutine_function, max_retries, base_delay=DEFAULT_RETRY_BASE_DELAY,
+                             max_delay=DEFAULT_RETRY_MAX_DELAY, on_retry=None):
+    """
+    Async counterpart of call_with_retries.
+
+    :param coroutine_function: A coroutine function taking no arguments.
+    :param max_retries: The maximum number of retries after the first attempt.
+    :param base_delay: The delay ceiling of the first retry, in seconds.
+    :param max_delay: The largest delay ceiling, in seconds.
+    :param on_retry: Optional callable(error, attempt, delay), called before each retry.
+    :return: The coroutine's result.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await coroutine_function()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            delay = get_backoff_delay(attempt, base_delay, max_delay)
+            if on_retry is not None:
+                on_retry(e, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
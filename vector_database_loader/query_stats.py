@@ -0,0 +1,101 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+DEFAULT_STATS_WINDOW = 1000
+QUERY_PHASES = ["embed", "search", "post", "total"]
+STATS_PERCENTILES = [50, 95, 99]
+
+
+class QueryStats:
+    """
+    Rolling query latency statistics per index. The last window timings of each query phase are kept, embedding the
+    query, the vector store search, post-processing such as result caching, and the total, so percentiles show whether
+    slow queries come from the embedding provider or the vector store. One instance can be shared by several query
+    classes and threads.
+    """
+
+    def __init__(self, window=DEFAULT_STATS_WINDOW):
+        """
+        Initializes the QueryStats.
+
+        :param window: The number of most recent queries the percentiles are computed over, per index.
+        """
+        self.window = window
+        self.lock = threading.Lock()
+        self.timings = {}  # index name -> phase -> deque of milliseconds
+        self.counts = {}  # index name -> number of queries recorded
+        self.cached_counts = {}  # index name -> number of queries answered from the result cache
+
+    def record(self, index_name, timings):
+        """
+        Records the timings of one query.
+
+        :param index_name: The name of the queried index.
+        :param timings: A dictionary with embed_ms, search_ms, post_ms, total_ms and cached keys.
+        """
+        with self.lock:
+            if index_name not in self.timings:
+                self.timings[index_name] = {phase: deque(maxlen=self.window) for phase in QUERY_PHASES}
+                self.counts[index_name] = 0
+                self.cached_counts[index_name] = 0
+            for phase in QUERY_PHASES:
+                self.timings[index_name][phase].append(timings[f"{phase}_ms"])
+            self.counts[index_name] += 1
+            self.cached_counts[index_name] += bool(timings.get("cached"))
+
+    def get_stats(self, index_name):
+        """
+        Gets the latency percentiles of an index.
+
+        :param index_name: The name of the index.
+        :return: A dictionary with the query count, the cached query count and, for each phase, the p50, p95 and p99
+          latency in milliseconds, e.g. {"count": 10, "cached": 2, "embed": {"p50_ms": 12.1, ...}, ...}.
+        """
+        with self.lock:
+            phase_timings = {phase: list(values) for phase, values in self.timings.get(index_name, {}).items()}
+            stats = {"count": self.counts.get(index_name, 0), "cached": self.cached_counts.get(index_name, 0)}
+
+        for phase in QUERY_PHASES:
+            values = phase_timings.get(phase)
+            percentiles = np.percentile(values, STATS_PERCENTILES) if values else [None] * len(STATS_PERCENTILES)
+            stats[phase] = {f"p{percentile}_ms": None if value is None else float(value)
+                            for percentile, value in zip(STATS_PERCENTILES, percentiles)}
+        return stats
+
+    def reset(self, index_name=None):
+        """
+        Clears the recorded timings.
+
+        :param index_name: The index to clear, or None for every index.
+        """
+        with self.lock:
+            for stats in (self.timings, self.counts, self.cached_counts):
+                if index_name is None:
+                    stats.clear()
+                else:
+                    stats.pop(index_name, None)
+
+
+class PrometheusQueryMetrics:
+    """
+    A query metrics hook exporting query latencies as a Prometheus histogram, labelled by index and phase.
+    Pass an instance as metrics_hook to a query class.
+    """
+
+    def __init__(self, name="vector_query_latency_seconds", registry=None):
+        """
+        Initializes the PrometheusQueryMetrics.
+
+        :param name: The histogram name.
+        :param registry: Optional prometheus_client registry, defaults to the global registry.
+        """
+        from prometheus_client import Histogram, REGISTRY  # Only needed when exporting to Prometheus
+
+        self.histogram = Histogram(name, "Vector database query latency by phase", ["index", "phase"],
+                                   registry=registry or REGISTRY)
+
+    def __call__(self, index_name, timings):
+        for phase in QUERY_PHASES:
+            self.histogram.labels(index=index_name, phase=phase).observe(timings[f"{phase}_ms"] / 1000)
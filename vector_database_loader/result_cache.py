@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_RESULT_CACHE_ENTRIES = 1000
+
+_index_versions = {}
+_index_versions_lock = threading.Lock()
+
+
+def get_index_version(index_name):
+    """
+    Gets the write version of an index in this process. The version starts at 0 and is bumped by every loader write
+    to an index of that name, so cached search results can tell whether the index changed since they were stored.
+
+    :param index_name: The name of the index.
+    :return: The current version number.
+    """
+    with _index_versions_lock:
+        return _index_versions.get(index_name, 0)
+
+
+def bump_index_version(index_name):
+    """
+    Marks an index as changed, invalidating the search results cached for it.
+
+    :param index_name: The name of the index.
+    :return: The new version number.
+    """
+    with _index_versions_lock:
+        _index_versions[index_name] = _index_versions.get(index_name, 0) + 1
+        return _index_versions[index_name]
+
+
+def get_filter_key(search_filter):
+    """
+    Gets a cache key for a search filter.
+
+    :param search_filter: The filter passed to the vector store, e.g. a Pinecone metadata filter dictionary.
+    :return: A string key, or None if the filter cannot be used as a key, e.g. a callable.
+    """
+    if search_filter is None:
+        return ""
+    if callable(search_filter):
+        return None
+    try:
+        return json.dumps(search_filter, sort_keys=True)
+    except TypeError:
+        return None
+
+
+class SearchResultCache:
+    """
+    An in-process LRU cache of similarity search results, keyed by index, query, number of results and filter.
+    Each entry records the index version it was searched at (see get_index_version), so results are dropped as soon as
+    a loader in this process writes to the index. Writes made by other processes are not seen, use ttl_seconds to bound
+    the staleness of results in that case.
+    """
+
+    def __init__(self, max_entries=DEFAULT_RESULT_CACHE_ENTRIES, ttl_seconds=None):
+        """
+        Initializes the SearchResultCache.
+
+        :param max_entries: The maximum number of search results kept.
+        :param ttl_seconds: Optional number of seconds an entry stays valid.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (index version, results, stored time)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, index_name):
+        """
+        Looks up cached search results.
+
+        :param key: The cache key, see BaseVectorQuery.get_result_cache_key.
+        :param index_name: The name of the searched index.
+        :return: A list of the cached documents, or None for a cache miss.
+        """
+        version = get_index_version(index_name)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[0] != version or (self.ttl_seconds is not None and
+                                                              time.monotonic() - entry[2] > self.ttl_seconds)):
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return list(entry[1])
+
+    def put(self, key, version, results):
+        """
+        Stores search results.
+
+        :param key: The cache key.
+        :param version: The index version read before the search was run, so a write during the search invalidates it.
+        :param results: The list of documents returned by the search.
+        """
+        with self.lock:
+            self.entries[key] = (version, list(results), time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
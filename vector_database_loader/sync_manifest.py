@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import threading
+
+from vector_database_loader.embedding_cache import get_text_hash
+
+
+def get_chunk_id(source_name, document_source, chunk_offset, content_hash):
+    """
+    Builds a stable ID for a document chunk, so reloading the same content upserts the same vector IDs.
+
+    :param source_name: The name of the content source the chunk came from.
+    :param document_source: The source of the chunk's document, e.g. its URL or file path.
+    :param chunk_offset: The position of the chunk within its document.
+    :param content_hash: The hash of the chunk text.
+    :return: The chunk ID, a hex digest.
+    """
+    return get_text_hash(f"{source_name}\0{document_source}\0{chunk_offset}\0{content_hash}")
+
+
+def assign_chunk_ids(documents, source_name):
+    """
+    Sets a stable ID on each document chunk, derived from the content source name, the document source,
+    the chunk's offset within that document and a hash of the chunk text. Works lazily, so it can wrap a stream.
+
+    :param documents: An iterable of document chunks.
+    :param source_name: The name of the content source.
+    :return: A generator of the same document chunks, with their id set.
+    """
+    chunk_offsets = {}
+    for doc in documents:
+        document_source = doc.metadata.get('source', 'Unknown')
+        chunk_offset = chunk_offsets.get(document_source, 0)
+        chunk_offsets[document_source] = chunk_offset + 1
+        doc.id = get_chunk_id(source_name, document_source, chunk_offset, get_text_hash(doc.page_content))
+        yield doc
+
+
+def get_checkpoint_key(doc):
+    """
+    Gets the key a document chunk is recorded under in a LoadCheckpoint: its ID, or a hash of its text when it has none.
+
+    :param doc: A document chunk.
+    :return: The checkpoint key.
+    """
+    return doc.id or get_text_hash(doc.page_content)
+
+
+def get_file_hash(file_path, block_size=1024 * 1024):
+    """
+    Gets the SHA-256 hex digest of a file's content, reading it in blocks.
+
+    :param file_path: The path of the file.
+    :param block_size: The number of bytes read at a time.
+    :return: The hex digest.
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+class LoadCheckpoint:
+    """
+    An append-only file recording the document chunks loaded so far, so a restarted load can skip them.
+    Each line holds an index name and a chunk key, and lines are flushed as soon as their batch completes.
+    Chunks rather than batches are recorded, so a resumed load does not depend on the batch boundaries matching.
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the LoadCheckpoint, reading the checkpoint file if it exists.
+
+        :param path: The checkpoint file path.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.completed = set()
+        self.index_names = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    parts = line.strip().split('\t')
+                    if len(parts) == 2:
+                        self.index_names.add(parts[0])
+                        self.completed.add((parts[0], parts[1]))
+
+    def has_progress(self, index_name):
+        """
+        Checks whether any chunk of an index has been recorded as loaded.
+
+        :param index_name: The name of the index.
+        :return: Boolean indicating whether a load of the index is being resumed.
+        """
+        with self.lock:
+            return index_name in self.index_names
+
+    def get_remaining(self, index_name, documents):
+        """
+        Filters out the document chunks already recorded as loaded.
+
+        :param index_name: The name of the index.
+        :param documents: A list of document chunks.
+        :return: The list of chunks not loaded yet.
+        """
+        with self.lock:
+            return [doc for doc in documents if (index_name, get_checkpoint_key(doc)) not in self.completed]
+
+    def mark_complete(self, index_name, documents):
+        """
+        Records document chunks as loaded.
+
+        :param index_name: The name of the index.
+        :param documents: A list of document chunks.
+        """
+        keys = [get_checkpoint_key(doc) for doc in documents]
+        with self.lock:
+            self.completed.update((index_name, key) for key in keys)
+            self.index_names.add(index_name)
+            with open(self.path, 'a') as f:
+                f.writelines(f"{index_name}\t{key}\n" for key in keys)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """
+        Forgets all loaded chunks and removes the checkpoint file, once a load has completed.
+        """
+        with self.lock:
+            self.completed = set()
+            self.index_names = set()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class SyncManifest:
+    """
+    A local JSON manifest of the chunk IDs and content hashes loaded for each content source of each index.
+    It lets a sync load upsert only new or changed chunks and delete the vectors of chunks that disappeared.
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the SyncManifest, reading the manifest file if it exists.
+
+        :param path: The manifest file path.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.indexes = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.indexes = json.load(f)
+
+    def get_source_chunks(self, index_name, source_name):
+        """
+        Gets the chunks recorded for a content source.
+
+        :param index_name: The name of the index.
+        :param source_name: The name of the content source.
+        :return: A dictionary of chunk ID to content hash.
+        """
+        with self.lock:
+            return dict(self.indexes.get(index_name, {}).get(source_name, {}))
+
+    def set_source_chunks(self, index_name, source_name, chunks):
+        """
+        Records the chunks of a content source, replacing what was recorded before, and saves the manifest.
+
+        :param index_name: The name of the index.
+        :param source_name: The name of the content source.
+        :param chunks: A dictionary of chunk ID to content hash.
+        """
+        with self.lock:
+            self.indexes.setdefault(index_name, {})[source_name] = dict(chunks)
+            self._save()
+
+    def clear_index(self, index_name):
+        """
+        Forgets everything recorded for an index, e.g. after the index was deleted, and saves the manifest.
+
+        :param index_name: The name of the index.
+        """
+        with self.lock:
+            self.indexes.pop(index_name, None)
+            self._save()
+
+    def _save(self):
+        # Write to a temporary file first, so a crash never leaves a truncated manifest behind
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.indexes, f)
+        os.replace(temp_path, self.path)
+
+
+class FileManifest:
+    """
+    A local JSON manifest of the files of each folder content source: their path, size, modification time, content
+    hash and the IDs of the chunks each file produced. Used with a SyncManifest, a sync load skips the files that did
+    not change before parsing them and carries their chunks forward. Use one file manifest per index.
+
+    Checking a folder stages the state of its files, see get_changed_files, and commit_source records it once the
+    source has been loaded, so an interrupted load checks the same files again.
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the FileManifest, reading the manifest file if it exists.
+
+        :param path: The manifest file path.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.sources = {}  # source name -> file path -> {"size", "mtime", "hash", "chunks"}
+        self.staged = {}  # source name -> file path -> (file record, whether the file changed)
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.sources = json.load(f)
+
+    def get_source_files(self, source_name):
+        """
+        Gets the files recorded for a content source.
+
+        :param source_name: The name of the content source.
+        :return: A dictionary of file path to a dictionary of its size, mtime, hash and chunk IDs.
+        """
+        with self.lock:
+            return {file_path: dict(record) for file_path, record in self.sources.get(source_name, {}).items()}
+
+    def get_changed_files(self, source_name, file_paths):
+        """
+        Finds the new or modified files of a content source and stages the state of all its files. A file with the
+        recorded size and modification time is unchanged without being read. Otherwise it is hashed, so a file that
+        was only touched or copied is not parsed again.
+
+        :param source_name: The name of the content source.
+        :param file_paths: The paths of the source's current files.
+        :return: The list of new or modified file paths, in the given order.
+        """
+        previous_files = self.get_source_files(source_name)
+        staged_files = {}
+        changed_paths = []
+        for file_path in file_paths:
+            stat = os.stat(file_path)
+            record = previous_files.get(file_path)
+            if record is not None and record['size'] == stat.st_size and record['mtime'] == stat.st_mtime:
+                staged_files[file_path] = (record, False)
+                continue
+
+            file_hash = get_file_hash(file_path)
+            if record is not None and record['hash'] == file_hash:
+                staged_files[file_path] = (dict(record, size=stat.st_size, mtime=stat.st_mtime), False)
+                continue
+
+            staged_files[file_path] = ({"size": stat.st_size, "mtime": stat.st_mtime, "hash": file_hash,
+                                        "chunks": []}, True)
+            changed_paths.append(file_path)
+
+        with self.lock:
+            self.staged[source_name] = staged_files
+        return changed_paths
+
+    def get_unchanged_chunk_ids(self, source_name):
+        """
+        Gets the chunk IDs of the files staged as unchanged, which were skipped rather than parsed.
+
+        :param source_name: The name of the content source.
+        :return: A list of chunk IDs.
+        """
+        with self.lock:
+            return [chunk_id for record, changed in self.staged.get(source_name, {}).values() if not changed
+                    for chunk_id in record['chunks']]
+
+    def commit_source(self, source_name, file_chunk_ids):
+        """
+        Records the staged files of a content source, replacing what was recorded before, and saves the manifest.
+        Files no longer in the source are dropped. A changed file that produced no chunks, e.g. because it failed to
+        parse, is not recorded, so it is parsed again next time.
+
+        :param source_name: The name of the content source.
+        :param file_chunk_ids: A dictionary of changed file path to the IDs of the chunks it produced.
+        """
+        with self.lock:
+            files = {}
+            for file_path, (record, changed) in self.staged.pop(source_name, {}).items():
+                if changed:
+                    if not file_chunk_ids.get(file_path):
+                        continue
+                    record = dict(record, chunks=list(file_chunk_ids[file_path]))
+                files[file_path] = record
+            self.sources[source_name] = files
+            self._save()
+
+    def clear(self):
+        """
+        Forgets all recorded files, e.g. after the index was deleted, and saves the manifest.
+        """
+        with self.lock:
+            self.sources = {}
+            self.staged = {}
+            self._save()
+
+    def _save(self):
+        # Write to a temporary file first, so a crash never leaves a truncated manifest behind
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.sources, f)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+# The load pipeline stages spans are recorded for
+PIPELINE_STAGES = ["crawl", "parse", "cleanup", "chunk", "embed", "upsert"]
+
+
+class Span:
+    """
+    One timed unit of work of a pipeline stage, such as parsing a file or embedding a batch, with the number of
+    items, bytes and estimated tokens it handled.
+    """
+
+    def __init__(self, name, attributes=None):
+        """
+        Initializes the Span.
+
+        :param name: The stage name, e.g. "embed".
+        :param attributes: Optional dictionary describing the work, e.g. {"source": "Docs", "path": "a.pdf"}.
+        """
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.items = 0
+        self.bytes = 0
+        self.tokens = 0
+        self.error = None
+        self.start_time = time.time()
+        self.end_time = None
+        self._start_counter = time.perf_counter()
+        self.duration = None
+
+    def add(self, items=0, bytes=0, tokens=0):
+        """
+        Adds to the span's item, byte and token counts.
+
+        :param items: The number of items handled, e.g. documents or vectors.
+        :param bytes: The number of bytes handled.
+        :param tokens: The estimated number of tokens handled.
+        """
+        self.items += items
+        self.bytes += bytes
+        self.tokens += tokens
+
+    def end(self):
+        self.duration = time.perf_counter() - self._start_counter
+        self.end_time = self.start_time + self.duration
+
+    def to_dict(self):
+        """
+        :return: The span as a dictionary, for structured logging.
+        """
+        return {
+            "stage": self.name,
+            "duration_s": self.duration,
+            "items": self.items,
+            "bytes": self.bytes,
+            "tokens": self.tokens,
+            "error": None if self.error is None else repr(self.error),
+            **self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Records the spans of the load pipeline and keeps running totals per stage, so the slow stage of a long load can be
+    found with get_stage_totals or print_summary. Finished spans are passed to each exporter, any callable taking a
+    Span, such as a LoggingSpanExporter or an OpenTelemetrySpanExporter.
+
+    A quiet tracer also silences the pipeline's progress output, see log_progress.
+    """
+
+    def __init__(self, exporters=None, quiet=False):
+        """
+        Initializes the Tracer.
+
+        :param exporters: Optional list of callables called with every finished Span.
+        :param quiet: Whether to silence the pipeline's progress output. Errors are still printed.
+        """
+        self.exporters = list(exporters or [])
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.stage_totals = {}
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Times a block of work as a span. The span is yielded so the block can add its counts.
+
+        :param name: The stage name, one of PIPELINE_STAGES or any other.
+        :param attributes: Attributes describing the work.
+        :return: A context manager yielding the Span.
+        """
+        span = Span(name, attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = e
+            raise
+        finally:
+            span.end()
+            self.record(span)
+
+    def record(self, span):
+        """
+        Adds a finished span to the stage totals and exports it.
+
+        :param span: The finished Span.
+        """
+        with self.lock:
+            totals = self.stage_totals.setdefault(span.name, {"spans": 0, "duration_s": 0.0, "items": 0, "bytes": 0,
+                                                              "tokens": 0, "errors": 0})
+            totals["spans"] += 1
+            totals["duration_s"] += span.duration
+            totals["items"] += span.items
+            totals["bytes"] += span.bytes
+            totals["tokens"] += span.tokens
+            totals["errors"] += span.error is not None
+
+        for exporter in self.exporters:
+            exporter(span)
+
+    def get_stage_totals(self):
+        """
+        :return: A dictionary of stage name to its span count, total duration in seconds, items, bytes, tokens and
+          errors.
+        """
+        with self.lock:
+            return {name: dict(totals) for name, totals in self.stage_totals.items()}
+
+    def reset(self):
+        with self.lock:
+            self.stage_totals.clear()
+
+    def print_summary(self):
+        """
+        Prints the stage totals, slowest stage first. Stages running concurrently overlap, so the durations may add
+        up to more than the wall clock time of the load.
+        """
+        stage_totals = sorted(self.get_stage_totals().items(), key=lambda item: item[1]["duration_s"], reverse=True)
+        print(f"{'Stage':<10} {'Spans':>8} {'Seconds':>10} {'Items':>10} {'MB':>10} {'Tokens':>12} {'Errors':>7}")
+        for name, totals in stage_totals:
+            print(f"{name:<10} {totals['spans']:>8} {totals['duration_s']:>10.2f} {totals['items']:>10} "
+                  f"{totals['bytes'] / 1024 / 1024:>10.2f} {totals['tokens']:>12} {totals['errors']:>7}")
+
+
+class LoggingSpanExporter:
+    """
+    A span exporter writing each finished span as a structured log record. The span's fields are in the record's
+    extra "span" attribute, for JSON log formatters.
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        """
+        Initializes the LoggingSpanExporter.
+
+        :param logger: The logger to write to, defaults to the "vector_database_loader" logger.
+        :param level: The log level of the span records.
+        """
+        self.logger = logger or logging.getLogger("vector_database_loader")
+        self.level = level
+
+    def __call__(self, span):
+        span_fields = span.to_dict()
+        self.logger.log(self.level, f"{span.name} took {span.duration:.3f}s items={span.items} bytes={span.bytes} "
+                                    f"tokens={span.tokens}", extra={"span": span_fields})
+
+
+class OpenTelemetrySpanExporter:
+    """
+    A span exporter recreating each finished span as an OpenTelemetry span, with its measured start and end time.
+    Needs the opentelemetry-api package, and an SDK with an exporter configured to send the spans anywhere.
+    """
+
+    def __init__(self, otel_tracer=None):
+        """
+        Initializes the OpenTelemetrySpanExporter.
+
+        :param otel_tracer: Optional OpenTelemetry tracer, defaults to one from the global tracer provider.
+        """
+        from opentelemetry import trace  # Only needed when exporting to OpenTelemetry
+
+        self.otel_tracer = otel_tracer or trace.get_tracer("vector_database_loader")
+
+    def __call__(self, span):
+        attributes = {key: value for key, value in span.to_dict().items()
+                      if isinstance(value, (str, bool, int, float))}
+        otel_span = self.otel_tracer.start_span(f"vdb.{span.name}", start_time=int(span.start_time * 1e9),
+                                                attributes=attributes)
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """
+    :return: The Tracer the load pipeline records its spans in.
+    """
+    return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Sets the Tracer the load pipeline records its spans in, e.g. Tracer(exporters=[LoggingSpanExporter()], quiet=True).
+
+    :param tracer: The Tracer to use.
+    :return: The previous Tracer.
+    """
+    global _tracer
+    previous_tracer = _tracer
+    _tracer = tracer
+    return previous_tracer
+
+
+def trace_span(name, **attributes):
+    """
+    Times a block of work as a span of the current tracer, see Tracer.span.
+
+    :param name: The stage name.
+    :param attributes: Attributes describing the work.
+    :return: A context manager yielding the Span.
+    """
+    return _tracer.span(name, **attributes)
+
+
+def log_progress(message):
+    """
+    Prints a progress message, unless the current tracer is quiet.
+
+    :param message: The message to print.
+    """
+    if not _tracer.quiet:
+        print(message)
+
+
+def log_error(message):
+    """
+    Reports an error the load pipeline recovers from, such as a retried batch or a skipped page. The message is
+    printed, or when the current tracer is quiet, written as a warning to the "vector_database_loader" logger.
+
+    :param message: The message to report.
+    """
+    if _tracer.quiet:
+        logging.getLogger("vector_database_loader").warning(message)
+    else:
+        print(message)
+
+
+def record_span(name, duration, items=0, bytes=0, tokens=0, error=None, **attributes):
+    """
+    Records a span of work timed elsewhere, such as a file parsed in a worker process, in the current tracer.
+
+    :param name: The stage name.
+    :param duration: The duration of the work in seconds.
+    :param items: The number of items handled.
+    :param bytes: The number of bytes handled.
+    :param tokens: The estimated number of tokens handled.
+    :param error: The exception the work failed with, if any.
+    :param attributes: Attributes describing the work.
+    """
+    span = Span(name, attributes)
+    span.add(items=items, bytes=bytes, tokens=tokens)
+    span.error = error
+    span.duration = duration
+    span.start_time = time.time() - duration
+    span.end_time = span.start_time + duration
+    _tracer.record(span)